@@ -15,10 +15,35 @@ the Free Software Foundation, either version 3 of the License, or
 (at your option) any later version.
 """
 
+import functools
 import json
 import sqlite3
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _memoized_query(method: Callable) -> Callable:
+    """Cache a no-argument query for the life of the connection.
+
+    Rows are flat dicts, so a shallow copy of each is enough for callers to
+    add or change keys without touching what later calls get back.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self):
+        cached = self._query_cache.get(method.__name__)
+        if cached is None:
+            rows = method(self)
+            self._query_cache[method.__name__] = [dict(row) for row in rows]
+            return rows
+        return [dict(row) for row in cached]
+
+    return wrapper
+
+
+# Timestamp columns that newer databases store in milliseconds
+TIMESTAMP_FIELDS = ("birthTime", "cTime", "uTime", "mTime", "imageDate", "videoDate")
 
 
 class IbiDatabaseParser:
@@ -43,9 +68,12 @@ class IbiDatabaseParser:
         self.backup_db_path = Path(backup_db_path) if backup_db_path else None
         self.conn = None
         self.backup_conn = None
+        # Results of whole-table queries, reset whenever the connection changes
+        self._query_cache: Dict[str, List[Dict]] = {}
 
     def connect(self) -> None:
         """Connect to the SQLite database and optionally backup database."""
+        self._query_cache.clear()
         self.conn = sqlite3.connect(self.db_path)
         self.conn.row_factory = sqlite3.Row
 
@@ -59,6 +87,7 @@ class IbiDatabaseParser:
 
     def close(self) -> None:
         """Close database connections."""
+        self._query_cache.clear()
         if self.conn:
             self.conn.close()
         if self.backup_conn:
@@ -120,6 +149,7 @@ class IbiDatabaseParser:
             "albums": album_count,
         }
 
+    @_memoized_query
     def get_all_files(self) -> List[Dict]:
         """Get all files with portable metadata (excludes ibi ecosystem data)."""
         if not self.conn:
@@ -187,54 +217,32 @@ class IbiDatabaseParser:
         ORDER BY COALESCE(f.videoDate, f.imageDate, f.cTime)
         """
 
-        # Handle potential timestamp conversion (milliseconds to seconds for display)
-        results = []
-        for row in self.conn.execute(query).fetchall():
-            row_dict = dict(row)
-            # Convert millisecond timestamps to seconds for compatibility
-            for timestamp_field in [
-                "birthTime",
-                "cTime",
-                "uTime",
-                "mTime",
-                "imageDate",
-                "videoDate",
-            ]:
-                if (
-                    timestamp_field in row_dict
-                    and row_dict[timestamp_field] is not None
-                ):
+        # Only convert timestamp columns this database actually has
+        timestamp_fields = [
+            field for field in TIMESTAMP_FIELDS if field in available_columns
+        ]
+
+        def fetch_files(conn: sqlite3.Connection) -> List[Dict]:
+            """Run the files query, converting millisecond timestamps to seconds."""
+            rows = []
+            for row in conn.execute(query):
+                row_dict = dict(row)
+                for timestamp_field in timestamp_fields:
+                    value = row_dict[timestamp_field]
                     # If timestamp is in milliseconds (> year 2100 in seconds), convert to seconds
-                    if row_dict[timestamp_field] > 4000000000:  # roughly year 2095
-                        row_dict[timestamp_field] = row_dict[timestamp_field] / 1000.0
-            results.append(row_dict)
+                    if value is not None and value > 4000000000:  # roughly year 2095
+                        row_dict[timestamp_field] = value / 1000.0
+                rows.append(row_dict)
+            return rows
+
+        results = fetch_files(self.conn)
 
         # If backup database is available, merge additional files
         if self.backup_conn:
             try:
-                backup_results = []
-                for row in self.backup_conn.execute(query).fetchall():
-                    row_dict = dict(row)
-                    # Convert timestamps and mark as backup source
-                    for timestamp_field in [
-                        "birthTime",
-                        "cTime",
-                        "uTime",
-                        "mTime",
-                        "imageDate",
-                        "videoDate",
-                    ]:
-                        if (
-                            timestamp_field in row_dict
-                            and row_dict[timestamp_field] is not None
-                        ):
-                            if row_dict[timestamp_field] > 4000000000:
-                                row_dict[timestamp_field] = (
-                                    row_dict[timestamp_field] / 1000.0
-                                )
-
+                backup_results = fetch_files(self.backup_conn)
+                for row_dict in backup_results:
                     row_dict["_source"] = "backup"
-                    backup_results.append(row_dict)
 
                 # Find files in backup that aren't in main database
                 main_content_ids = {item["contentID"] for item in results}
@@ -281,6 +289,7 @@ class IbiDatabaseParser:
 
         return [dict(row) for row in self.conn.execute(query, (file_id,)).fetchall()]
 
+    @_memoized_query
     def get_all_albums(self) -> List[Dict]:
         """Get all albums with their file counts."""
         if not self.conn:
@@ -299,6 +308,7 @@ class IbiDatabaseParser:
 
         return [dict(row) for row in self.conn.execute(query).fetchall()]
 
+    @_memoized_query
     def get_content_tags_summary(self) -> List[Dict]:
         """Get summary of AI-generated content tags."""
         if not self.conn:
@@ -357,13 +367,32 @@ class IbiDatabaseParser:
         """Export all useful data in a structured format."""
         files = self.get_all_files()
 
+        # Tags and albums for all files in one query each, rather than
+        # get_file_tags/get_file_albums twice per file
+        tags_by_file = defaultdict(list)
+        for row in self.conn.execute(
+            "SELECT fileID, tag, auto FROM FilesTags ORDER BY tag"
+        ):
+            if row["auto"]:
+                tags_by_file[row["fileID"]].append(row["tag"])
+
+        albums_by_file = defaultdict(list)
+        for row in self.conn.execute(
+            """
+            SELECT fgf.fileID, fg.id, fg.name, fg.description, fg.estCount
+            FROM FileGroups fg
+            JOIN FileGroupFiles fgf ON fg.id = fgf.fileGroupID
+            ORDER BY fg.name
+            """
+        ):
+            album = dict(row)
+            albums_by_file[album.pop("fileID")].append(album)
+
         # Enhance each file with tags and albums
         for file_record in files:
             file_id = file_record["id"]
-            file_record["ai_tags"] = [
-                tag["tag"] for tag in self.get_file_tags(file_id) if tag["auto"]
-            ]
-            file_record["albums"] = self.get_file_albums(file_id)
+            file_record["ai_tags"] = tags_by_file.get(file_id, [])
+            file_record["albums"] = albums_by_file.get(file_id, [])
 
             # Add physical file path if available
             if self.files_dir:
@@ -372,12 +401,13 @@ class IbiDatabaseParser:
                     str(physical_path) if physical_path else None
                 )
 
+        content_tags_summary = self.get_content_tags_summary()
         return {
             "database_info": self.get_database_info(),
             "files": files,
             "albums": self.get_all_albums(),
-            "content_tags_summary": self.get_content_tags_summary(),
-            "tags_summary": self.get_content_tags_summary(),  # Alias for compatibility
+            "content_tags_summary": content_tags_summary,
+            "tags_summary": [dict(row) for row in content_tags_summary],  # Compat alias
             "recovery_stats": self.verify_file_recovery_rate(),  # Include recovery stats
             "export_timestamp": str(Path().cwd()),  # Placeholder for actual timestamp
         }
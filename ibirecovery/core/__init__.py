@@ -21,18 +21,28 @@ from .database import (
     get_all_files_with_albums,
     get_comprehensive_export_data,
     get_merged_files_with_albums,
+    load_files_with_albums,
+    load_filesystem_paths,
 )
 from .export import MetadataExporter, export_metadata_formats
 from .file_operations import (
     check_rsync_available,
+    copy_file_data,
     copy_file_fallback,
     copy_file_rsync,
     get_best_timestamp,
+    get_best_timestamp_ns,
     get_time_organized_path,
+    hash_file_content,
+    resume_can_skip,
     set_file_metadata,
+    set_file_metadata_batch,
+    set_file_metadata_fd,
+    set_file_metadata_ns,
+    stat_resumable_dest,
 )
 from .orphan_filter import OrphanFileFilter
-from .utils import find_source_file, format_size
+from .utils import content_in_bucket, find_source_file, format_size
 from .verification import (
     comprehensive_audit,
     scan_files_directory,
@@ -45,13 +55,24 @@ __all__ = [
     "detect_ibi_structure",
     "get_all_files_with_albums",
     "get_merged_files_with_albums",
+    "load_files_with_albums",
+    "load_filesystem_paths",
+    "copy_file_data",
     "copy_file_fallback",
     "copy_file_rsync",
     "get_best_timestamp",
+    "get_best_timestamp_ns",
     "get_time_organized_path",
+    "hash_file_content",
+    "resume_can_skip",
     "set_file_metadata",
+    "set_file_metadata_batch",
+    "set_file_metadata_fd",
+    "set_file_metadata_ns",
+    "stat_resumable_dest",
     "format_size",
     "find_source_file",
+    "content_in_bucket",
     "verify_file_availability",
     "comprehensive_audit",
     "export_metadata_formats",
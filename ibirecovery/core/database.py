@@ -8,6 +8,8 @@ Copyright (C) 2024 ibiRecovery Contributors
 Licensed under GPL-3.0-or-later
 """
 
+import functools
+import os
 import sqlite3
 import sys
 from collections import defaultdict
@@ -147,6 +149,92 @@ def connect_db_readonly(db_path: Path) -> ReadOnlyConnection:
             raise
 
 
+# SQLite file header length; bytes 24-27 hold the file change counter
+SQLITE_HEADER_SIZE = 100
+
+
+@functools.lru_cache(maxsize=2)  # A run's main and backup database
+def _load_files_with_albums_cached(
+    db_path: Path, db_version: Tuple[int, ...], readonly: bool
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Run the files-with-albums query; db_version only keys the cache."""
+    conn = connect_db_readonly(db_path) if readonly else connect_db(db_path)
+    try:
+        return get_all_files_with_albums(conn)
+    finally:
+        conn.close()
+
+
+def load_files_with_albums(
+    db_path: Path, readonly: bool = False
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Load all files with album information from a database file, with caching.
+
+    Results are cached per database path and reused as long as neither the
+    database nor its write-ahead log has changed, so repeated loads of the
+    same database in one process skip the query entirely.
+
+    Args:
+        db_path: Path to the ibi index database
+        readonly: Whether to open the database in read-only mode
+
+    Returns:
+        Tuple of (files_with_albums, stats). The list and stats are the
+        caller's own to modify; the item dicts in the list are shared with
+        the cache and must be copied before being changed
+    """
+    # The header's file change counter moves on every commit, even one that
+    # lands within the filesystem's timestamp granularity; WAL-mode commits
+    # only touch the -wal file, so its stat is part of the key as well
+    db_version = []
+    try:
+        with open(db_path, "rb") as f:
+            header = f.read(SQLITE_HEADER_SIZE)
+        db_version.append(int.from_bytes(header[24:28], "big"))
+    except OSError:
+        pass  # Let the connection below report a missing or unreadable database
+    for path in (db_path, Path(f"{db_path}-wal")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        db_version.extend((stat.st_mtime_ns, stat.st_size))
+
+    files_with_albums, stats = _load_files_with_albums_cached(
+        db_path.resolve(), tuple(db_version), readonly
+    )
+    # Callers extend the list and update stats in place; the records themselves
+    # are only read, so copying them all would just double the memory use
+    stats = {**stats, "size_by_type": dict(stats["size_by_type"])}
+    return list(files_with_albums), stats
+
+
+def load_filesystem_paths(db_path: Path) -> Dict[str, str]:
+    """
+    Load the storage ID to original filesystem path mapping in one query.
+
+    Resolving userStorage files needs the Filesystems row of each file's
+    storageID; loading them all up front replaces a connection and query per
+    file with one per extraction.
+
+    Args:
+        db_path: Path to the ibi index database
+
+    Returns:
+        Dictionary of Filesystems id -> path, empty if it can't be read
+    """
+    try:
+        with connect_db_readonly(db_path) as conn:
+            return {
+                fs_id: fs_path
+                for fs_id, fs_path in conn.execute("SELECT id, path FROM Filesystems")
+                if fs_path
+            }
+    except sqlite3.Error:
+        return {}
+
+
 def get_merged_files_with_albums(
     main_db_path: Path, backup_db_path: Optional[Path] = None
 ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
@@ -161,14 +249,13 @@ def get_merged_files_with_albums(
     """
     # Get files from main database using read-only mode for mounted filesystems
     try:
-        main_conn = connect_db(main_db_path)
-        files_with_albums, stats = get_all_files_with_albums(main_conn)
+        files_with_albums, stats = load_files_with_albums(main_db_path)
     except sqlite3.OperationalError as e:
         if "readonly database" in str(e).lower():
             print("⚠️  Main database is read-only, switching to read-only mode")
-            main_conn.close()
-            main_conn = connect_db_readonly(main_db_path)
-            files_with_albums, stats = get_all_files_with_albums(main_conn)
+            files_with_albums, stats = load_files_with_albums(
+                main_db_path, readonly=True
+            )
         else:
             raise
 
@@ -177,8 +264,9 @@ def get_merged_files_with_albums(
     if backup_db_path and backup_db_path.exists():
         try:
             # Get files from backup database in read-only mode to avoid WAL issues
-            backup_conn = connect_db_readonly(backup_db_path)
-            backup_files, backup_stats = get_all_files_with_albums(backup_conn)
+            backup_files, backup_stats = load_files_with_albums(
+                backup_db_path, readonly=True
+            )
 
             print(f"📊 Backup database: {backup_stats['total_files']} files")
 
@@ -190,9 +278,14 @@ def get_merged_files_with_albums(
             for backup_item in backup_files:
                 backup_content_id = backup_item["file"]["contentID"]
                 if backup_content_id not in main_content_ids:
-                    # Mark as recovered from backup
-                    backup_item["file"]["_source"] = "backup"
-                    additional_files.append(backup_item)
+                    # Mark as recovered from backup, on a copy so the cached
+                    # backup load isn't changed
+                    additional_files.append(
+                        {
+                            **backup_item,
+                            "file": {**backup_item["file"], "_source": "backup"},
+                        }
+                    )
 
             if additional_files:
                 print(
@@ -231,9 +324,6 @@ def get_merged_files_with_albums(
                 print("ℹ️  No additional files found in backup database")
                 stats["backup_recovered"] = 0
 
-            # Clean up temporary database file if it exists
-            backup_conn.close()
-
         except sqlite3.Error as e:
             print(f"⚠️  Warning: Could not read backup database: {e}")
             stats["backup_recovered"] = 0
@@ -241,7 +331,6 @@ def get_merged_files_with_albums(
         print("ℹ️  No backup database available")
         stats["backup_recovered"] = 0
 
-    main_conn.close()
     return files_with_albums, stats
 
 
@@ -9,11 +9,127 @@ Copyright (C) 2024 ibiRecovery Contributors
 Licensed under GPL-3.0-or-later
 """
 
+import errno
+import hashlib
 import os
+import shutil
+import stat
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Optional fast non-cryptographic hashing for deduplication
+try:
+    import xxhash
+
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# Read size used when hashing file contents for deduplication
+HASH_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Largest request handed to copy_file_range(2) in one call
+COPY_RANGE_CHUNK_SIZE = 1 << 30  # 1GB
+
+# Files up to this size are copied with as few syscalls as possible
+SMALL_FILE_SIZE = 4 * 1024 * 1024  # 4MB
+
+# Buffer size for userspace copies when no in-kernel copy is available
+COPY_BUFFER_SIZE = 1024 * 1024  # 1MB
+
+# Batches smaller than this set timestamps inline rather than on a thread pool
+METADATA_BATCH_MIN_PARALLEL = 8
+
+# Files per batch task; each task opens its directory once and works relative to it
+METADATA_BATCH_DIR_CHUNK = 64
+
+# copy_file_range errors meaning "not supported here" rather than a real I/O failure
+COPY_RANGE_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,  # Cross-filesystem copy on kernels before 5.3
+    errno.ENOSYS,  # Syscall not available
+    errno.EINVAL,  # Filesystem doesn't implement it
+    errno.EOPNOTSUPP,
+}
+
+# sendfile errors meaning "not supported here", e.g. macOS only sends to sockets
+SENDFILE_UNSUPPORTED_ERRNOS = COPY_RANGE_UNSUPPORTED_ERRNOS | {errno.ENOTSOCK}
+
+# Copy buffer reused by _copy_buffered across calls, one per copy thread
+_copy_buffers = threading.local()
+
+# Read buffer reused by hash_file_content across calls, one per thread
+_hash_buffers = threading.local()
+
+
+# rsync arguments for every copy; both paths are local, so rsync's delta
+# algorithm would only burn CPU checksumming blocks it then copies anyway
+RSYNC_ARGS = ("rsync", "-av", "--whole-file")
+
+# Extra rsync arguments for resumed runs
+RSYNC_RESUME_ARGS = (
+    "--partial",  # Resume partial transfers
+    "--update",  # Only transfer newer files
+    "--size-only",  # Use size comparison instead of checksum (much faster)
+)
+
+# Database timestamp fields tried in order, keyed by MIME type prefix
+TIMESTAMP_PRIORITY = {
+    "image/": ("imageDate", "cTime", "birthTime"),
+    "video/": ("videoDate", "cTime", "birthTime"),
+}
+FALLBACK_TIMESTAMP_KEYS = ("cTime", "birthTime")
+
+# Larger values can't be seconds; they're treated as milliseconds or microseconds
+MAX_SECONDS_TIMESTAMP = 7258118400  # Year 2200 in seconds
+MAX_MILLISECONDS_TIMESTAMP = 4102444800000  # Year 2100 in milliseconds
+MAX_MICROSECONDS_TIMESTAMP = 4102444800000000  # Year 2100 in microseconds
+
+# Range of timestamps accepted as real file dates
+MIN_VALID_TIMESTAMP = -2208988800  # 1900-01-01
+MAX_VALID_TIMESTAMP = 4102444800  # 2100-01-01
+
+
+def _select_timestamp(file_metadata: Dict[str, Any]) -> Optional[Tuple[Any, int]]:
+    """
+    Pick and validate the best database timestamp without converting it.
+
+    Args:
+        file_metadata: Dictionary containing metadata fields from database
+
+    Returns:
+        (value, units per second) for the chosen field, or None if no valid
+        timestamp is available
+    """
+    # Pick the first set field in priority order for this kind of file
+    mime_prefix = (file_metadata.get("mimeType") or "")[:6]
+    for key in TIMESTAMP_PRIORITY.get(mime_prefix, FALLBACK_TIMESTAMP_KEYS):
+        value = file_metadata.get(key)
+        if value:
+            break
+    else:
+        return None
+
+    # Check for invalid values (strings, NaN, infinity, extreme values)
+    if not isinstance(value, (int, float)):
+        return None
+
+    # Detect timestamps stored in milliseconds or microseconds
+    units = 1
+    if value > MAX_SECONDS_TIMESTAMP:
+        if value < MAX_MILLISECONDS_TIMESTAMP:
+            units = 1000
+        elif value < MAX_MICROSECONDS_TIMESTAMP:
+            units = 1000000
+
+    # Validate timestamp is within reasonable bounds (False for NaN)
+    if MIN_VALID_TIMESTAMP * units <= value <= MAX_VALID_TIMESTAMP * units:
+        return value, units
+
+    return None
 
 
 def get_best_timestamp(file_metadata: Dict[str, Any]) -> Optional[float]:
@@ -26,47 +142,37 @@ def get_best_timestamp(file_metadata: Dict[str, Any]) -> Optional[float]:
     Returns:
         Timestamp in seconds since epoch, or None if no timestamp available
     """
-    target_timestamp = None
-
-    # For images, prefer imageDate
-    if file_metadata.get("mimeType", "").startswith("image/"):
-        target_timestamp = file_metadata.get("imageDate")
-
-    # For videos, prefer videoDate
-    elif file_metadata.get("mimeType", "").startswith("video/"):
-        target_timestamp = file_metadata.get("videoDate")
-
-    # Fall back to cTime, then birthTime
-    if not target_timestamp:
-        target_timestamp = file_metadata.get("cTime") or file_metadata.get("birthTime")
-
-    if target_timestamp:
-        # Convert timestamp to seconds if it appears to be in milliseconds or microseconds
-        if isinstance(target_timestamp, (int, float)):
-            # Detect milliseconds: timestamps > year 2200 in seconds (7258118400)
-            if target_timestamp > 7258118400:  # Year 2200 in seconds
-                if target_timestamp < 4102444800000:  # Year 2100 in milliseconds
-                    target_timestamp = (
-                        target_timestamp / 1000.0
-                    )  # Convert ms to seconds
-                elif target_timestamp < 4102444800000000:  # Year 2100 in microseconds
-                    target_timestamp = (
-                        target_timestamp / 1000000.0
-                    )  # Convert μs to seconds
-
-            # Validate timestamp is within reasonable bounds
-            min_timestamp = -2208988800  # 1900-01-01
-            max_timestamp = 4102444800  # 2100-01-01
-
-            # Check for invalid values (NaN, infinity, extreme values)
-            if (
-                isinstance(target_timestamp, (int, float))
-                and target_timestamp == target_timestamp  # NaN check
-                and min_timestamp <= target_timestamp <= max_timestamp
-            ):
-                return target_timestamp
+    selected = _select_timestamp(file_metadata)
+    if selected is None:
+        return None
 
-    return None
+    value, units = selected
+    return value / units if units != 1 else value
+
+
+def get_best_timestamp_ns(file_metadata: Dict[str, Any]) -> Optional[int]:
+    """
+    Extract the best available timestamp from file metadata in nanoseconds.
+
+    Integer database values are scaled with integer arithmetic, so
+    millisecond and microsecond timestamps convert exactly instead of
+    going through a float number of seconds.
+
+    Args:
+        file_metadata: Dictionary containing metadata fields from database
+
+    Returns:
+        Timestamp in nanoseconds since epoch, or None if no timestamp available
+    """
+    selected = _select_timestamp(file_metadata)
+    if selected is None:
+        return None
+
+    value, units = selected
+    ns_per_unit = 1_000_000_000 // units
+    if isinstance(value, int):
+        return value * ns_per_unit
+    return int(value * ns_per_unit)
 
 
 def get_time_organized_path(
@@ -97,8 +203,65 @@ def get_time_organized_path(
         return unknown_dir / filename
 
 
+def _apply_timestamp_ns(
+    dest: Path,
+    target_ns: int,
+    dir_fd: Optional[int] = None,
+    dest_stat: Optional[os.stat_result] = None,
+) -> None:
+    """Set dest's access and modification times to target_ns unless already set."""
+    # Resumed runs mostly find the time already corrected; a stat is
+    # cheaper than a utime, which dirties the inode even when unchanged
+    if dest_stat is None:
+        dest_stat = os.stat(dest, dir_fd=dir_fd)
+    if dest_stat.st_mtime_ns != target_ns:
+        # Set both access and modification times in one utimensat call.
+        # os.utime is already a thin utimensat wrapper; calling libc
+        # through ctypes measured slower per call, not faster.
+        os.utime(dest, ns=(target_ns, target_ns), dir_fd=dir_fd)
+
+
+def set_file_metadata_ns(
+    dest: Path,
+    file_metadata: Dict[str, Any],
+    dir_fd: Optional[int] = None,
+    dest_stat: Optional[os.stat_result] = None,
+) -> Optional[int]:
+    """
+    Set file timestamps based on database metadata, reporting what was applied.
+
+    Args:
+        dest: Destination file path
+        file_metadata: Dictionary containing metadata fields from database
+        dir_fd: Optional descriptor of an open directory; a relative dest is
+            then resolved from it instead of walking the full path again
+        dest_stat: Optional stat of dest the caller already has, used instead
+            of stat'ing it again to check the current time
+
+    Returns:
+        The access/modification time set on dest in nanoseconds since epoch,
+        or None if no usable timestamp was found or it couldn't be set
+    """
+    try:
+        target_ns = get_best_timestamp_ns(file_metadata)
+
+        if target_ns is not None:
+            _apply_timestamp_ns(dest, target_ns, dir_fd, dest_stat)
+            return target_ns
+
+    except (OSError, TypeError, ValueError, OverflowError) as e:
+        # Don't fail the whole copy operation for metadata issues
+        print(f"Warning: Could not set metadata for {dest}: {e}")
+
+    return None
+
+
 def set_file_metadata(
-    dest: Path, file_metadata: Dict[str, Any], track_corrections: bool = False
+    dest: Path,
+    file_metadata: Dict[str, Any],
+    track_corrections: bool = False,
+    dir_fd: Optional[int] = None,
+    dest_stat: Optional[os.stat_result] = None,
 ) -> bool:
     """
     Set file timestamps based on database metadata.
@@ -106,23 +269,379 @@ def set_file_metadata(
     Args:
         dest: Destination file path
         file_metadata: Dictionary containing metadata fields from database
+        dir_fd: Optional descriptor of an open directory that a relative dest
+            is resolved from
+        dest_stat: Optional stat of dest the caller already has
 
     Returns:
         True if successful, False otherwise
     """
-    try:
-        target_timestamp = get_best_timestamp(file_metadata)
+    return set_file_metadata_ns(dest, file_metadata, dir_fd, dest_stat) is not None
 
-        if target_timestamp:
-            # Set both access and modification times to the target timestamp
-            os.utime(dest, (target_timestamp, target_timestamp))
-            return True
 
+def set_file_metadata_fd(fd: int, timestamp_ns: int) -> bool:
+    """
+    Set access and modification times on an open file descriptor.
+
+    Lets a copy stamp the database timestamp on the destination it still
+    has open (futimens) instead of looking the path up again.
+
+    Args:
+        fd: Open file descriptor of the destination file
+        timestamp_ns: Nanoseconds since epoch, e.g. from get_best_timestamp_ns
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        os.utime(fd, ns=(timestamp_ns, timestamp_ns))
+        return True
     except (OSError, TypeError, ValueError, OverflowError) as e:
-        # Don't fail the whole copy operation for metadata issues
-        print(f"Warning: Could not set metadata for {dest}: {e}")
+        print(f"Warning: Could not set metadata on descriptor {fd}: {e}")
+        return False
+
+
+def set_file_metadata_batch(
+    items: Iterable[Tuple[Path, Dict[str, Any]]],
+    max_workers: Optional[int] = None,
+) -> List[bool]:
+    """
+    Set file timestamps for many files, overlapping the utime calls.
+
+    os.utime releases the GIL, so a thread pool keeps several utimensat
+    calls in the kernel at once - useful when correcting an already
+    extracted library on slow or network storage.
+
+    Files are handled in per-directory chunks. Where the platform supports
+    dir_fd, each chunk opens its directory once and stats/updates files by
+    name relative to it, so the kernel resolves only the last path
+    component instead of the whole (often deep Album/YYYY/MM) path.
+
+    Args:
+        items: (path, file_metadata) pairs, as passed to set_file_metadata
+        max_workers: Thread count; defaults to four per CPU, capped at 32
+
+    Returns:
+        set_file_metadata's result for each item, in input order
+    """
+    items = list(items)
+    if len(items) < METADATA_BATCH_MIN_PARALLEL:
+        return [set_file_metadata(dest, file_metadata) for dest, file_metadata in items]
+
+    if max_workers is None:
+        max_workers = min(32, (os.cpu_count() or 4) * 4)
+
+    use_dir_fd = (
+        hasattr(os, "O_DIRECTORY")
+        and os.stat in os.supports_dir_fd
+        and os.utime in os.supports_dir_fd
+    )
+
+    by_directory: Dict[Path, List[Tuple[int, Path, Dict[str, Any]]]] = {}
+    for index, (dest, file_metadata) in enumerate(items):
+        dest = Path(dest)
+        by_directory.setdefault(dest.parent, []).append((index, dest, file_metadata))
+
+    chunks = [
+        entries[start : start + METADATA_BATCH_DIR_CHUNK]
+        for entries in by_directory.values()
+        for start in range(0, len(entries), METADATA_BATCH_DIR_CHUNK)
+    ]
+    results = [False] * len(items)
+
+    def apply_chunk(chunk):
+        dir_fd = None
+        if use_dir_fd:
+            try:
+                dir_fd = os.open(chunk[0][1].parent, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                pass  # Fall back to full paths; per-file errors are reported there
+
+        try:
+            for index, dest, file_metadata in chunk:
+                if dir_fd is None:
+                    results[index] = set_file_metadata(dest, file_metadata)
+                    continue
+
+                # Resolve the name from the open directory, but report
+                # failures with the full path
+                try:
+                    target_ns = get_best_timestamp_ns(file_metadata)
+                    if target_ns is not None:
+                        _apply_timestamp_ns(Path(dest.name), target_ns, dir_fd)
+                        results[index] = True
+                except (OSError, TypeError, ValueError, OverflowError) as e:
+                    print(f"Warning: Could not set metadata for {dest}: {e}")
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(apply_chunk, chunks))
+
+    return results
+
+
+def _copy_in_kernel(
+    copy_chunk: Callable[[int], int],
+    src_fd: int,
+    size: int,
+    unsupported_errnos: Set[int],
+) -> bool:
+    """
+    Run an in-kernel copy syscall until size bytes are copied.
+
+    Args:
+        copy_chunk: Copies up to the given byte count, returning bytes written
+        src_fd: Source file descriptor, positioned at the start
+        size: Source file size, used to stop without a final zero-length call
+        unsupported_errnos: Errors on the first call that mean "not supported"
+
+    Returns:
+        True if the data was copied, False if the syscall isn't usable for this
+        pair of files (or copied nothing) and nothing was written yet
+    """
+    copied = 0
+    while copied < size:
+        try:
+            written = copy_chunk(min(size - copied, COPY_RANGE_CHUNK_SIZE))
+        except OSError as e:
+            if copied == 0 and e.errno in unsupported_errnos:
+                return False
+            raise
+        if written == 0:
+            if copied == 0:
+                return False  # Nothing moved; let the next copy method try
+            break  # Source was truncated while copying
+        copied += written
+
+    return True
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    """
+    Copy all data between two open file descriptors inside the kernel.
+
+    Args:
+        src_fd: Source file descriptor, positioned at the start
+        dst_fd: Destination file descriptor
+        size: Source file size, used to stop without a final zero-length call
+
+    Returns:
+        True if the data was copied, False if copy_file_range isn't usable
+        for this pair of files and nothing was written yet
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    return _copy_in_kernel(
+        lambda count: os.copy_file_range(src_fd, dst_fd, count),
+        src_fd,
+        size,
+        COPY_RANGE_UNSUPPORTED_ERRNOS,
+    )
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> bool:
+    """
+    Copy all data between two open file descriptors with sendfile(2).
+
+    Still avoids a userspace copy where copy_file_range can't be used, such
+    as cross-filesystem copies on kernels before 5.3.
+
+    Args:
+        src_fd: Source file descriptor, positioned at the start
+        dst_fd: Destination file descriptor
+        size: Source file size, used to stop without a final zero-length call
+
+    Returns:
+        True if the data was copied, False if sendfile isn't usable for this
+        pair of files and nothing was written yet
+    """
+    if not hasattr(os, "sendfile"):
+        return False
+
+    return _copy_in_kernel(
+        lambda count: os.sendfile(dst_fd, src_fd, None, count),
+        src_fd,
+        size,
+        SENDFILE_UNSUPPORTED_ERRNOS,
+    )
+
+
+def get_copy_buffer_size() -> int:
+    """Get the userspace copy buffer size in bytes (IBI_COPY_BUFSIZE, default 1MB)."""
+    try:
+        return max(1, int(os.getenv("IBI_COPY_BUFSIZE", COPY_BUFFER_SIZE)))
+    except ValueError:
+        return COPY_BUFFER_SIZE
+
+
+def _copy_buffered(fsrc, fdst) -> None:
+    """Copy an open file to another through a reused per-thread buffer."""
+    size = get_copy_buffer_size()
+    buf = getattr(_copy_buffers, "buf", None)
+    if buf is None or len(buf) != size:
+        buf = _copy_buffers.buf = bytearray(size)
+    view = memoryview(buf)
+    while True:
+        read = fsrc.readinto(view)
+        if not read:
+            break
+        fdst.write(view[:read])
+
+
+def copy_file_data(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Copy file contents and metadata like shutil.copy2, without userspace buffering.
+
+    Uses copy_file_range(2) where available so the data never leaves the
+    kernel (and may be reflinked on btrfs/XFS), then sendfile(2), falling
+    back to a buffered copy through a reused buffer when the filesystems
+    involved support neither. Small files - the bulk of an ibi library -
+    take a single copy call.
+
+    Args:
+        source: Source file path
+        dest: Destination file path
+        file_metadata: Optional database metadata; if it has a usable timestamp,
+            that is set on dest instead of the source's times
+
+    Raises:
+        shutil.SameFileError: If source and dest are the same file
+        OSError: If the copy fails
+    """
+    try:
+        dest_stat = os.stat(dest)
+    except (FileNotFoundError, NotADirectoryError):
+        pass  # Nothing at dest yet, the usual case
+    else:
+        if os.path.samestat(os.stat(source), dest_stat):
+            raise shutil.SameFileError(f"{source} and {dest} are the same file")
+
+    timestamp_ns = get_best_timestamp_ns(file_metadata) if file_metadata else None
+    set_times_on_fd = timestamp_ns is not None and os.utime in os.supports_fd
+
+    with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+        source_stat = os.fstat(fsrc.fileno())
+        size = source_stat.st_size
+        if size > SMALL_FILE_SIZE and hasattr(os, "posix_fadvise"):
+            # Bulk sequential read - let the kernel read ahead aggressively
+            try:
+                os.posix_fadvise(fsrc.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass
+
+        if not (
+            _copy_file_range(fsrc.fileno(), fdst.fileno(), size)
+            or _sendfile(fsrc.fileno(), fdst.fileno(), size)
+        ):
+            if size <= SMALL_FILE_SIZE:
+                fdst.write(fsrc.read())
+            else:
+                _copy_buffered(fsrc, fdst)
+
+        if size > SMALL_FILE_SIZE and hasattr(os, "posix_fadvise"):
+            # Each source is read once per extraction; drop its cached pages so
+            # streaming large media doesn't evict everything else. Destination
+            # pages are left alone, dropping them would force early writeback
+            try:
+                os.posix_fadvise(fsrc.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+
+        if set_times_on_fd:
+            # Times must be set after the last write reaches the file
+            fdst.flush()
+            set_file_metadata_fd(fdst.fileno(), timestamp_ns)
+
+            # Timestamps come from the database, so only the mode is copied -
+            # from the stat we already have, onto the open destination
+            if os.chmod in os.supports_fd:
+                os.chmod(fdst.fileno(), stat.S_IMODE(source_stat.st_mode))
+
+    if not set_times_on_fd:
+        shutil.copystat(source, dest)
+        if timestamp_ns is not None:
+            set_file_metadata(dest, file_metadata)
+    elif os.chmod not in os.supports_fd:
+        shutil.copymode(source, dest)
+
+
+def hash_file_content(path: Path) -> str:
+    """
+    Hash a file's full contents for content-addressable deduplication.
+
+    The digest only has to tell files apart within one extraction run - a
+    collision costs a hardlink to the wrong file, not a security hole - so
+    a fast 128-bit hash is used: xxh3_128 when xxhash is installed,
+    otherwise BLAKE2b truncated to 16 bytes.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest of the file contents
+
+    Raises:
+        OSError: If the file can't be read
+    """
+    hasher = xxhash.xxh3_128() if HAS_XXHASH else hashlib.blake2b(digest_size=16)
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None:
+        buf = _hash_buffers.buf = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buf)
+    # Unbuffered, so each read lands straight in the reused buffer
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            read = f.readinto(view)
+            if not read:
+                break
+            hasher.update(view[:read])
+    return hasher.hexdigest()
+
+
+def stat_resumable_dest(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> Optional[os.stat_result]:
+    """
+    Stat an existing destination that a resumed copy can keep.
+
+    Only sizes are compared - metadata correction rewrites dest timestamps.
+    The database size is tried first, so the common case doesn't stat the
+    source (usually on the slow ibi drive); the source is only stat'ed when
+    the record has no size or it disagrees with dest.
+
+    Args:
+        source: Source file path
+        dest: Destination file path
+        file_metadata: Optional database record with the expected "size"
+
+    Returns:
+        dest's stat result if it exists and has the expected size, so the
+        timestamp correction that follows needn't stat it again; else None
+    """
+    try:
+        dest_stat = os.stat(dest)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+    dest_size = dest_stat.st_size
+    if file_metadata and dest_size == file_metadata.get("size"):
+        return dest_stat
+    return dest_stat if dest_size == os.stat(source).st_size else None
+
+
+def resume_can_skip(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Check whether a resumed copy can keep an existing destination.
 
-    return False
+    See stat_resumable_dest, which also returns the destination's stat.
+    """
+    return stat_resumable_dest(source, dest, file_metadata) is not None
 
 
 def check_rsync_available() -> bool:
@@ -156,17 +675,12 @@ def copy_file_rsync(
         True if successful, False otherwise
     """
     try:
-        cmd = ["rsync", "-av"]
-        if resume:
-            # Resume mode optimizations for better performance
-            cmd.extend(
-                [
-                    "--partial",  # Resume partial transfers
-                    "--update",  # Only transfer newer files
-                    "--size-only",  # Use size comparison instead of checksum (much faster)
-                ]
-            )
-        cmd.extend([str(source), str(dest)])
+        cmd = [
+            *RSYNC_ARGS,
+            *(RSYNC_RESUME_ARGS if resume else ()),
+            str(source),
+            str(dest),
+        ]
 
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
         success = result.returncode == 0
@@ -202,26 +716,20 @@ def copy_file_fallback(
     """
     try:
         # If resuming and destination exists with same size, skip
-        if resume and dest.exists():
-            if dest.stat().st_size == source.stat().st_size:
-                # File already copied, just correct metadata if needed
-                if file_metadata and fix_metadata:
-                    set_file_metadata(dest, file_metadata)
-                return True
+        dest_stat = stat_resumable_dest(source, dest, file_metadata) if resume else None
+        if dest_stat is not None:
+            # File already copied, just correct metadata if needed
+            if file_metadata and fix_metadata:
+                set_file_metadata(dest, file_metadata, dest_stat=dest_stat)
+            return True
 
         # Create parent directory if needed
         from ..extract_files import safe_mkdir
 
         safe_mkdir(dest.parent, parents=True)
 
-        # Copy the file
-        import shutil
-
-        shutil.copy2(source, dest)
-
-        # Set correct metadata timestamps if provided
-        if file_metadata and fix_metadata:
-            set_file_metadata(dest, file_metadata)
+        # Copy the file, setting correct metadata timestamps if provided
+        copy_file_data(source, dest, file_metadata if fix_metadata else None)
 
         return True
 
@@ -10,17 +10,46 @@ Licensed under GPL-3.0-or-later
 """
 
 import hashlib
+import os
 import re
 import sqlite3
-from collections import defaultdict
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Set, Tuple
 
+from .database import connect_db_readonly
+from .utils import SIZE_UNITS
+
+# Optional fast non-cryptographic hashing for duplicate detection
+try:
+    import xxhash
+
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
 # Size thresholds for filtering (in bytes)
 THUMBNAIL_MAX_SIZE = 50 * 1024  # 50KB - likely thumbnails
 TINY_FILE_MAX_SIZE = 1 * 1024  # 1KB - likely metadata/cache
 LARGE_FILE_MIN_SIZE = 10 * 1024 * 1024  # 10MB - definitely not thumbnails
 
+# Name fragments that mark a small file as a likely thumbnail or cache entry
+THUMBNAIL_NAME_HINTS = ("thumb", "preview", "cache", "temp")
+
+# Fewer files than this needing a hash are hashed inline rather than in a pool
+ORPHAN_HASH_MIN_PARALLEL = 8
+
+# Bytes read per sampled chunk by hash_file_fast
+FAST_HASH_CHUNK_SIZE = 8192
+
+# Identifies hash_file_fast digests in the cross-run hash cache
+FAST_HASH_ALGORITHM = (
+    f"{'xxh3_128' if HAS_XXHASH else 'blake2b-128'}/{FAST_HASH_CHUNK_SIZE}"
+)
+
 # Patterns for files that are likely thumbnails, cache, or system files
 SKIP_PATTERNS = [
     r".*thumb.*",
@@ -39,6 +68,11 @@ SKIP_PATTERNS = [
     r".*_\d+x\d+\.",  # Size-specific thumbnails (e.g., _150x150.jpg)
 ]
 
+# All skip patterns as one alternation; group pN is SKIP_PATTERNS[N], tried in order
+_SKIP_PATTERN_RE = re.compile(
+    "|".join(f"(?P<p{index}>{pattern})" for index, pattern in enumerate(SKIP_PATTERNS))
+)
+
 # MIME types that are likely to be skippable
 SKIP_MIME_TYPES = {
     "application/x-trash",
@@ -62,48 +96,132 @@ SKIP_EXTENSIONS = {
 }
 
 
+def get_hash_cache_path() -> Optional[Path]:
+    """Get the cross-run orphan hash cache database (IBI_HASH_CACHE, default off)."""
+    cache_path = os.getenv("IBI_HASH_CACHE")
+    return Path(cache_path).expanduser() if cache_path else None
+
+
+def _size_skip_reason(filename: str, file_size: int) -> str:
+    """Return why a file should be skipped for its size, or "" to keep it.
+
+    Args:
+        filename: Lowercased file name
+        file_size: File size in bytes
+    """
+    if file_size == 0:
+        return "zero_byte_file"
+
+    if file_size <= TINY_FILE_MAX_SIZE:
+        return "tiny_file_likely_metadata"
+
+    # Check for thumbnail-like files under size threshold
+    if file_size <= THUMBNAIL_MAX_SIZE:
+        # Plain loop over a constant tuple: no per-call list or generator
+        for hint in THUMBNAIL_NAME_HINTS:
+            if hint in filename:
+                return "small_file_with_thumbnail_name"
+
+    return ""
+
+
+def _pattern_skip_reason(filename: str, file_path: Path) -> str:
+    """Return why a file should be skipped for its name, or "" to keep it.
+
+    Args:
+        filename: Lowercased file name
+        file_path: Path the name was taken from, for the extension reason
+    """
+    # Check skip patterns in a single regex pass
+    match = _SKIP_PATTERN_RE.match(filename)
+    if match:
+        pattern = SKIP_PATTERNS[int(match.lastgroup[1:])]
+        return f"matches_skip_pattern_{pattern}"
+
+    # Check file extensions, taking the suffix from the lowercased name the
+    # way Path.suffix does rather than building it again from the path
+    dot = filename.rfind(".")
+    if 0 < dot < len(filename) - 1 and filename[dot:] in SKIP_EXTENSIONS:
+        return f"skip_extension_{file_path.suffix}"
+
+    return ""
+
+
 class OrphanFileFilter:
     """Filter and classify orphaned files to identify skippable content."""
 
-    def __init__(self, files_dir: Path, db_path: Optional[Path] = None):
+    def __init__(
+        self,
+        files_dir: Path,
+        db_path: Optional[Path] = None,
+        hash_cache_path: Optional[Path] = None,
+    ):
         """
         Initialize orphan file filter.
 
         Args:
             files_dir: Path to the files directory
             db_path: Optional path to database for metadata hints
+            hash_cache_path: Optional SQLite file caching fast hashes across runs,
+                keyed by inode and validated by size and mtime
         """
         self.files_dir = Path(files_dir)
         self.db_path = Path(db_path) if db_path else None
+        self.hash_cache_path = Path(hash_cache_path) if hash_cache_path else None
         self.known_content_ids: Set[str] = set()
-        self.file_hashes: Dict[str, Path] = {}
+        self.file_hashes: Dict[int, Path] = {}
+        # First file seen at each size; only hashed once another file matches
+        self._unhashed_by_size: Dict[int, Path] = {}
+        self._hashed_sizes: Set[int] = set()
+        # Sample buffer reused by hash_file_fast across calls, one per thread
+        self._local = threading.local()
+        # Digests computed ahead of time by filter_orphan_files
+        self._pending_hashes: Dict[Path, int] = {}
+        # Hash cache, open only while filter_orphan_files runs
+        self._hash_cache: Optional[sqlite3.Connection] = None
+        self._hash_cache_keys: Dict[Path, Tuple[int, int, int, int]] = {}
+        self._hash_cache_updates: List[Tuple[Any, ...]] = []
 
     def load_known_content_ids(self, conn: sqlite3.Connection) -> None:
         """Load known contentIDs from database to identify true orphans."""
         cursor = conn.execute(
             "SELECT DISTINCT contentID FROM Files WHERE contentID IS NOT NULL AND contentID != ''"
         )
-        self.known_content_ids = {row[0] for row in cursor.fetchall()}
-
-    def hash_file_fast(self, file_path: Path, chunk_size: int = 8192) -> str:
-        """Generate fast hash of file for duplicate detection."""
-        hasher = hashlib.blake2b(digest_size=16)  # Fast, good enough for duplicates
+        # Single-column rows: flatten the cursor straight into the set
+        self.known_content_ids = set(chain.from_iterable(cursor))
+
+    def hash_file_fast(
+        self, file_path: Path, chunk_size: int = FAST_HASH_CHUNK_SIZE
+    ) -> int:
+        """Generate fast hash of file for duplicate detection.
+
+        Only the first, middle and last chunks plus the file size are hashed,
+        so the cost is bounded regardless of file size. Uses xxh3_128 when
+        xxhash is installed, otherwise BLAKE2b truncated to 16 bytes. The
+        128-bit digest is returned as an int, a smaller and cheaper dict key
+        than its hex string.
+        """
+        hasher = xxhash.xxh3_128() if HAS_XXHASH else hashlib.blake2b(digest_size=16)
+        buf = getattr(self._local, "hash_buf", None)
+        if buf is None or len(buf) < chunk_size:
+            buf = self._local.hash_buf = bytearray(chunk_size)
+        view = memoryview(buf)[:chunk_size]
         try:
-            with open(file_path, "rb") as f:
+            # Unbuffered: readinto lands directly in the reused sample buffer
+            with open(file_path, "rb", buffering=0) as f:
                 # Hash first chunk + file size for speed
-                first_chunk = f.read(chunk_size)
-                hasher.update(first_chunk)
+                hasher.update(view[: f.readinto(view)])
 
-                # Add file size to hash
-                file_size = file_path.stat().st_size
+                # Add file size to hash (fstat avoids a second path lookup)
+                file_size = os.fstat(f.fileno()).st_size
                 hasher.update(file_size.to_bytes(8, byteorder="big"))
 
                 # For larger files, also hash a middle and end chunk
                 if file_size > chunk_size * 3:
                     f.seek(file_size // 2)
-                    hasher.update(f.read(chunk_size))
+                    hasher.update(view[: f.readinto(view)])
                     f.seek(-chunk_size, 2)  # Seek to end - chunk_size
-                    hasher.update(f.read(chunk_size))
+                    hasher.update(view[: f.readinto(view)])
 
         except (OSError, IOError):
             # For unreadable files, hash the path and size
@@ -113,44 +231,46 @@ class OrphanFileFilter:
             except OSError:
                 pass
 
-        return hasher.hexdigest()
+        return int.from_bytes(hasher.digest(), "big")
 
     def is_size_based_skip(self, file_path: Path, file_size: int) -> Tuple[bool, str]:
         """Check if file should be skipped based on size heuristics."""
-        if file_size == 0:
-            return True, "zero_byte_file"
-
-        if file_size <= TINY_FILE_MAX_SIZE:
-            return True, "tiny_file_likely_metadata"
-
-        # Check for thumbnail-like files under size threshold
-        if file_size <= THUMBNAIL_MAX_SIZE:
-            filename = file_path.name.lower()
-            if any(
-                pattern in filename for pattern in ["thumb", "preview", "cache", "temp"]
-            ):
-                return True, "small_file_with_thumbnail_name"
-
-        return False, ""
+        reason = _size_skip_reason(file_path.name.lower(), file_size)
+        return bool(reason), reason
 
     def is_pattern_based_skip(self, file_path: Path) -> Tuple[bool, str]:
         """Check if file should be skipped based on naming patterns."""
-        filename = file_path.name.lower()
+        reason = _pattern_skip_reason(file_path.name.lower(), file_path)
+        return bool(reason), reason
+
+    def is_content_duplicate(
+        self, file_path: Path, file_size: Optional[int] = None
+    ) -> Tuple[bool, str, Optional[Path]]:
+        """Check if file is a content duplicate of a known file.
 
-        # Check skip patterns
-        for pattern in SKIP_PATTERNS:
-            if re.match(pattern, filename):
-                return True, f"matches_skip_pattern_{pattern}"
+        Duplicates must share a size, so files are only hashed once a second
+        file of the same size is seen; files with a unique size are never read.
 
-        # Check file extensions
-        if file_path.suffix.lower() in SKIP_EXTENSIONS:
-            return True, f"skip_extension_{file_path.suffix}"
+        Args:
+            file_path: File to check
+            file_size: Size of the file if already known, to avoid a stat
+        """
+        if file_size is None:
+            try:
+                file_size = file_path.stat().st_size
+            except OSError:
+                file_size = None
 
-        return False, ""
+        if file_size is not None and file_size not in self._hashed_sizes:
+            incumbent = self._unhashed_by_size.pop(file_size, None)
+            if incumbent is None:
+                self._unhashed_by_size[file_size] = file_path
+                return False, "", None
+            # Size collision: hash the earlier file so it stays the original
+            self._hashed_sizes.add(file_size)
+            self.file_hashes.setdefault(self._file_digest(incumbent), incumbent)
 
-    def is_content_duplicate(self, file_path: Path) -> Tuple[bool, str, Optional[Path]]:
-        """Check if file is a content duplicate of a known file."""
-        file_hash = self.hash_file_fast(file_path)
+        file_hash = self._file_digest(file_path)
 
         if file_hash in self.file_hashes:
             original_path = self.file_hashes[file_hash]
@@ -159,6 +279,133 @@ class OrphanFileFilter:
             self.file_hashes[file_hash] = file_path
             return False, "", None
 
+    def _file_digest(self, file_path: Path) -> int:
+        """Return the fast hash of a file, using a precomputed or cached digest."""
+        file_hash = self._pending_hashes.pop(file_path, None)
+        if file_hash is None:
+            file_hash = self._load_cached_hash(file_path)
+        if file_hash is None:
+            file_hash = self.hash_file_fast(file_path)
+            self._store_cached_hash(file_path, file_hash)
+        return file_hash
+
+    def _open_hash_cache(self) -> None:
+        """Open the cross-run hash cache, disabling it if it can't be used."""
+        if not self.hash_cache_path or self._hash_cache is not None:
+            return
+        try:
+            self.hash_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.hash_cache_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS hashes(
+                    dev INTEGER,
+                    ino INTEGER,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    algorithm TEXT,
+                    digest TEXT,
+                    PRIMARY KEY (dev, ino)
+                )
+            """
+            )
+            self._hash_cache = conn
+        except (OSError, sqlite3.Error) as e:
+            print(
+                f"Warning: Hash cache disabled, cannot open {self.hash_cache_path}: {e}"
+            )
+            self.hash_cache_path = None
+
+    def _close_hash_cache(self) -> None:
+        """Write digests computed this run to the hash cache and close it."""
+        if self._hash_cache is None:
+            return
+        try:
+            with self._hash_cache:
+                self._hash_cache.executemany(
+                    "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                    self._hash_cache_updates,
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not update hash cache {self.hash_cache_path}: {e}")
+        finally:
+            self._hash_cache.close()
+            self._hash_cache = None
+            self._hash_cache_keys.clear()
+            self._hash_cache_updates.clear()
+
+    def _load_cached_hash(self, file_path: Path) -> Optional[int]:
+        """Look up a digest cached by an earlier run for this unchanged file."""
+        if self._hash_cache is None:
+            return None
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        key = (
+            file_stat.st_dev,
+            file_stat.st_ino,
+            file_stat.st_size,
+            file_stat.st_mtime_ns,
+        )
+        self._hash_cache_keys[file_path] = key
+        row = self._hash_cache.execute(
+            "SELECT digest FROM hashes WHERE dev = ? AND ino = ? AND size = ? "
+            "AND mtime_ns = ? AND algorithm = ?",
+            (*key, FAST_HASH_ALGORITHM),
+        ).fetchone()
+        return int(row[0], 16) if row else None
+
+    def _store_cached_hash(self, file_path: Path, file_hash: int) -> None:
+        """Queue a digest for the hash cache if its file was looked up."""
+        key = self._hash_cache_keys.pop(file_path, None)
+        if key is not None:
+            # Stored as hex: 128-bit values overflow SQLite's 64-bit INTEGER
+            self._hash_cache_updates.append(
+                (*key, FAST_HASH_ALGORITHM, f"{file_hash:032x}")
+            )
+
+    def _prehash_size_collisions(self, candidates: List[Tuple[Path, int]]) -> None:
+        """
+        Hash in parallel the candidates is_content_duplicate will need to hash.
+
+        Only files sharing a size with another candidate or a previously seen
+        file are hashed. Digests are stored for is_content_duplicate to consume
+        in input order, so the first file still wins.
+
+        Args:
+            candidates: (path, size) pairs that reached duplicate detection
+        """
+        size_counts = Counter(size for _, size in candidates)
+        paths = [
+            path
+            for path, size in candidates
+            if size_counts[size] > 1
+            or size in self._hashed_sizes
+            or size in self._unhashed_by_size
+        ]
+        if self._hash_cache is not None:
+            uncached = []
+            for path in paths:
+                file_hash = self._load_cached_hash(path)
+                if file_hash is None:
+                    uncached.append(path)
+                else:
+                    self._pending_hashes[path] = file_hash
+            paths = uncached
+
+        if len(paths) < ORPHAN_HASH_MIN_PARALLEL:
+            return
+
+        # Hashing releases the GIL and the reads block, so threads overlap both
+        with ThreadPoolExecutor() as executor:
+            for path, file_hash in zip(paths, executor.map(self.hash_file_fast, paths)):
+                self._pending_hashes[path] = file_hash
+                self._store_cached_hash(path, file_hash)
+
     def is_database_orphan(self, file_path: Path) -> bool:
         """Check if file is truly orphaned (not referenced in database)."""
         # Extract potential contentID from file path
@@ -167,70 +414,73 @@ class OrphanFileFilter:
         # Files in the database are not orphans
         return content_id not in self.known_content_ids
 
-    def classify_orphan_file(self, file_path: Path) -> Dict[str, Any]:
+    def classify_orphan_file(
+        self,
+        file_path: Path,
+        check_duplicates: bool = True,
+        file_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
         """
         Classify an orphan file and determine if it should be skipped.
 
+        Args:
+            file_path: Orphan file to classify
+            check_duplicates: Whether to run content duplicate detection
+            file_size: Size of the file if already known, to avoid a stat
+
         Returns:
             Dictionary with classification results
         """
-        try:
-            file_size = file_path.stat().st_size
-        except OSError:
-            return {
-                "skip": True,
-                "reason": "file_access_error",
-                "file_path": file_path,
-                "file_size": 0,
-                "is_true_orphan": True,
-            }
+        if file_size is None:
+            try:
+                file_size = file_path.stat().st_size
+            except OSError:
+                return {
+                    "skip": True,
+                    "reason": "file_access_error",
+                    "file_path": file_path,
+                    "file_size": 0,
+                    "is_true_orphan": True,
+                }
+
+        # Fused filters: the name is read and lowercased once for all checks
+        name = file_path.name
+        duplicate_path = None
+        if name in self.known_content_ids:
+            # Skip non-orphan files (shouldn't happen, but safety check)
+            reason = "not_orphan_has_database_entry"
+        else:
+            filename = name.lower()
+            reason = _size_skip_reason(filename, file_size) or _pattern_skip_reason(
+                filename, file_path
+            )
+            if not reason and check_duplicates:
+                _, reason, duplicate_path = self.is_content_duplicate(
+                    file_path, file_size
+                )
 
-        classification = {
-            "skip": False,
-            "reason": "",
+        return {
+            "skip": bool(reason),
+            # File passed all filters - it's a legitimate orphan to recover
+            "reason": reason or "legitimate_orphan",
             "file_path": file_path,
             "file_size": file_size,
-            "is_true_orphan": self.is_database_orphan(file_path),
-            "duplicate_of": None,
+            "is_true_orphan": reason != "not_orphan_has_database_entry",
+            "duplicate_of": duplicate_path,
         }
 
-        # Skip non-orphan files (shouldn't happen, but safety check)
-        if not classification["is_true_orphan"]:
-            classification.update(
-                {"skip": True, "reason": "not_orphan_has_database_entry"}
-            )
-            return classification
-
-        # Size-based filtering
-        skip, reason = self.is_size_based_skip(file_path, file_size)
-        if skip:
-            classification.update({"skip": True, "reason": reason})
-            return classification
-
-        # Pattern-based filtering
-        skip, reason = self.is_pattern_based_skip(file_path)
-        if skip:
-            classification.update({"skip": True, "reason": reason})
-            return classification
-
-        # Content duplicate detection
-        skip, reason, duplicate_path = self.is_content_duplicate(file_path)
-        if skip:
-            classification.update(
-                {"skip": True, "reason": reason, "duplicate_of": duplicate_path}
-            )
-            return classification
-
-        # File passed all filters - it's a legitimate orphan to recover
-        classification.update({"skip": False, "reason": "legitimate_orphan"})
-        return classification
-
-    def filter_orphan_files(self, orphan_files: List[Path]) -> Dict[str, Any]:
+    def filter_orphan_files(
+        self,
+        orphan_files: List[Path],
+        file_sizes: Optional[Dict[Path, int]] = None,
+    ) -> Dict[str, Any]:
         """
         Filter a list of orphan files and provide comprehensive statistics.
 
         Args:
             orphan_files: List of orphan file paths
+            file_sizes: Optional sizes already gathered while scanning, keyed by
+                path; files missing from it are stat'ed
 
         Returns:
             Dictionary with filtered files and statistics
@@ -238,9 +488,9 @@ class OrphanFileFilter:
         # Load database content IDs if available
         if self.db_path and self.db_path.exists():
             try:
-                conn = sqlite3.connect(self.db_path)
-                self.load_known_content_ids(conn)
-                conn.close()
+                # Read-only: the recovery source database must not be modified
+                with connect_db_readonly(self.db_path) as conn:
+                    self.load_known_content_ids(conn)
             except sqlite3.Error:
                 pass
 
@@ -255,9 +505,34 @@ class OrphanFileFilter:
             "duplicates_found": [],
         }
 
-        for file_path in orphan_files:
-            classification = self.classify_orphan_file(file_path)
-
+        # Cheap stat/size/pattern checks first, then duplicate detection on the
+        # survivors with colliding sizes hashed up front in parallel
+        file_sizes = file_sizes or {}
+        classifications = [
+            self.classify_orphan_file(
+                file_path, check_duplicates=False, file_size=file_sizes.get(file_path)
+            )
+            for file_path in orphan_files
+        ]
+        candidates = [c for c in classifications if not c["skip"]]
+        self._open_hash_cache()
+        try:
+            self._prehash_size_collisions(
+                [(c["file_path"], c["file_size"]) for c in candidates]
+            )
+            for classification in candidates:
+                skip, reason, duplicate_path = self.is_content_duplicate(
+                    classification["file_path"], classification["file_size"]
+                )
+                if skip:
+                    classification.update(
+                        {"skip": True, "reason": reason, "duplicate_of": duplicate_path}
+                    )
+        finally:
+            self._pending_hashes.clear()
+            self._close_hash_cache()
+
+        for classification in classifications:
             if classification["skip"]:
                 results["skip_files"].append(classification)
                 results["skip_reasons"][classification["reason"]] += 1
@@ -298,11 +573,12 @@ class OrphanFileFilter:
 
 def format_size(size_bytes: int) -> str:
     """Format file size in human-readable format."""
-    for unit in ["B", "KB", "MB", "GB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} TB"
+    # Same bit-length unit lookup as utils.format_size, but zero keeps its ".0"
+    unit = 0
+    if size_bytes >= 1024:
+        unit = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+
+    return f"{size_bytes / (1 << (unit * 10)):.1f} {SIZE_UNITS[unit]}"
 
 
 def print_orphan_filter_summary(results: Dict[str, Any]) -> None:
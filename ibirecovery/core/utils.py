@@ -8,8 +8,11 @@ Copyright (C) 2024 ibiRecovery Contributors
 Licensed under GPL-3.0-or-later
 """
 
+import os
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Set
+
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 def format_size(size_bytes: int) -> str:
@@ -17,13 +20,65 @@ def format_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 B"
 
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Each unit is 2**10 times the previous one, so the unit index falls
+    # straight out of the bit length instead of a divide-by-1024 loop
+    unit = 0
+    if size_bytes >= 1024:
+        unit = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
+
+    return f"{size_bytes / (1 << (unit * 10)):.1f} {SIZE_UNITS[unit]}"
+
+
+def index_user_dir(user_dir: Path) -> Dict[str, List[str]]:
+    """
+    Index the files under a userStorage directory by name, in one walk.
+
+    Directories are visited depth-first in listing order, as rglob visits
+    them, so a name found in several albums resolves to the same file as a
+    per-lookup rglob would. Symlinked directories are not descended into.
+
+    Args:
+        user_dir: userStorage directory to index
 
-    return f"{size_bytes:.1f} {size_names[i]}"
+    Returns:
+        Mapping of file name -> paths of the files with that name
+    """
+    index: Dict[str, List[str]] = {}
+    pending = [user_dir]
+    while pending:
+        subdirs = []
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            index.setdefault(entry.name, []).append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue  # Missing or unreadable, as rglob skips it
+        pending.extend(reversed(subdirs))
+
+    return index
+
+
+def _find_in_user_dir(
+    user_dir: Path,
+    file_name: str,
+    userstorage_index: Optional[Dict[Path, Dict[str, List[str]]]],
+) -> Optional[Path]:
+    """Find a file by name anywhere under user_dir, indexing it on first use."""
+    if userstorage_index is None:
+        index = index_user_dir(user_dir)
+    else:
+        index = userstorage_index.get(user_dir)
+        if index is None:
+            index = userstorage_index[user_dir] = index_user_dir(user_dir)
+
+    matches = index.get(file_name)
+    return Path(matches[0]) if matches else None
 
 
 def find_source_file(
@@ -32,6 +87,8 @@ def find_source_file(
     file_name: str = None,
     storage_id: str = None,
     db_path: Path = None,
+    filesystems: Optional[Dict[str, str]] = None,
+    userstorage_index: Optional[Dict[Path, Dict[str, List[str]]]] = None,
 ) -> Optional[Path]:
     """
     Find the actual file using contentID with support for both traditional and userStorage structures.
@@ -42,24 +99,31 @@ def find_source_file(
         file_name: Original filename (for userStorage structure)
         storage_id: Storage ID (for userStorage structure)
         db_path: Database path (for filesystem mapping lookup)
+        filesystems: Filesystems id -> path mapping loaded once with
+            load_filesystem_paths; when given, db_path is not queried
+        userstorage_index: Optional dict of userStorage directory -> name
+            index, shared across calls so each directory is walked only once
     """
     if not content_id:
         return None
 
     # Strategy 1: Try userStorage structure (newer ibi versions)
-    if file_name and storage_id and db_path:
+    if file_name and storage_id and (db_path or filesystems is not None):
         try:
-            from .database import connect_db_readonly
-
-            conn = connect_db_readonly(db_path)
-
             # Get filesystem mapping for this storage_id
-            fs_result = conn.execute(
-                "SELECT name, path FROM Filesystems WHERE id = ?", (storage_id,)
-            ).fetchone()
-
-            if fs_result:
-                fs_name, fs_path = fs_result
+            if filesystems is not None:
+                fs_path = filesystems.get(storage_id)
+            else:
+                from .database import connect_db_readonly
+
+                with connect_db_readonly(db_path) as conn:
+                    fs_result = conn.execute(
+                        "SELECT name, path FROM Filesystems WHERE id = ?",
+                        (storage_id,),
+                    ).fetchone()
+                fs_path = fs_result[1] if fs_result else None
+
+            if fs_path:
                 # Convert from original path to current mount structure
                 if "/data/wd/diskVolume0/" in fs_path:
                     relative_path = fs_path.replace("/data/wd/diskVolume0/", "")
@@ -70,19 +134,13 @@ def find_source_file(
                     # Try direct path first
                     user_file_path = user_dir / file_name
                     if user_file_path.exists() and user_file_path.is_file():
-                        conn.close()
                         return user_file_path
 
-                    # Enhanced recursive search for userStorage files
-                    if user_dir.exists():
-                        # Search recursively using rglob to handle complex album structures
-                        # Filter to only return actual files, not directories
-                        matching_files = [
-                            p for p in user_dir.rglob(file_name) if p.is_file()
-                        ]
-                        if matching_files:
-                            conn.close()
-                            return matching_files[0]  # Return first match
+                    # Search the whole tree to handle complex album structures;
+                    # only actual files are indexed, never directories
+                    match = _find_in_user_dir(user_dir, file_name, userstorage_index)
+                    if match:
+                        return match
 
                 # Handle alternative path structures
                 elif "/userStorage/" in fs_path:
@@ -92,16 +150,9 @@ def find_source_file(
                     user_dir = ibi_root / "userStorage" / user_path_part
 
                     # Search recursively in this structure too
-                    if user_dir.exists():
-                        # Filter to only return actual files, not directories
-                        matching_files = [
-                            p for p in user_dir.rglob(file_name) if p.is_file()
-                        ]
-                        if matching_files:
-                            conn.close()
-                            return matching_files[0]  # Return first match
-
-            conn.close()
+                    match = _find_in_user_dir(user_dir, file_name, userstorage_index)
+                    if match:
+                        return match
         except Exception as e:
             # Fallback to traditional method if userStorage lookup fails
             # Add debugging for production troubleshooting
@@ -127,3 +178,36 @@ def find_source_file(
             return path
 
     return None
+
+
+def content_in_bucket(
+    files_dir: Path, content_id: str, bucket_cache: Dict[str, Set[str]]
+) -> bool:
+    """
+    Check whether a contentID exists in its files_dir/<first char> bucket.
+
+    Each bucket is listed once with os.scandir and cached, so checking many
+    files costs one directory read per bucket instead of one stat per file.
+
+    Args:
+        files_dir: Base files directory path
+        content_id: Content ID to look for
+        bucket_cache: Bucket name -> file names, filled in as buckets are read
+
+    Returns:
+        True if files_dir/<content_id[0]>/<content_id> is a file
+    """
+    if not content_id:
+        return False
+
+    bucket = content_id[0]
+    if bucket not in bucket_cache:
+        try:
+            with os.scandir(files_dir / bucket) as entries:
+                bucket_cache[bucket] = {
+                    entry.name for entry in entries if entry.is_file()
+                }
+        except OSError:
+            bucket_cache[bucket] = set()
+
+    return content_id in bucket_cache[bucket]
@@ -10,13 +10,19 @@ Licensed under GPL-3.0-or-later
 
 import csv
 import json
+import os
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from .orphan_filter import OrphanFileFilter, print_orphan_filter_summary
-from .utils import find_source_file, format_size
+from .database import load_filesystem_paths
+from .orphan_filter import (
+    OrphanFileFilter,
+    get_hash_cache_path,
+    print_orphan_filter_summary,
+)
+from .utils import content_in_bucket, find_source_file, format_size
 
 
 def scan_files_directory(files_dir: Path) -> Dict[str, Dict[str, Any]]:
@@ -24,17 +30,21 @@ def scan_files_directory(files_dir: Path) -> Dict[str, Dict[str, Any]]:
     scanned_files = {}
 
     print("🔍 Scanning files directory...")
-    for subdir in files_dir.iterdir():
-        if not subdir.is_dir():
-            continue
-
-        for file_path in subdir.iterdir():
-            if file_path.is_file():
-                scanned_files[file_path.name] = {
-                    "path": file_path,
-                    "size": file_path.stat().st_size,
-                    "content_id": file_path.name,
-                }
+    # scandir answers the type checks from the directory entry, leaving one
+    # stat per file for the size
+    with os.scandir(files_dir) as subdirs:
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+
+            with os.scandir(subdir.path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        scanned_files[entry.name] = {
+                            "path": Path(entry.path),
+                            "size": entry.stat().st_size,
+                            "content_id": entry.name,
+                        }
 
     return scanned_files
 
@@ -82,9 +92,17 @@ def comprehensive_audit(
 
     if orphaned_files:
         print(f"\n🔍 Analyzing {len(orphaned_files):,} orphaned files...")
-        orphan_filter = OrphanFileFilter(files_dir)
+        orphan_filter = OrphanFileFilter(
+            files_dir, hash_cache_path=get_hash_cache_path()
+        )
         orphan_file_paths = [disk_files[cid]["path"] for cid in orphaned_files]
-        orphan_filter_results = orphan_filter.filter_orphan_files(orphan_file_paths)
+        # Reuse the sizes from the scan instead of stat'ing every orphan again
+        orphan_sizes = {
+            disk_files[cid]["path"]: disk_files[cid]["size"] for cid in orphaned_files
+        }
+        orphan_filter_results = orphan_filter.filter_orphan_files(
+            orphan_file_paths, orphan_sizes
+        )
 
         # Show filtering results
         print_orphan_filter_summary(orphan_filter_results)
@@ -299,6 +317,16 @@ def verify_file_availability(
             sample_files = files_with_albums[:actual_sample_size]
 
         files_found = 0
+        bucket_cache = {}
+        userstorage_index = {}  # userStorage trees, each walked once
+        # Calculate database path correctly based on files_dir structure
+        # files_dir is typically: .../restsdk/data/files
+        # database is at: .../restsdk/data/db/index.db
+        db_file_path = files_dir.parent / "db" / "index.db"
+        # userStorage roots, read once for the whole sample
+        filesystems = (
+            load_filesystem_paths(db_file_path) if db_file_path.exists() else {}
+        )
 
         for item in sample_files:
             file_record = item["file"]
@@ -307,15 +335,20 @@ def verify_file_availability(
             # Enhanced file finding with userStorage support
             file_name = file_record.get("name")
             storage_id = file_record.get("storageID")
-            # Calculate database path correctly based on files_dir structure
-            # files_dir is typically: .../restsdk/data/files
-            # database is at: .../restsdk/data/db/index.db
-            db_file_path = files_dir.parent / "db" / "index.db"
 
-            source_path = find_source_file(
-                files_dir, content_id, file_name, storage_id, db_file_path
-            )
-            if source_path and source_path.exists():
+            # Check the cached bucket listing before stat'ing candidate paths;
+            # find_source_file only returns paths it has already stat'ed
+            if content_in_bucket(files_dir, content_id, bucket_cache) or (
+                find_source_file(
+                    files_dir,
+                    content_id,
+                    file_name,
+                    storage_id,
+                    db_file_path,
+                    filesystems,
+                    userstorage_index,
+                )
+            ):
                 files_found += 1
 
         recovery_rate = (files_found / actual_sample_size) * 100
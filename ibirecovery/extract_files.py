@@ -21,6 +21,7 @@ the Free Software Foundation, either version 3 of the License, or
 
 import argparse
 import csv
+import functools
 import json
 import os
 import shutil
@@ -29,9 +30,11 @@ import sqlite3
 import subprocess
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from stat import S_ISDIR
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 # Import from core modules for modular functionality
 try:
@@ -39,6 +42,8 @@ try:
     from .core import check_rsync_available as core_check_rsync_available
     from .core import comprehensive_audit as core_comprehensive_audit
     from .core import connect_db as core_connect_db
+    from .core import content_in_bucket as core_content_in_bucket
+    from .core import copy_file_data as core_copy_file_data
     from .core import copy_file_fallback as core_copy_file_fallback
     from .core import copy_file_rsync as core_copy_file_rsync
     from .core import detect_ibi_structure as core_detect_ibi_structure
@@ -52,8 +57,12 @@ try:
     )
     from .core import get_merged_files_with_albums as core_get_merged_files_with_albums
     from .core import get_time_organized_path as core_get_time_organized_path
+    from .core import hash_file_content as core_hash_file_content
+    from .core import load_filesystem_paths as core_load_filesystem_paths
     from .core import scan_files_directory as core_scan_files_directory
     from .core import set_file_metadata as core_set_file_metadata
+    from .core import set_file_metadata_batch as core_set_file_metadata_batch
+    from .core import stat_resumable_dest as core_stat_resumable_dest
     from .core import verify_file_availability as core_verify_file_availability
 
     CORE_MODULES_AVAILABLE = True
@@ -259,17 +268,12 @@ def copy_file_rsync(
         True if successful, False otherwise
     """
     try:
-        cmd = ["rsync", "-av", "--progress", "--human-readable"]
-        if resume:
-            # Resume mode optimizations for better performance
-            cmd.extend(
-                [
-                    "--partial",  # Resume partial transfers
-                    "--update",  # Only transfer newer files
-                    "--size-only",  # Use size comparison instead of checksum (much faster)
-                ]
-            )
-        cmd.extend([str(source), str(dest)])
+        cmd = [
+            *RSYNC_ARGS,
+            *(RSYNC_RESUME_ARGS if resume else ()),
+            str(source),
+            str(dest),
+        ]
 
         result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
         success = result.returncode == 0
@@ -283,6 +287,73 @@ def copy_file_rsync(
         return False
 
 
+# rsync arguments for every copy; both paths are local, so rsync's delta
+# algorithm would only burn CPU checksumming blocks it then copies anyway
+RSYNC_ARGS = ("rsync", "-av", "--progress", "--human-readable", "--whole-file")
+
+# Extra rsync arguments for resumed runs
+RSYNC_RESUME_ARGS = (
+    "--partial",  # Resume partial transfers
+    "--update",  # Only transfer newer files
+    "--size-only",  # Use size comparison instead of checksum (much faster)
+)
+
+# Database timestamp fields tried in order, keyed by MIME type prefix
+TIMESTAMP_PRIORITY = {
+    "image/": ("imageDate", "cTime", "birthTime"),
+    "video/": ("videoDate", "cTime", "birthTime"),
+}
+FALLBACK_TIMESTAMP_KEYS = ("cTime", "birthTime")
+
+# Larger values can't be seconds; they're treated as milliseconds or microseconds
+MAX_SECONDS_TIMESTAMP = 7258118400  # Year 2200 in seconds
+MAX_MILLISECONDS_TIMESTAMP = 4102444800000  # Year 2100 in milliseconds
+MAX_MICROSECONDS_TIMESTAMP = 4102444800000000  # Year 2100 in microseconds
+
+# Range of timestamps accepted as real file dates
+MIN_VALID_TIMESTAMP = -2208988800  # 1900-01-01
+MAX_VALID_TIMESTAMP = 4102444800  # 2100-01-01
+
+
+def _select_timestamp(file_metadata: Dict[str, Any]) -> Optional[Tuple[Any, int]]:
+    """
+    Pick and validate the best database timestamp without converting it.
+
+    Args:
+        file_metadata: Dictionary containing metadata fields from database
+
+    Returns:
+        (value, units per second) for the chosen field, or None if no valid
+        timestamp is available
+    """
+    # Pick the first set field in priority order for this kind of file
+    mime_prefix = (file_metadata.get("mimeType") or "")[:6]
+    for key in TIMESTAMP_PRIORITY.get(mime_prefix, FALLBACK_TIMESTAMP_KEYS):
+        value = file_metadata.get(key)
+        if value:
+            break
+    else:
+        return None
+
+    # Check for invalid values (strings, NaN, infinity, extreme values)
+    if not isinstance(value, (int, float)):
+        return None
+
+    # Detect timestamps stored in milliseconds or microseconds
+    units = 1
+    if value > MAX_SECONDS_TIMESTAMP:
+        if value < MAX_MILLISECONDS_TIMESTAMP:
+            units = 1000
+        elif value < MAX_MICROSECONDS_TIMESTAMP:
+            units = 1000000
+
+    # Validate timestamp is within reasonable bounds (False for NaN)
+    if MIN_VALID_TIMESTAMP * units <= value <= MAX_VALID_TIMESTAMP * units:
+        return value, units
+
+    return None
+
+
 def get_best_timestamp(file_metadata: Dict[str, Any]) -> Optional[float]:
     """
     Extract the best available timestamp from file metadata.
@@ -293,47 +364,37 @@ def get_best_timestamp(file_metadata: Dict[str, Any]) -> Optional[float]:
     Returns:
         Timestamp in seconds since epoch, or None if no timestamp available
     """
-    target_timestamp = None
-
-    # For images, prefer imageDate
-    if file_metadata.get("mimeType", "").startswith("image/"):
-        target_timestamp = file_metadata.get("imageDate")
-
-    # For videos, prefer videoDate
-    elif file_metadata.get("mimeType", "").startswith("video/"):
-        target_timestamp = file_metadata.get("videoDate")
-
-    # Fall back to cTime, then birthTime
-    if not target_timestamp:
-        target_timestamp = file_metadata.get("cTime") or file_metadata.get("birthTime")
-
-    if target_timestamp:
-        # Convert timestamp to seconds if it appears to be in milliseconds or microseconds
-        if isinstance(target_timestamp, (int, float)):
-            # Detect milliseconds: timestamps > year 2200 in seconds (7258118400)
-            if target_timestamp > 7258118400:  # Year 2200 in seconds
-                if target_timestamp < 4102444800000:  # Year 2100 in milliseconds
-                    target_timestamp = (
-                        target_timestamp / 1000.0
-                    )  # Convert ms to seconds
-                elif target_timestamp < 4102444800000000:  # Year 2100 in microseconds
-                    target_timestamp = (
-                        target_timestamp / 1000000.0
-                    )  # Convert μs to seconds
-
-            # Validate timestamp is within reasonable bounds
-            min_timestamp = -2208988800  # 1900-01-01
-            max_timestamp = 4102444800  # 2100-01-01
-
-            # Check for invalid values (NaN, infinity, extreme values)
-            if (
-                isinstance(target_timestamp, (int, float))
-                and target_timestamp == target_timestamp  # NaN check
-                and min_timestamp <= target_timestamp <= max_timestamp
-            ):
-                return target_timestamp
+    selected = _select_timestamp(file_metadata)
+    if selected is None:
+        return None
 
-    return None
+    value, units = selected
+    return value / units if units != 1 else value
+
+
+def get_best_timestamp_ns(file_metadata: Dict[str, Any]) -> Optional[int]:
+    """
+    Extract the best available timestamp from file metadata in nanoseconds.
+
+    Integer database values are scaled with integer arithmetic, so
+    millisecond and microsecond timestamps convert exactly instead of
+    going through a float number of seconds.
+
+    Args:
+        file_metadata: Dictionary containing metadata fields from database
+
+    Returns:
+        Timestamp in nanoseconds since epoch, or None if no timestamp available
+    """
+    selected = _select_timestamp(file_metadata)
+    if selected is None:
+        return None
+
+    value, units = selected
+    ns_per_unit = 1_000_000_000 // units
+    if isinstance(value, int):
+        return value * ns_per_unit
+    return int(value * ns_per_unit)
 
 
 def get_organized_path(
@@ -380,8 +441,55 @@ def get_time_organized_path(
     )
 
 
+def set_file_metadata_ns(
+    dest: Path,
+    file_metadata: Dict[str, Any],
+    dir_fd: Optional[int] = None,
+    dest_stat: Optional[os.stat_result] = None,
+) -> Optional[int]:
+    """
+    Set file timestamps based on database metadata, reporting what was applied.
+
+    Args:
+        dest: Destination file path
+        file_metadata: Dictionary containing metadata fields from database
+        dir_fd: Optional descriptor of an open directory; a relative dest is
+            then resolved from it instead of walking the full path again
+        dest_stat: Optional stat of dest the caller already has, used instead
+            of stat'ing it again to check the current time
+
+    Returns:
+        The access/modification time set on dest in nanoseconds since epoch,
+        or None if no usable timestamp was found or it couldn't be set
+    """
+    try:
+        target_ns = get_best_timestamp_ns(file_metadata)
+
+        if target_ns is not None:
+            # Resumed runs mostly find the time already corrected; a stat is
+            # cheaper than a utime, which dirties the inode even when unchanged
+            if dest_stat is None:
+                dest_stat = os.stat(dest, dir_fd=dir_fd)
+            if dest_stat.st_mtime_ns != target_ns:
+                # Set both access and modification times in one utimensat call.
+                # os.utime is already a thin utimensat wrapper; calling libc
+                # through ctypes measured slower per call, not faster.
+                os.utime(dest, ns=(target_ns, target_ns), dir_fd=dir_fd)
+            return target_ns
+
+    except (OSError, TypeError, ValueError, OverflowError) as e:
+        # Don't fail the whole copy operation for metadata issues
+        print(f"Warning: Could not set metadata for {dest}: {e}")
+
+    return None
+
+
 def set_file_metadata(
-    dest: Path, file_metadata: Dict[str, Any], track_corrections: bool = False
+    dest: Path,
+    file_metadata: Dict[str, Any],
+    track_corrections: bool = False,
+    dir_fd: Optional[int] = None,
+    dest_stat: Optional[os.stat_result] = None,
 ) -> bool:
     """
     Set file timestamps based on database metadata.
@@ -389,23 +497,79 @@ def set_file_metadata(
     Args:
         dest: Destination file path
         file_metadata: Dictionary containing metadata fields from database
+        dir_fd: Optional descriptor of an open directory that a relative dest
+            is resolved from
+        dest_stat: Optional stat of dest the caller already has
 
     Returns:
         True if successful, False otherwise
     """
+    return set_file_metadata_ns(dest, file_metadata, dir_fd, dest_stat) is not None
+
+
+def set_file_metadata_batch(
+    items: Iterable[Tuple[Path, Dict[str, Any]]], max_workers: Optional[int] = None
+) -> List[bool]:
+    """Set file timestamps for many (path, file_metadata) pairs concurrently."""
+    if CORE_MODULES_AVAILABLE:
+        return core_set_file_metadata_batch(items, max_workers)
+
+    # Fallback implementation
+    return [set_file_metadata(dest, file_metadata) for dest, file_metadata in items]
+
+
+def copy_file_data(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> None:
+    """Copy file contents and metadata, using in-kernel copying where supported."""
+    if CORE_MODULES_AVAILABLE:
+        return core_copy_file_data(source, dest, file_metadata)
+
+    # Fallback implementation
+    shutil.copy2(source, dest)
+    if file_metadata:
+        set_file_metadata(dest, file_metadata)
+
+
+def hash_file_content(path: Path) -> str:
+    """Hash a file's full contents for content-addressable deduplication."""
+    if CORE_MODULES_AVAILABLE:
+        return core_hash_file_content(path)
+
+    # Fallback implementation
+    import hashlib
+
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def stat_resumable_dest(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> Optional[os.stat_result]:
+    """Stat an existing destination a resumed copy can keep, else return None."""
+    if CORE_MODULES_AVAILABLE:
+        return core_stat_resumable_dest(source, dest, file_metadata)
+
+    # Fallback implementation
     try:
-        target_timestamp = get_best_timestamp(file_metadata)
+        dest_stat = os.stat(dest)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
 
-        if target_timestamp:
-            # Set both access and modification times to the target timestamp
-            os.utime(dest, (target_timestamp, target_timestamp))
-            return True
+    dest_size = dest_stat.st_size
+    if file_metadata and dest_size == file_metadata.get("size"):
+        return dest_stat
+    return dest_stat if dest_size == os.stat(source).st_size else None
 
-    except (OSError, TypeError, ValueError, OverflowError) as e:
-        # Don't fail the whole copy operation for metadata issues
-        print(f"Warning: Could not set metadata for {dest}: {e}")
 
-    return False
+def resume_can_skip(
+    source: Path, dest: Path, file_metadata: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Check whether a resumed copy can keep an existing, same-size destination."""
+    return stat_resumable_dest(source, dest, file_metadata) is not None
 
 
 def copy_file_fallback(
@@ -414,6 +578,7 @@ def copy_file_fallback(
     resume: bool = True,
     file_metadata: Optional[Dict[str, Any]] = None,
     fix_metadata: bool = True,
+    known_dirs: Optional[Set[Path]] = None,
 ) -> bool:
     """
     Fallback file copy using shutil with basic resume support and metadata correction.
@@ -423,31 +588,55 @@ def copy_file_fallback(
         dest: Destination file path
         resume: Whether to skip if destination exists and has same size
         file_metadata: Optional metadata dictionary for timestamp correction
+        known_dirs: Optional set of directories already created during this run,
+            passed to safe_mkdir so dest.parent is only created once
 
     Returns:
         True if successful, False otherwise
     """
     try:
         # Simple resume: skip if destination exists and has same size
-        if resume and dest.exists():
-            if dest.stat().st_size == source.stat().st_size:
-                # Still try to correct metadata if provided
-                if file_metadata and fix_metadata:
-                    set_file_metadata(dest, file_metadata)
-                return True
+        dest_stat = stat_resumable_dest(source, dest, file_metadata) if resume else None
+        if dest_stat is not None:
+            # Still try to correct metadata, reusing the stat just taken
+            if file_metadata and fix_metadata:
+                set_file_metadata(dest, file_metadata, dest_stat=dest_stat)
+            return True
 
-        safe_mkdir(dest.parent, parents=True)
-        shutil.copy2(source, dest)
+        safe_mkdir(dest.parent, parents=True, known_dirs=known_dirs)
 
-        # Set correct metadata timestamps if provided
+        # Copy the file, setting correct metadata timestamps if provided
+        copy_file_data(source, dest, file_metadata if fix_metadata else None)
+
+        return True
+    except shutil.SameFileError:
+        # dest already is the source file, e.g. re-running over an extraction;
+        # copying it onto itself would truncate it, so only fix its timestamps
         if file_metadata and fix_metadata:
             set_file_metadata(dest, file_metadata)
-
         return True
     except (OSError, shutil.Error):
         return False
 
 
+def _iter_tree_files(root: Path) -> Iterator[os.DirEntry]:
+    """Yield regular files under root, each directory's files before its subdirs.
+
+    Uses os.scandir so file type checks come from the directory entry and a
+    single cached stat serves each file. Symlinks, including symlinked
+    directories, are skipped, matching the rglob filtering this replaces.
+    """
+    subdirs = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+    for subdir in subdirs:
+        yield from _iter_tree_files(Path(subdir))
+
+
 def deduplicate_existing_extraction(
     output_dir: Path,
     use_hardlinks: bool = True,
@@ -480,24 +669,24 @@ def deduplicate_existing_extraction(
     total_size = 0
 
     print("Scanning files by content...")
-    for file_path in output_dir.rglob("*"):
-        if file_path.is_file() and not file_path.is_symlink():
-            try:
-                stat = file_path.stat()
-                # Use size and first/last 1KB as content signature for performance
-                with open(file_path, "rb") as f:
-                    start_bytes = f.read(1024)
-                    f.seek(
-                        -min(1024, stat.st_size), 2
-                    ) if stat.st_size > 1024 else f.seek(0)
-                    end_bytes = f.read(1024)
-
-                content_sig = f"{stat.st_size}:{hash(start_bytes)}:{hash(end_bytes)}"
-                files_by_content[content_sig].append((file_path, stat.st_size))
-                total_files += 1
-                total_size += stat.st_size
-            except (OSError, IOError) as e:
-                print(f"Warning: Could not read {file_path}: {e}")
+    for entry in _iter_tree_files(output_dir):
+        file_path = Path(entry.path)
+        try:
+            stat = entry.stat(follow_symlinks=False)
+            # Use size and first/last 1KB as content signature for performance
+            with open(file_path, "rb") as f:
+                start_bytes = f.read(1024)
+                f.seek(
+                    -min(1024, stat.st_size), 2
+                ) if stat.st_size > 1024 else f.seek(0)
+                end_bytes = f.read(1024)
+
+            content_sig = f"{stat.st_size}:{hash(start_bytes)}:{hash(end_bytes)}"
+            files_by_content[content_sig].append((file_path, stat.st_size))
+            total_files += 1
+            total_size += stat.st_size
+        except (OSError, IOError) as e:
+            print(f"Warning: Could not read {file_path}: {e}")
 
     # Find duplicates
     duplicates = {
@@ -594,6 +783,7 @@ def copy_file_with_dedup(
     copy_tracker: Dict[str, Path] = None,
     file_metadata: Optional[Dict[str, Any]] = None,
     fix_metadata: bool = True,
+    known_dirs: Optional[Set[Path]] = None,
 ) -> Tuple[bool, str]:
     """
     Copy file with deduplication support using hardlinks or symlinks for duplicates.
@@ -604,8 +794,11 @@ def copy_file_with_dedup(
         resume: Whether to skip if destination exists and has same size
         use_hardlinks: Whether to use hardlinks for duplicate files (default: True)
         use_symlinks: Whether to use symlinks for duplicate files (default: False)
-        copy_tracker: Dictionary tracking content_id -> first copy location
+        copy_tracker: Dictionary tracking content key -> first copy location, where the
+            key is the database contentID or, for files without one, a content hash
         file_metadata: Optional metadata dictionary for timestamp correction
+        known_dirs: Optional set of directories already created during this run,
+            passed to safe_mkdir so dest.parent is only created once
 
     Returns:
         Tuple of (success: bool, action: str) where action is 'copied', 'hardlinked', 'symlinked', or 'skipped'
@@ -615,64 +808,76 @@ def copy_file_with_dedup(
 
     try:
         # Simple resume: skip if destination exists and has same size
-        if resume and dest.exists():
-            if dest.stat().st_size == source.stat().st_size:
-                # Still try to correct metadata if provided
-                if file_metadata and fix_metadata:
-                    set_file_metadata(dest, file_metadata)
-                return True, "skipped"
+        dest_stat = stat_resumable_dest(source, dest, file_metadata) if resume else None
+        if dest_stat is not None:
+            # Still try to correct metadata, reusing the stat just taken
+            if file_metadata and fix_metadata:
+                set_file_metadata(dest, file_metadata, dest_stat=dest_stat)
+            return True, "skipped"
 
         # Ensure destination directory exists
-        safe_mkdir(dest.parent, parents=True)
-
-        # Get source file stats - needed for both deduplication and copy operations
-        source_stat = source.stat()
+        safe_mkdir(dest.parent, parents=True, known_dirs=known_dirs)
 
         # Generate content identifier - prefer database content_id if available in metadata
         if file_metadata and "contentID" in file_metadata:
             content_key = file_metadata["contentID"]
         else:
-            # Fallback to source file properties for non-database files
-            content_key = f"{source}:{source_stat.st_size}:{source_stat.st_mtime}"
+            # Hash contents for non-database files so identical files dedup
+            # even when they come from different source paths
+            content_key = hash_file_content(source)
 
         # Check if we've already copied this exact file
         if content_key in copy_tracker:
             first_copy_path = copy_tracker[content_key]
 
-            # Verify the first copy still exists and is valid
-            if (
-                first_copy_path.exists()
-                and first_copy_path.stat().st_size == source_stat.st_size
+            # Verify the first copy still exists and is valid (one stat)
+            try:
+                first_copy_size = os.stat(first_copy_path).st_size
+            except OSError:
+                first_copy_size = None
+
+            # The source is only stat'ed for a repeat, not every first copy
+            if first_copy_size is not None and (
+                first_copy_size == os.stat(source).st_size
             ):
                 try:
                     if use_hardlinks and not use_symlinks:
-                        # Try hardlink first (more robust, saves actual space)
-                        dest.unlink(missing_ok=True)  # Remove if exists
-                        os.link(str(first_copy_path), str(dest))
+                        # Try hardlink first (more robust, saves actual space).
+                        # Link straight away; only clear dest if one is in the way
+                        try:
+                            os.link(first_copy_path, dest)
+                        except FileExistsError:
+                            dest.unlink()
+                            os.link(first_copy_path, dest)
                         # For hardlinks, metadata is automatically shared with original
                         return True, "hardlinked"
                     elif use_symlinks:
                         # Use symlink (saves space but creates dependency)
-                        dest.unlink(missing_ok=True)  # Remove if exists
-                        dest.symlink_to(first_copy_path)
+                        try:
+                            dest.symlink_to(first_copy_path)
+                        except FileExistsError:
+                            dest.unlink()
+                            dest.symlink_to(first_copy_path)
                         # For symlinks, metadata is automatically shared with original
                         return True, "symlinked"
                 except OSError:
                     # Fall back to copy if linking fails (e.g., cross-filesystem)
                     pass
 
-        # Perform regular copy
-        shutil.copy2(source, dest)
-
-        # Set correct metadata timestamps if provided
-        if file_metadata and fix_metadata:
-            set_file_metadata(dest, file_metadata)
+        # Perform regular copy, setting correct metadata timestamps if provided
+        copy_file_data(source, dest, file_metadata if fix_metadata else None)
 
         # Track this as the first copy for future deduplication
         copy_tracker[content_key] = dest
 
         return True, "copied"
 
+    except shutil.SameFileError:
+        # dest already is the source file, e.g. re-running over an extraction;
+        # copying it onto itself would truncate it, so only fix its timestamps
+        if file_metadata and fix_metadata:
+            set_file_metadata(dest, file_metadata)
+        return True, "skipped"
     except (OSError, shutil.Error) as e:
         print(f"Error copying {source} to {dest}: {e}")
         return False, "error"
@@ -716,54 +921,107 @@ def connect_db_readonly(db_path: Path):
             raise
 
 
-def safe_mkdir(path: Path, parents: bool = False, exist_ok: bool = True):
+def _move_aside_conflicting_file(path: Path) -> Path:
+    """
+    Rename a file to the first free <name>_conflicted_file[_N] name.
+
+    Names are claimed with a hard link, which fails atomically if the name is
+    taken, so there is no window between checking a name and renaming onto
+    it. Filesystems without hard links fall back to probing with lexists.
+
+    Args:
+        path: File blocking a directory that needs to be created
+
+    Returns:
+        The file's new path
+
+    Raises:
+        OSError: If the file couldn't be moved
+    """
+    counter = 0
+    while True:
+        suffix = f"_{counter}" if counter else ""
+        new_path = path.parent / f"{path.name}_conflicted_file{suffix}"
+        counter += 1
+        try:
+            os.link(path, new_path, follow_symlinks=False)
+        except FileExistsError:
+            continue
+        except (OSError, NotImplementedError):
+            # No hard links here (e.g. FAT or some network shares)
+            if os.path.lexists(new_path):
+                continue
+            path.rename(new_path)
+            return new_path
+
+        try:
+            os.unlink(path)
+        except OSError:
+            # Don't leave the file under two names
+            os.unlink(new_path)
+            raise
+        return new_path
+
+
+def safe_mkdir(
+    path: Path,
+    parents: bool = False,
+    exist_ok: bool = True,
+    known_dirs: Optional[Set[Path]] = None,
+):
     """Safely create directory handling resume scenarios and race conditions.
 
     This function prevents FileExistsError when directories already exist from
     previous script runs (resume mode) or when multiple processes create the
     same directory simultaneously. If a file exists with the same name as a
     directory we need to create, it intelligently renames the file.
+
+    When known_dirs is given, directories already in it are skipped without a
+    syscall and directories created (or found existing) are added to it.
     """
+    if known_dirs is not None and path in known_dirs:
+        return
+
     try:
         path.mkdir(parents=parents, exist_ok=exist_ok)
+        if known_dirs is not None:
+            known_dirs.add(path)
     except FileExistsError as e:
-        # Handle case where path exists - could be file or directory
-        if path.exists():
-            if path.is_dir():
-                # Directory exists - this is fine for resume mode
-                pass
-            else:
-                # A file exists with this name - we need to create a directory here
-                # Intelligently rename the conflicting file
-                original_file = path
-
-                # Create a descriptive new name for the conflicting file
-                new_name = f"{original_file.name}_conflicted_file"
-                new_path = original_file.parent / new_name
-
-                # If that name also exists, add a counter
-                counter = 1
-                while new_path.exists():
-                    new_name = f"{original_file.name}_conflicted_file_{counter}"
-                    new_path = original_file.parent / new_name
-                    counter += 1
+        # Handle case where path exists - could be file or directory. A single
+        # stat tells a directory (or symlink to one) from a conflicting file
+        # or a path that vanished again.
+        try:
+            path_mode = path.stat().st_mode
+        except OSError:
+            path_mode = None
+
+        if path_mode is not None and S_ISDIR(path_mode):
+            # Directory exists - this is fine for resume mode
+            if known_dirs is not None:
+                known_dirs.add(path)
+        elif path_mode is not None:
+            # A file exists with this name - we need to create a directory here
+            # Intelligently rename the conflicting file
+            original_file = path
 
-                try:
-                    # Rename the conflicting file
-                    original_file.rename(new_path)
-                    print(
-                        f"📁 Resolved directory conflict: renamed file '{original_file.name}' to '{new_name}'"
-                    )
+            try:
+                # Move the conflicting file aside to a descriptive free name
+                new_path = _move_aside_conflicting_file(original_file)
+                print(
+                    f"📁 Resolved directory conflict: renamed file '{original_file.name}' to '{new_path.name}'"
+                )
 
-                    # Now create the directory
-                    path.mkdir(parents=parents, exist_ok=exist_ok)
+                # Now create the directory
+                path.mkdir(parents=parents, exist_ok=exist_ok)
+                if known_dirs is not None:
+                    known_dirs.add(path)
 
-                except OSError as rename_error:
-                    print(
-                        f"Warning: Could not resolve directory conflict for {path}: {rename_error}"
-                    )
-                    if not exist_ok:
-                        raise
+            except OSError as rename_error:
+                print(
+                    f"Warning: Could not resolve directory conflict for {path}: {rename_error}"
+                )
+                if not exist_ok:
+                    raise
         else:
             # FileExistsError but path doesn't exist - unusual race condition
             print(f"Warning: Unexpected FileExistsError for {path}: {e}")
@@ -783,12 +1041,20 @@ def find_source_file(
     file_name: str = None,
     storage_id: str = None,
     db_path: Path = None,
+    filesystems: Optional[Dict[str, str]] = None,
+    userstorage_index: Optional[Dict[Path, Dict[str, List[str]]]] = None,
 ) -> Optional[Path]:
     """Find the actual file using contentID with userStorage support."""
     if CORE_MODULES_AVAILABLE:
         # Use enhanced version that supports userStorage
         return core_find_source_file(
-            files_dir, content_id, file_name, storage_id, db_path
+            files_dir,
+            content_id,
+            file_name,
+            storage_id,
+            db_path,
+            filesystems,
+            userstorage_index,
         )
 
     # Fallback for traditional ibi structure only
@@ -811,6 +1077,84 @@ def find_source_file(
     return None
 
 
+def load_filesystem_paths(db_path: Path) -> Dict[str, str]:
+    """Load the storageID -> filesystem path mapping used by find_source_file."""
+    if CORE_MODULES_AVAILABLE:
+        return core_load_filesystem_paths(db_path)
+
+    # The fallback find_source_file only knows the traditional structure
+    return {}
+
+
+def content_in_bucket(
+    files_dir: Path, content_id: str, bucket_cache: Dict[str, set]
+) -> bool:
+    """Check whether a contentID exists in its cached files_dir/<first char> bucket."""
+    if CORE_MODULES_AVAILABLE:
+        return core_content_in_bucket(files_dir, content_id, bucket_cache)
+
+    # Fallback implementation
+    if not content_id:
+        return False
+
+    bucket = content_id[0]
+    if bucket not in bucket_cache:
+        try:
+            with os.scandir(files_dir / bucket) as entries:
+                bucket_cache[bucket] = {
+                    entry.name for entry in entries if entry.is_file()
+                }
+        except OSError:
+            bucket_cache[bucket] = set()
+
+    return content_id in bucket_cache[bucket]
+
+
+def locate_source_file(
+    files_dir: Path,
+    file_record: Dict[str, Any],
+    db_path: Path,
+    filesystems: Dict[str, str],
+    bucket_cache: Dict[str, set],
+    userstorage_index: Optional[Dict[Path, Dict[str, List[str]]]] = None,
+) -> Optional[Path]:
+    """
+    Find a file record's source, answering from cached bucket listings when possible.
+
+    userStorage mappings take precedence in find_source_file, so the cached
+    files_dir/<first char>/<contentID> listing is only trusted for records
+    without one; everything else goes through find_source_file.
+
+    Args:
+        files_dir: Base files directory path
+        file_record: File record with contentID, name and storageID
+        db_path: Database path (for filesystem mapping lookup)
+        filesystems: Mapping from load_filesystem_paths
+        bucket_cache: Bucket listings shared across calls, see content_in_bucket
+        userstorage_index: userStorage name indexes shared across calls, see
+            find_source_file
+
+    Returns:
+        Path to the source file, or None if it wasn't found
+    """
+    content_id = file_record["contentID"]
+    storage_id = file_record.get("storageID")
+    if not (storage_id and filesystems.get(storage_id)) and content_in_bucket(
+        files_dir, content_id, bucket_cache
+    ):
+        return files_dir / content_id[0] / content_id
+
+    return find_source_file(
+        files_dir,
+        content_id,
+        file_record["name"],
+        storage_id,
+        db_path,
+        filesystems,
+        userstorage_index,
+    )
+
+
 def get_all_files_with_albums(
     conn: sqlite3.Connection,
 ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
@@ -941,18 +1285,21 @@ def sanitize_album_name(album_name: str) -> tuple[str, bool]:
     return sanitized, name_changed
 
 
+SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 def format_size(size_bytes: int) -> str:
     """Format file size in human readable format."""
     if size_bytes == 0:
         return "0 B"
 
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    # Each unit is 2**10 times the previous one, so the unit index falls
+    # straight out of the bit length instead of a divide-by-1024 loop
+    unit = 0
+    if size_bytes >= 1024:
+        unit = min((int(size_bytes).bit_length() - 1) // 10, len(SIZE_UNITS) - 1)
 
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (unit * 10)):.1f} {SIZE_UNITS[unit]}"
 
 
 def scan_files_directory(files_dir: Path) -> Dict[str, Dict[str, Any]]:
@@ -961,23 +1308,25 @@ def scan_files_directory(files_dir: Path) -> Dict[str, Dict[str, Any]]:
 
     print("Scanning all files on disk...")
 
-    # Walk through all subdirectories
-    for subdir in files_dir.iterdir():
-        if not subdir.is_dir():
-            continue
+    # Walk through all subdirectories; scandir answers the type checks from
+    # the directory entry, leaving one stat per file
+    with os.scandir(files_dir) as subdirs:
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
 
-        for file_path in subdir.iterdir():
-            if file_path.is_file():
-                content_id = file_path.name
-                try:
-                    stat = file_path.stat()
-                    disk_files[content_id] = {
-                        "path": file_path,
-                        "size": stat.st_size,
-                        "mtime": stat.st_mtime,
-                    }
-                except (OSError, IOError):
-                    continue
+            with os.scandir(subdir.path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        try:
+                            stat = entry.stat()
+                            disk_files[entry.name] = {
+                                "path": Path(entry.path),
+                                "size": stat.st_size,
+                                "mtime": stat.st_mtime,
+                            }
+                        except (OSError, IOError):
+                            continue
 
     return disk_files
 
@@ -1337,10 +1686,8 @@ def verify_file_availability(
         return comprehensive_audit(files_with_albums, files_dir, audit_report_dir)
 
     # Continue with existing quick verification logic for samples
-
-    # Take a random sample
-    sample_size = min(sample_size, total_files)
-    sample_files = random.sample(files_with_albums, sample_size)
+    sample_size = len(files_to_check)
+    sample_files = files_to_check
 
     available_count = 0
     missing_count = 0
@@ -1349,6 +1696,7 @@ def verify_file_availability(
 
     print(f"Checking availability of {sample_size} sample files...")
 
+    bucket_cache = {}
     for item in sample_files:
         file_record = item["file"]
         content_id = file_record.get("contentID")
@@ -1356,8 +1704,11 @@ def verify_file_availability(
         total_sample_size += file_size
 
         if content_id:
-            source_path = find_source_file(files_dir, content_id)
-            if source_path and source_path.exists():
+            # Check the cached bucket listing before stat'ing candidate paths;
+            # find_source_file only returns paths it has already stat'ed
+            if content_in_bucket(
+                files_dir, content_id, bucket_cache
+            ) or find_source_file(files_dir, content_id):
                 available_count += 1
                 available_size += file_size
             else:
@@ -1536,6 +1887,20 @@ def export_digikam_csv(data: List[Dict[str, Any]], output_file: Path) -> None:
             )
 
 
+@functools.lru_cache(maxsize=65536)
+def _format_export_timestamp(date_val: Any, fmt: str) -> str:
+    """Format an ibi date (epoch seconds/milliseconds or ISO string) with strftime.
+
+    Cached because an export renders the same capture date in several fields
+    and formats, and each conversion costs a localtime() call plus strftime.
+    """
+    if isinstance(date_val, (int, float)):
+        # Handle milliseconds since epoch (ibi format)
+        timestamp = date_val / 1000 if date_val > 1e10 else date_val
+        return datetime.fromtimestamp(timestamp).strftime(fmt)
+    return datetime.fromisoformat(str(date_val).replace("Z", "+00:00")).strftime(fmt)
+
+
 class MetadataExporter:
     """Spec-driven metadata export engine."""
 
@@ -1603,16 +1968,7 @@ class MetadataExporter:
         if not date_val:
             return ""
         try:
-            from datetime import datetime
-
-            if isinstance(date_val, (int, float)):
-                # Handle milliseconds since epoch (ibi format)
-                timestamp = date_val / 1000 if date_val > 1e10 else date_val
-                return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-            else:
-                return datetime.fromisoformat(
-                    str(date_val).replace("Z", "+00:00")
-                ).strftime("%Y-%m-%d")
+            return _format_export_timestamp(date_val, "%Y-%m-%d")
         except:
             return str(date_val)[:10]
 
@@ -1622,16 +1978,7 @@ class MetadataExporter:
         if not date_val:
             return ""
         try:
-            from datetime import datetime
-
-            if isinstance(date_val, (int, float)):
-                # Handle milliseconds since epoch (ibi format)
-                timestamp = date_val / 1000 if date_val > 1e10 else date_val
-                return datetime.fromtimestamp(timestamp).strftime("%Y%m%d")
-            else:
-                return datetime.fromisoformat(
-                    str(date_val).replace("Z", "+00:00")
-                ).strftime("%Y%m%d")
+            return _format_export_timestamp(date_val, "%Y%m%d")
         except:
             return str(date_val)[:8]
 
@@ -1641,16 +1988,7 @@ class MetadataExporter:
         if not date_val:
             return ""
         try:
-            from datetime import datetime
-
-            if isinstance(date_val, (int, float)):
-                # Handle milliseconds since epoch (ibi format)
-                timestamp = date_val / 1000 if date_val > 1e10 else date_val
-                return datetime.fromtimestamp(timestamp).strftime("%Y:%m:%d %H:%M:%S")
-            else:
-                return datetime.fromisoformat(
-                    str(date_val).replace("Z", "+00:00")
-                ).strftime("%Y:%m:%d %H:%M:%S")
+            return _format_export_timestamp(date_val, "%Y:%m:%d %H:%M:%S")
         except:
             return str(date_val)
 
@@ -1687,16 +2025,7 @@ class MetadataExporter:
         if not date_val:
             return ""
         try:
-            from datetime import datetime
-
-            if isinstance(date_val, (int, float)):
-                # Handle milliseconds since epoch (ibi format)
-                timestamp = date_val / 1000 if date_val > 1e10 else date_val
-                return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%S")
-            else:
-                return datetime.fromisoformat(
-                    str(date_val).replace("Z", "+00:00")
-                ).strftime("%Y-%m-%dT%H:%M:%S")
+            return _format_export_timestamp(date_val, "%Y-%m-%dT%H:%M:%S")
         except:
             return str(date_val)
 
@@ -1706,16 +2035,7 @@ class MetadataExporter:
         if not date_val:
             return ""
         try:
-            from datetime import datetime
-
-            if isinstance(date_val, (int, float)):
-                # Handle milliseconds since epoch (ibi format)
-                timestamp = date_val / 1000 if date_val > 1e10 else date_val
-                return datetime.fromtimestamp(timestamp).strftime("%Y")
-            else:
-                return datetime.fromisoformat(
-                    str(date_val).replace("Z", "+00:00")
-                ).strftime("%Y")
+            return _format_export_timestamp(date_val, "%Y")
         except:
             return str(date_val)[:4]
 
@@ -1947,6 +2267,163 @@ def check_interrupt():
     return False
 
 
+def get_copy_parallelism() -> int:
+    """Get the number of concurrent file copies (IBI_COPY_PARALLELISM, default 8)."""
+    try:
+        return max(1, int(os.getenv("IBI_COPY_PARALLELISM", "8")))
+    except ValueError:
+        return 8
+
+
+def plan_copy_destination(
+    dest_path: Path, resume: bool, claimed_dests: Dict[Path, str]
+) -> Path:
+    """
+    Pick a destination path that doesn't clash with existing or pending copies.
+
+    Copies run concurrently, so a destination claimed by an earlier file in
+    this run may not exist on disk yet when the next file is planned.
+
+    Args:
+        dest_path: Preferred destination path
+        resume: Whether existing destinations are reused (resume behavior)
+        claimed_dests: Destinations already handed out in this run
+
+    Returns:
+        dest_path, or dest_path with a _N suffix if that name is taken
+    """
+    counter = 1
+    original_dest = dest_path
+    while not resume and (dest_path.exists() or dest_path in claimed_dests):
+        stem = original_dest.stem
+        suffix = original_dest.suffix
+        # Keep the (time-organized) directory structure
+        dest_path = original_dest.parent / f"{stem}_{counter}{suffix}"
+        counter += 1
+    return dest_path
+
+
+def resolve_copy_group(group_key: str, group_links: Dict[str, str]) -> str:
+    """Follow merged copy groups from group_key to the group it now belongs to."""
+    while group_key in group_links:
+        group_key = group_links[group_key]
+    return group_key
+
+
+def claim_copy_group(
+    dest_path: Path,
+    content_id: str,
+    claimed_dests: Dict[Path, str],
+    group_links: Dict[str, str],
+) -> str:
+    """
+    Assign a planned copy to a copy group and claim its destination.
+
+    Copies are grouped by contentID so a duplicate only runs once its first
+    copy exists and can be hardlinked. A destination already claimed by
+    another group merges the two groups, so copies sharing a destination
+    never overlap and a contentID never ends up in two groups at once.
+
+    Args:
+        dest_path: Planned destination path
+        content_id: Database contentID of the file being copied
+        claimed_dests: Destination -> copy group, updated with dest_path
+        group_links: Merged group -> group it was merged into, updated in place
+
+    Returns:
+        The copy group for this job
+    """
+    group_key = resolve_copy_group(content_id, group_links)
+    if dest_path in claimed_dests:
+        claimed_group = resolve_copy_group(claimed_dests[dest_path], group_links)
+        if claimed_group != group_key:
+            group_links[group_key] = claimed_group
+            group_key = claimed_group
+    claimed_dests[dest_path] = group_key
+    return group_key
+
+
+def run_copy_jobs(
+    jobs: List[Tuple[str, Any]],
+    copy_one: Callable[[Any], Any],
+    on_done: Callable[[Any, Any], None],
+    group_links: Optional[Dict[str, str]] = None,
+) -> bool:
+    """
+    Run file copies on a thread pool, reporting results on the calling thread.
+
+    Jobs sharing a group key run in order on the same worker, see
+    claim_copy_group for how keys are assigned.
+
+    Args:
+        jobs: List of (group_key, job) tuples in extraction order
+        copy_one: Called on a worker thread for each job, returns its result
+        on_done: Called on the calling thread with (job, result) as jobs finish
+        group_links: Merged group -> group it was merged into, from claim_copy_group
+
+    Returns:
+        True if all jobs ran, False if extraction was interrupted
+    """
+    groups = defaultdict(list)
+    for group_key, job in jobs:
+        groups[resolve_copy_group(group_key, group_links or {})].append(job)
+
+    def run_group(group):
+        results = []
+        for job in group:
+            if extraction_state.interrupted:
+                break
+            results.append((job, copy_one(job)))
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=get_copy_parallelism())
+    try:
+        futures = [executor.submit(run_group, group) for group in groups.values()]
+        for future in as_completed(futures):
+            for job, result in future.result():
+                on_done(job, result)
+            if check_interrupt():
+                return False
+    finally:
+        # Don't start queued copies once we're leaving early
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return True
+
+
+def safe_mkdir_all(dirs: Iterable[Path], known_dirs: Set[Path]) -> None:
+    """
+    Create directories concurrently with safe_mkdir, skipping known ones.
+
+    Directory creation is mostly syscall latency (notably on network shares),
+    so the requests are overlapped on IBI_COPY_PARALLELISM threads. Shallow
+    directories are submitted first; deeper ones create missing parents
+    themselves.
+
+    Args:
+        dirs: Directories to create, with parents
+        known_dirs: Directories already created; updated with the new ones
+    """
+    pending = sorted(set(dirs) - known_dirs, key=lambda path: len(path.parts))
+    workers = min(get_copy_parallelism(), len(pending))
+    if workers <= 1:
+        for dir_path in pending:
+            safe_mkdir(dir_path, parents=True, known_dirs=known_dirs)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Consume the results so anything safe_mkdir raises propagates here,
+        # just as it does when the directories are created inline
+        list(
+            executor.map(
+                lambda dir_path: safe_mkdir(
+                    dir_path, parents=True, known_dirs=known_dirs
+                ),
+                pending,
+            )
+        )
+
+
 def extract_by_albums(
     files_with_albums: List[Dict[str, Any]],
     files_dir: Path,
@@ -2014,6 +2491,146 @@ def extract_by_albums(
             "space_saved": 0,
         }
     copy_func = copy_file_rsync if use_rsync else copy_file_fallback
+    claimed_dests = {}  # Destination -> copy group, covers copies still in flight
+    group_links = {}  # Copy groups merged because they share a destination
+    # userStorage roots for find_source_file, read once instead of per file
+    filesystems = load_filesystem_paths(db_path) if copy_files else {}
+    bucket_cache = {}  # files_dir bucket listings, each read once
+    userstorage_index = {}  # userStorage trees, each walked once
+    created_dirs = set()  # Directories already created, so each is made only once
+
+    def copy_one(job):
+        file_record, source_path, dest_path = job
+
+        # Use deduplication if enabled
+        if dedup:
+            return copy_file_with_dedup(
+                source_path,
+                dest_path,
+                resume,
+                use_hardlinks,
+                use_symlinks,
+                copy_tracker,
+                file_record,
+                fix_metadata,  # Pass metadata for timestamp correction
+                known_dirs=created_dirs,
+            )
+
+        # Use traditional copy function
+        if use_rsync:
+            success = copy_file_rsync(
+                source_path, dest_path, resume, file_record, fix_metadata
+            )
+        else:
+            success = copy_file_fallback(
+                source_path,
+                dest_path,
+                resume,
+                file_record,
+                fix_metadata,
+                known_dirs=created_dirs,
+            )
+        return success, "copied"
+
+    def extract_files_to(items, target_dir, desc, extracted_before):
+        """Extract items into target_dir, returning (count, size, completed)."""
+        nonlocal total_size_extracted
+
+        extracted_count = 0
+        extracted_size = 0
+
+        with tqdm(
+            total=len(items),
+            desc=desc,
+            unit="files",
+            leave=False,
+            unit_scale=False,
+            dynamic_ncols=True,
+            bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
+        ) as pbar:
+            # Resolve sources and destinations up front, then copy concurrently
+            copy_jobs = []
+            needed_dirs = set()  # Unique destination parents of this batch
+            for item in items:
+                file_record = item["file"]
+
+                if not copy_files:
+                    extracted_count += 1
+                    extracted_size += file_record["size"] or 0
+                    pbar.update(1)
+                    continue
+
+                source_path = locate_source_file(
+                    files_dir,
+                    file_record,
+                    db_path,
+                    filesystems,
+                    bucket_cache,
+                    userstorage_index,
+                )
+                if not source_path:
+                    pbar.write(f"  Source file not found: {file_record['name']}")
+                    pbar.update(1)
+                    continue
+
+                # Use conditional organization within the target folder
+                dest_path = get_organized_path(
+                    target_dir,
+                    file_record["name"],
+                    file_record,
+                    use_time_organization=not flat_albums,
+                )
+                # Handle duplicate filenames within time-organized structure
+                dest_path = plan_copy_destination(dest_path, resume, claimed_dests)
+
+                # Copies sharing a destination or contentID must not run concurrently
+                group_key = claim_copy_group(
+                    dest_path, file_record["contentID"], claimed_dests, group_links
+                )
+
+                needed_dirs.add(dest_path.parent)
+
+                copy_jobs.append((group_key, (file_record, source_path, dest_path)))
+
+            # Create each destination directory once, with race condition
+            # protection, instead of once per planned file
+            safe_mkdir_all(needed_dirs, created_dirs)
+
+            def on_done(job, result):
+                nonlocal extracted_count, extracted_size, total_size_extracted
+
+                file_record = job[0]
+                file_size = file_record["size"] or 0
+                success, action = result
+                pbar.update(1)
+
+                if not success:
+                    pbar.write(f"  Error copying {file_record['name']}")
+                    return
+
+                extracted_count += 1
+                if action in ["copied", "skipped"]:
+                    extracted_size += file_size
+                    total_size_extracted += file_size
+                elif action in ["hardlinked", "symlinked"]:
+                    # Track space saved through deduplication
+                    dedup_stats["space_saved"] += file_size
+                if dedup:
+                    dedup_stats[action] += 1
+
+                # Update global state
+                extraction_state.total_files_extracted = (
+                    extracted_before + extracted_count
+                )
+                extraction_state.total_size_extracted = total_size_extracted
+
+                # Update progress description with cumulative progress
+                overall_progress = (total_size_extracted / total_target_size) * 100
+                pbar.set_description(f"{desc} [{overall_progress:.1f}% total]")
+
+            completed = run_copy_jobs(copy_jobs, copy_one, on_done, group_links)
+
+        return extracted_count, extracted_size, completed
 
     # Extract organized albums
     for album_name, files in album_files.items():
@@ -2040,126 +2657,11 @@ def extract_by_albums(
         album_size = album_sizes[album_name]
         desc = f"  {album_name[:20]:<20} ({format_size(album_size)})"
 
-        with tqdm(
-            files,
-            desc=desc,
-            unit="files",
-            leave=False,
-            unit_scale=False,
-            dynamic_ncols=True,
-            bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
-        ) as pbar:
-            extracted_count = 0
-            extracted_size = 0
-            for item in pbar:
-                # Check for interrupt every few files
-                if check_interrupt():
-                    extraction_state.total_files_extracted += extracted_count
-                    extraction_state.total_size_extracted += extracted_size
-                    return (
-                        total_extracted + extracted_count,
-                        total_size_extracted + extracted_size,
-                    )
-
-                file_record = item["file"]
-                file_size = file_record["size"] or 0
-
-                if copy_files:
-                    source_path = find_source_file(
-                        files_dir,
-                        file_record["contentID"],
-                        file_record["name"],
-                        file_record.get("storageID"),
-                        db_path,
-                    )
-                    if source_path:
-                        # Use conditional organization within album folder
-                        dest_path = get_organized_path(
-                            album_dir,
-                            file_record["name"],
-                            file_record,
-                            use_time_organization=not flat_albums,
-                        )
-                        # Handle duplicate filenames within time-organized structure
-                        counter = 1
-                        original_dest = dest_path
-                        while dest_path.exists() and not resume:
-                            stem = original_dest.stem
-                            suffix = original_dest.suffix
-                            # Keep the time-organized directory structure
-                            dest_path = (
-                                original_dest.parent / f"{stem}_{counter}{suffix}"
-                            )
-                            counter += 1
-
-                        # Create directory structure with race condition protection
-                        safe_mkdir(dest_path.parent, parents=True)
-
-                        # Use deduplication if enabled
-                        if dedup:
-                            success, action = copy_file_with_dedup(
-                                source_path,
-                                dest_path,
-                                resume,
-                                use_hardlinks,
-                                use_symlinks,
-                                copy_tracker,
-                                file_record,
-                                fix_metadata,  # Pass metadata for timestamp correction
-                            )
-                            if success:
-                                extracted_count += 1
-                                if action in ["copied", "skipped"]:
-                                    extracted_size += file_size
-                                    total_size_extracted += file_size
-                                elif action in ["hardlinked", "symlinked"]:
-                                    # Track space saved through deduplication
-                                    dedup_stats["space_saved"] += file_size
-                                dedup_stats[action] += 1
-                            else:
-                                pbar.write(f"  Error copying {file_record['name']}")
-                        else:
-                            # Use traditional copy function
-                            if use_rsync:
-                                success = copy_file_rsync(
-                                    source_path,
-                                    dest_path,
-                                    resume,
-                                    file_record,
-                                    fix_metadata,
-                                )
-                            else:
-                                success = copy_file_fallback(
-                                    source_path,
-                                    dest_path,
-                                    resume,
-                                    file_record,
-                                    fix_metadata,
-                                )
-
-                            if success:
-                                extracted_count += 1
-                                extracted_size += file_size
-                                total_size_extracted += file_size
-                            else:
-                                pbar.write(f"  Error copying {file_record['name']}")
-
-                        # Update global state
-                        extraction_state.total_files_extracted = (
-                            total_extracted + extracted_count
-                        )
-                        extraction_state.total_size_extracted = total_size_extracted
-
-                        # Update progress description with cumulative progress
-                        overall_progress = (
-                            total_size_extracted / total_target_size
-                        ) * 100
-                        pbar.set_description(f"{desc} [{overall_progress:.1f}% total]")
-                    else:
-                        pbar.write(f"  Source file not found: {file_record['name']}")
-                else:
-                    extracted_count += 1
-                    extracted_size += file_size
+        extracted_count, extracted_size, completed = extract_files_to(
+            files, album_dir, desc, total_extracted
+        )
+        if not completed:
+            return total_extracted + extracted_count, total_size_extracted
 
         if copy_files:
             print(
@@ -2182,126 +2684,11 @@ def extract_by_albums(
         )
 
         desc = f"  Unorganized ({format_size(unorganized_size)})"
-        with tqdm(
-            unorganized_files,
-            desc=desc,
-            unit="files",
-            leave=False,
-            unit_scale=False,
-            dynamic_ncols=True,
-            bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
-        ) as pbar:
-            extracted_count = 0
-            extracted_size = 0
-            for item in pbar:
-                # Check for interrupt during unorganized files
-                if check_interrupt():
-                    extraction_state.total_files_extracted += extracted_count
-                    extraction_state.total_size_extracted += extracted_size
-                    return (
-                        total_extracted + extracted_count,
-                        total_size_extracted + extracted_size,
-                    )
-
-                file_record = item["file"]
-                file_size = file_record["size"] or 0
-
-                if copy_files:
-                    source_path = find_source_file(
-                        files_dir,
-                        file_record["contentID"],
-                        file_record["name"],
-                        file_record.get("storageID"),
-                        db_path,
-                    )
-                    if source_path:
-                        # Use conditional organization within Unorganized folder
-                        dest_path = get_organized_path(
-                            unorganized_dir,
-                            file_record["name"],
-                            file_record,
-                            use_time_organization=not flat_albums,
-                        )
-
-                        # Create directory structure with race condition protection
-                        safe_mkdir(dest_path.parent, parents=True)
-
-                        # Handle duplicate filenames
-                        counter = 1
-                        original_dest = dest_path
-                        while dest_path.exists() and not resume:
-                            stem = original_dest.stem
-                            suffix = original_dest.suffix
-                            dest_path = (
-                                original_dest.parent / f"{stem}_{counter}{suffix}"
-                            )
-                            counter += 1
-
-                        # Use deduplication if enabled
-                        if dedup:
-                            success, action = copy_file_with_dedup(
-                                source_path,
-                                dest_path,
-                                resume,
-                                use_hardlinks,
-                                use_symlinks,
-                                copy_tracker,
-                                file_record,
-                                fix_metadata,  # Pass metadata for timestamp correction
-                            )
-                            if success:
-                                extracted_count += 1
-                                if action in ["copied", "skipped"]:
-                                    extracted_size += file_size
-                                    total_size_extracted += file_size
-                                elif action in ["hardlinked", "symlinked"]:
-                                    # Track space saved through deduplication
-                                    dedup_stats["space_saved"] += file_size
-                                dedup_stats[action] += 1
-                            else:
-                                pbar.write(f"  Error copying {file_record['name']}")
-                        else:
-                            # Use traditional copy function
-                            if use_rsync:
-                                success = copy_file_rsync(
-                                    source_path,
-                                    dest_path,
-                                    resume,
-                                    file_record,
-                                    fix_metadata,
-                                )
-                            else:
-                                success = copy_file_fallback(
-                                    source_path,
-                                    dest_path,
-                                    resume,
-                                    file_record,
-                                    fix_metadata,
-                                )
-
-                            if success:
-                                extracted_count += 1
-                                extracted_size += file_size
-                                total_size_extracted += file_size
-                            else:
-                                pbar.write(f"  Error copying {file_record['name']}")
-
-                        # Update global state
-                        extraction_state.total_files_extracted = (
-                            total_extracted + extracted_count
-                        )
-                        extraction_state.total_size_extracted = total_size_extracted
-
-                        # Update progress description with cumulative progress
-                        overall_progress = (
-                            total_size_extracted / total_target_size
-                        ) * 100
-                        pbar.set_description(f"{desc} [{overall_progress:.1f}% total]")
-                    else:
-                        pbar.write(f"  Source file not found: {file_record['name']}")
-                else:
-                    extracted_count += 1
-                    extracted_size += file_size
+        extracted_count, extracted_size, completed = extract_files_to(
+            unorganized_files, unorganized_dir, desc, total_extracted
+        )
+        if not completed:
+            return total_extracted + extracted_count, total_size_extracted
 
         if copy_files:
             print(
@@ -2400,6 +2787,7 @@ def reorganize_extraction(
 
     files_moved = 0
     total_processed = 0
+    created_dirs = set()  # Target directories already created during the move
 
     # Process album files
     album_files = defaultdict(list)
@@ -2447,7 +2835,7 @@ def reorganize_extraction(
 
             # Move if different
             if old_path != new_path:
-                safe_mkdir(new_path.parent, parents=True)
+                safe_mkdir(new_path.parent, parents=True, known_dirs=created_dirs)
                 old_path.rename(new_path)
                 files_moved += 1
 
@@ -2479,7 +2867,7 @@ def reorganize_extraction(
 
             # Move if different
             if old_path != new_path:
-                safe_mkdir(new_path.parent, parents=True)
+                safe_mkdir(new_path.parent, parents=True, known_dirs=created_dirs)
                 old_path.rename(new_path)
                 files_moved += 1
 
@@ -2523,9 +2911,10 @@ def extract_by_type(
         "other": output_dir / "Other",
     }
 
+    created_dirs = set()  # Directories already created, so each is made only once
     if copy_files:
         for dir_path in type_dirs.values():
-            safe_mkdir(dir_path, parents=True)
+            safe_mkdir(dir_path, parents=True, known_dirs=created_dirs)
 
     total_extracted = 0
     total_size_extracted = 0
@@ -2534,6 +2923,27 @@ def extract_by_type(
 
     # Determine copy function
     copy_func = copy_file_rsync if use_rsync else copy_file_fallback
+    claimed_dests = {}  # Destination -> copy group, covers copies still in flight
+    group_links = {}  # Copy groups merged because they share a destination
+    # userStorage roots for find_source_file, read once instead of per file
+    filesystems = load_filesystem_paths(db_path) if copy_files else {}
+    bucket_cache = {}  # files_dir bucket listings, each read once
+    userstorage_index = {}  # userStorage trees, each walked once
+
+    def copy_one(job):
+        file_record, source_path, dest_path = job
+        if use_rsync:
+            return copy_file_rsync(
+                source_path, dest_path, resume, file_record, fix_metadata
+            )
+        return copy_file_fallback(
+            source_path,
+            dest_path,
+            resume,
+            file_record,
+            fix_metadata,
+            known_dirs=created_dirs,
+        )
 
     print(f"Total size to extract: {format_size(stats['total_size'])}")
     print()
@@ -2576,7 +2986,7 @@ def extract_by_type(
 
         desc = f"  {category.title():<12} ({format_size(category_size)})"
         with tqdm(
-            items,
+            total=len(items),
             desc=desc,
             unit="files",
             leave=False,
@@ -2585,81 +2995,70 @@ def extract_by_type(
             bar_format="{desc}: {percentage:3.0f}%|{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
         ) as pbar:
             extracted_size = 0
-            for item in pbar:
-                # Check for interrupt during type extraction
-                if check_interrupt():
-                    extraction_state.total_files_extracted += (
-                        total_extracted - len(files_by_type[category]) + pbar.n
-                    )
-                    extraction_state.total_size_extracted += total_size_extracted
-                    return total_extracted, total_size_extracted
 
+            # Resolve sources and destinations up front, then copy concurrently
+            copy_jobs = []
+            for item in items:
                 file_record = item["file"]
                 file_size = file_record["size"] or 0
                 type_counts[category] += 1
 
-                if copy_files:
-                    source_path = find_source_file(
-                        files_dir,
-                        file_record["contentID"],
-                        file_record["name"],
-                        file_record.get("storageID"),
-                        db_path,
-                    )
-                    if source_path:
-                        dest_path = type_dirs[category] / file_record["name"]
-
-                        # Handle duplicate filenames
-                        counter = 1
-                        original_dest = dest_path
-                        while dest_path.exists() and not resume:
-                            stem = original_dest.stem
-                            suffix = original_dest.suffix
-                            dest_path = (
-                                type_dirs[category] / f"{stem}_{counter}{suffix}"
-                            )
-                            counter += 1
-
-                        if use_rsync:
-                            success = copy_file_rsync(
-                                source_path,
-                                dest_path,
-                                resume,
-                                file_record,
-                                fix_metadata,
-                            )
-                        else:
-                            success = copy_file_fallback(
-                                source_path,
-                                dest_path,
-                                resume,
-                                file_record,
-                                fix_metadata,
-                            )
-
-                        if success:
-                            total_extracted += 1
-                            extracted_size += file_size
-                            total_size_extracted += file_size
-
-                            # Update global state
-                            extraction_state.total_files_extracted = total_extracted
-                            extraction_state.total_size_extracted = total_size_extracted
-
-                            # Update progress description with cumulative progress
-                            overall_progress = (
-                                total_size_extracted / stats["total_size"]
-                            ) * 100
-                            pbar.set_description(
-                                f"{desc} [{overall_progress:.1f}% total]"
-                            )
-                        else:
-                            pbar.write(f"Error copying {file_record['name']}")
-                    else:
-                        pbar.write(f"Source file not found: {file_record['name']}")
-                else:
+                if not copy_files:
                     total_extracted += 1
                     extracted_size += file_size
+                    pbar.update(1)
+                    continue
+
+                source_path = locate_source_file(
+                    files_dir,
+                    file_record,
+                    db_path,
+                    filesystems,
+                    bucket_cache,
+                    userstorage_index,
+                )
+                if not source_path:
+                    pbar.write(f"Source file not found: {file_record['name']}")
+                    pbar.update(1)
+                    continue
+
+                # Handle duplicate filenames
+                dest_path = plan_copy_destination(
+                    type_dirs[category] / file_record["name"], resume, claimed_dests
+                )
+
+                # Copies sharing a destination or contentID must not run concurrently
+                group_key = claim_copy_group(
+                    dest_path, file_record["contentID"], claimed_dests, group_links
+                )
+
+                copy_jobs.append((group_key, (file_record, source_path, dest_path)))
+
+            def on_done(job, success):
+                nonlocal total_extracted, total_size_extracted, extracted_size
+
+                file_record = job[0]
+                file_size = file_record["size"] or 0
+                pbar.update(1)
+
+                if not success:
+                    pbar.write(f"Error copying {file_record['name']}")
+                    return
+
+                total_extracted += 1
+                extracted_size += file_size
+                total_size_extracted += file_size
+
+                # Update global state
+                extraction_state.total_files_extracted = total_extracted
+                extraction_state.total_size_extracted = total_size_extracted
+
+                # Update progress description with cumulative progress
+                overall_progress = (total_size_extracted / stats["total_size"]) * 100
+                pbar.set_description(f"{desc} [{overall_progress:.1f}% total]")
+
+            if not run_copy_jobs(copy_jobs, copy_one, on_done, group_links):
+                return total_extracted, total_size_extracted
 
         print(
             f"  {category.title()}: {type_counts[category]} files ({format_size(extracted_size)})"
@@ -2813,10 +3212,9 @@ def verify_metadata_sample(
     return results
 
 
-def main():
-    # Register signal handler for graceful interrupts
-    signal.signal(signal.SIGINT, extraction_state.signal_handler)
-
+@functools.lru_cache(maxsize=None)
+def _get_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser once and reuse it for every main() call."""
     parser = argparse.ArgumentParser(
         description="Extract files from ibi recovery database with enhanced features",
         epilog="""
@@ -2948,6 +3346,14 @@ Advanced options:
         help="Reorganize existing extraction directory structure",
     )
 
+    return parser
+
+
+def main():
+    # Register signal handler for graceful interrupts
+    signal.signal(signal.SIGINT, extraction_state.signal_handler)
+
+    parser = _get_parser()
     args = parser.parse_args()
 
     # Handle post-processing deduplication
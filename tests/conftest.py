@@ -1,19 +1,60 @@
 """Pytest configuration and fixtures for ibi recovery tests."""
 
 import json
+import os
+import shutil
 import sqlite3
+import sys
 import tempfile
 from pathlib import Path
 from typing import Any, Dict, List
 
 import pytest
 
+# Test files (matching contentIDs from the mock database)
+MOCK_FILE_CONTENTS = [
+    ("a", "a1b2c3d4e5f6", b"fake jpeg content" * 1000),  # ~17KB
+    ("b", "b2c3d4e5f6a1", b"fake mp4 content" * 5000),  # ~80KB
+    ("c", "c3d4e5f6a1b2", b"fake png content" * 500),  # ~8KB
+    # Note: 'd4e5f6a1b2c3' (missing.jpg) intentionally not created
+]
+
+
+def pytest_configure(config):
+    """Keep test scratch files on tmpfs when one is available.
+
+    Most tests create, copy and delete many small files; on tmpfs that is
+    memory traffic instead of journaled disk writes. Covers both tmp_path and
+    tempfile-based fixtures. An explicit TMPDIR or --basetemp still wins.
+    """
+    shm = Path("/dev/shm")
+    if (
+        sys.platform.startswith("linux")
+        and "TMPDIR" not in os.environ
+        and config.option.basetemp is None
+        and shm.is_dir()
+        and os.access(shm, os.W_OK | os.X_OK)
+    ):
+        tempfile.tempdir = str(shm)
+
+
+@pytest.fixture(scope="session")
+def _scratch_root():
+    """Parent directory for every temp_dir, removed once when the session ends."""
+    root = Path(tempfile.mkdtemp(prefix="ibi-tests-"))
+    yield root
+    shutil.rmtree(root, ignore_errors=True)
+
 
 @pytest.fixture
-def temp_dir():
-    """Create a temporary directory for tests."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(tmpdir)
+def temp_dir(_scratch_root):
+    """Create a temporary directory for tests.
+
+    Each test gets its own directory under the session scratch root. Nothing
+    is deleted per test; one recursive delete at the end of the session
+    replaces the per-test teardown walk.
+    """
+    return Path(tempfile.mkdtemp(dir=_scratch_root))
 
 
 @pytest.fixture
@@ -35,11 +76,8 @@ def mock_ibi_structure(temp_dir):
     return {"root": ibi_root, "data": data_dir, "db": db_dir, "files": files_dir}
 
 
-@pytest.fixture
-def mock_database(mock_ibi_structure):
-    """Create a mock SQLite database with test data."""
-    db_path = mock_ibi_structure["db"] / "index.db"
-
+def _create_mock_database(db_path: Path) -> None:
+    """Write the mock ibi SQLite database with test data to ``db_path``."""
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
@@ -507,26 +545,44 @@ def mock_database(mock_ibi_structure):
     conn.commit()
     conn.close()
 
+
+@pytest.fixture(scope="session")
+def ibi_master(tmp_path_factory):
+    """Build the canonical mock database and files once per test session.
+
+    The per-test fixtures below clone from this read-only master instead of
+    recreating the schema and file contents for every test.
+    """
+    master_dir = tmp_path_factory.mktemp("ibi_master", numbered=False)
+
+    db_path = master_dir / "index.db"
+    _create_mock_database(db_path)
+
+    files_dir = master_dir / "files"
+    for subdir, content_id, content in MOCK_FILE_CONTENTS:
+        (files_dir / subdir).mkdir(parents=True, exist_ok=True)
+        (files_dir / subdir / content_id).write_bytes(content)
+
+    return {"db": db_path, "files": files_dir}
+
+
+@pytest.fixture
+def mock_database(mock_ibi_structure, ibi_master):
+    """Create a mock SQLite database with test data."""
+    db_path = mock_ibi_structure["db"] / "index.db"
+    shutil.copyfile(ibi_master["db"], db_path)
     return db_path
 
 
 @pytest.fixture
-def mock_files(mock_ibi_structure):
+def mock_files(mock_ibi_structure, ibi_master):
     """Create mock files in the files directory."""
     files_dir = mock_ibi_structure["files"]
 
-    # Create test files (matching contentIDs from database)
-    test_files = [
-        ("a", "a1b2c3d4e5f6", b"fake jpeg content" * 1000),  # ~17KB
-        ("b", "b2c3d4e5f6a1", b"fake mp4 content" * 5000),  # ~80KB
-        ("c", "c3d4e5f6a1b2", b"fake png content" * 500),  # ~8KB
-        # Note: 'd4e5f6a1b2c3' (missing.jpg) intentionally not created
-    ]
-
     created_files = []
-    for subdir, content_id, content in test_files:
+    for subdir, content_id, _ in MOCK_FILE_CONTENTS:
         file_path = files_dir / subdir / content_id
-        file_path.write_bytes(content)
+        shutil.copyfile(ibi_master["files"] / subdir / content_id, file_path)
         created_files.append(file_path)
 
     return created_files
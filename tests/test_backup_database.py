@@ -2,11 +2,11 @@
 
 import sqlite3
 import tempfile
-from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
+from ibirecovery.core import database
 from ibirecovery.core.database import detect_ibi_structure, get_merged_files_with_albums
 
 
@@ -225,6 +225,55 @@ class TestBackupDatabaseMerging:
         assert backup_file is not None
         assert backup_file["file"]["_source"] == "backup"
 
+        # The annotation is made on a copy, not on the cached backup load
+        cached_backup, _ = database.load_files_with_albums(backup_db, readonly=True)
+        assert all("_source" not in item["file"] for item in cached_backup)
+
+    def test_merge_reuses_database_load_until_it_changes(self, temp_dir):
+        """Test that repeated loads are cached but never stale or shared."""
+        main_db = temp_dir / "main.db"
+        file_data = {
+            "id": "file1",
+            "name": "photo1.jpg",
+            "contentID": "content1",
+            "mimeType": "image/jpeg",
+            "size": 1000000,
+            "imageDate": 1640995200000,
+            "cTime": 1640995200000,
+        }
+        self.create_test_database(main_db, [file_data])
+
+        with patch(
+            "ibirecovery.core.database.get_all_files_with_albums",
+            wraps=database.get_all_files_with_albums,
+        ) as query:
+            first_files, first_stats = get_merged_files_with_albums(main_db)
+            first_files.append({"file": {"contentID": "extra"}, "albums": []})
+            first_stats["total_files"] = 99
+            first_stats["size_by_type"]["images"] = 0
+
+            second_files, second_stats = get_merged_files_with_albums(main_db)
+            assert query.call_count == 1
+
+            # Callers get their own list and stats, records are shared
+            assert len(second_files) == 1
+            assert second_files[0] is first_files[0]
+            assert second_stats["total_files"] == 1
+            assert second_stats["size_by_type"]["images"] == 1000000
+
+            # Changing the database invalidates the cache
+            conn = sqlite3.connect(main_db)
+            conn.execute(
+                "INSERT INTO Files (id, name, contentID, mimeType, size, cTime) "
+                "VALUES ('file2', 'photo2.jpg', 'content2', 'image/jpeg', 10, 1)"
+            )
+            conn.commit()
+            conn.close()
+
+            third_files, _ = get_merged_files_with_albums(main_db)
+            assert query.call_count == 2
+            assert len(third_files) == 2
+
     def test_merge_with_no_additional_files(self, temp_dir):
         """Test merging when backup has no additional files."""
         # Create identical files in both databases
@@ -376,15 +425,9 @@ class TestReferenceImplementationBackup:
 
     def test_reference_implementation_with_backup(self, temp_dir):
         """Test reference implementation backup database integration."""
-        # Import the reference implementation
-        import sys
-
-        sys.path.insert(0, str(Path(__file__).parent.parent / "docs"))
-
-        try:
-            from reference_implementation import IbiDatabaseParser
-        except ImportError:
-            pytest.skip("Reference implementation not available")
+        IbiDatabaseParser = pytest.importorskip(
+            "reference_implementation", reason="Reference implementation not available"
+        ).IbiDatabaseParser
 
         # Create test databases
         main_db = temp_dir / "main.db"
@@ -510,15 +553,9 @@ class TestReferenceImplementationBackup:
 
     def test_reference_implementation_without_backup(self, temp_dir):
         """Test reference implementation without backup database."""
-        # Import the reference implementation
-        import sys
-
-        sys.path.insert(0, str(Path(__file__).parent.parent / "docs"))
-
-        try:
-            from reference_implementation import IbiDatabaseParser
-        except ImportError:
-            pytest.skip("Reference implementation not available")
+        IbiDatabaseParser = pytest.importorskip(
+            "reference_implementation", reason="Reference implementation not available"
+        ).IbiDatabaseParser
 
         # Create only main database
         main_db = temp_dir / "main.db"
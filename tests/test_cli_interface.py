@@ -1,6 +1,5 @@
 """Test CLI interface and command-line argument parsing."""
 
-import os
 import subprocess
 import sys
 from pathlib import Path
@@ -8,9 +7,6 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import main
 
 
@@ -1,17 +1,12 @@
 """Cross-platform compatibility and edge case tests."""
 
-import os
 import platform
-import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import (
     copy_file_fallback,
     copy_file_with_dedup,
@@ -341,13 +336,12 @@ class TestEdgeCases:
         assert action1 == "copied"
 
         # Second copy of different source but same content
-        # Note: current implementation tracks by source path, not content hash
+        # Files without a contentID are tracked by content hash
         success2, action2 = copy_file_with_dedup(
             source2, dest2, resume=False, copy_tracker=copy_tracker
         )
         assert success2 is True
-        # This might be 'copied' since it's from a different source path
-        assert action2 in ["copied", "hardlinked"]
+        assert action2 == "hardlinked"
 
     def test_format_size_edge_cases(self):
         """Test format_size function with edge cases."""
@@ -1,15 +1,10 @@
 """Test database operations and parsing functionality."""
 
-import os
 import sqlite3
-import sys
 from pathlib import Path
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import (
     connect_db,
     detect_ibi_structure,
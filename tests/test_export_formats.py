@@ -1,15 +1,10 @@
 """Test export formats configuration and validation."""
 
 import json
-import os
-import sys
 from pathlib import Path
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 
 class TestExportFormatsConfig:
     """Test the export_formats.json configuration file."""
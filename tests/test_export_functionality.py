@@ -2,16 +2,11 @@
 
 import csv
 import json
-import os
-import sys
 from io import StringIO
 from pathlib import Path
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import MetadataExporter
 
 # load_export_formats doesn't exist as a separate function
@@ -190,6 +185,35 @@ class TestExportTransformations:
             # Should contain the filename
             assert "test.jpg" in content
 
+    def test_date_transforms_share_cached_conversion(self, mock_export_formats):
+        """Test that one capture date is converted once across date transforms."""
+        from datetime import datetime
+
+        from ibirecovery.extract_files import _format_export_timestamp
+
+        exporter = MetadataExporter(mock_export_formats)
+        timestamp_ms = 1640995200000  # ibi stores milliseconds
+        expected = datetime.fromtimestamp(timestamp_ms / 1000)
+
+        _format_export_timestamp.cache_clear()
+        for _ in range(3):  # e.g. one row per export format
+            assert exporter.transforms["iso_date"]([timestamp_ms]) == (
+                expected.strftime("%Y-%m-%d")
+            )
+            assert exporter.transforms["extract_year"]([None, timestamp_ms]) == (
+                expected.strftime("%Y")
+            )
+
+        cache = _format_export_timestamp.cache_info()
+        assert cache.misses == 2  # One per output format
+        assert cache.hits == 4
+
+        # Strings still go through ISO parsing, unparseable ones fall back as before
+        assert exporter.transforms["iso_date"](["2022-01-01T10:00:00Z"]) == (
+            "2022-01-01"
+        )
+        assert exporter.transforms["extract_year"](["not a date"]) == "not "
+
     def test_gps_coordinate_formatting(self, temp_dir):
         """Test GPS coordinate formatting for export."""
         # This would test coordinate transformation
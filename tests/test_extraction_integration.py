@@ -2,16 +2,12 @@
 
 import os
 import sqlite3
-import sys
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import (
     ExtractionState,
     check_interrupt,
@@ -1,19 +1,21 @@
 """Test file extraction and verification operations."""
 
+import errno
+import hashlib
 import os
 import shutil
-import sys
 from pathlib import Path
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import (
+    _iter_tree_files,
+    content_in_bucket,
+    copy_file_data,
     copy_file_fallback,
     copy_file_with_dedup,
     format_size,
+    locate_source_file,
     verify_file_availability,
 )
 
@@ -81,6 +83,65 @@ class TestFileVerification:
         assert result["total_files"] == 3  # Original total
         # Results should be based on the 2-file sample
 
+    def test_content_in_bucket_reads_each_bucket_once(
+        self, mock_files, mock_ibi_structure, monkeypatch
+    ):
+        """Test that bucket listings are cached instead of re-read per file."""
+        files_dir = mock_ibi_structure["files"]
+        content_id = mock_files[0].name
+
+        scanned = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path):
+            scanned.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+
+        bucket_cache = {}
+        assert content_in_bucket(files_dir, content_id, bucket_cache)
+        assert content_in_bucket(files_dir, content_id, bucket_cache)
+        assert not content_in_bucket(
+            files_dir, content_id[0] + "missing", bucket_cache
+        )
+        assert len(scanned) == 1
+
+    def test_locate_source_file_prefers_bucket_listing(
+        self, mock_files, mock_ibi_structure, monkeypatch
+    ):
+        """Test that bucket hits skip find_source_file unless userStorage applies."""
+        from ibirecovery import extract_files
+
+        files_dir = mock_ibi_structure["files"]
+        content_id = mock_files[0].name
+        fallback_calls = []
+
+        def recording_find_source_file(files_dir, content_id, *args):
+            fallback_calls.append(content_id)
+            return None
+
+        monkeypatch.setattr(
+            extract_files, "find_source_file", recording_find_source_file
+        )
+
+        bucket_cache = {}
+        filesystems = {"userfs1": "/data/wd/diskVolume0/userStorage/user"}
+        record = {"contentID": content_id, "name": "photo.jpg", "storageID": None}
+
+        found = locate_source_file(files_dir, record, None, filesystems, bucket_cache)
+        assert found == files_dir / content_id[0] / content_id
+        assert fallback_calls == []
+
+        # A mapped storageID may resolve to userStorage first
+        user_record = dict(record, storageID="userfs1")
+        locate_source_file(files_dir, user_record, None, filesystems, bucket_cache)
+        # Records outside the bucket layout use the full lookup
+        missing = dict(record, contentID=content_id[0] + "missing")
+        locate_source_file(files_dir, missing, None, filesystems, bucket_cache)
+
+        assert fallback_calls == [content_id, missing["contentID"]]
+
     def test_verify_file_availability_empty_list(self, mock_ibi_structure):
         """Test verification with empty file list."""
         files_dir = mock_ibi_structure["files"]
@@ -129,6 +190,27 @@ class TestFileCopying:
         assert result is True
         assert dest.read_text() == content
 
+    def test_copy_file_fallback_resume_skips_without_copying(
+        self, temp_dir, monkeypatch
+    ):
+        """Test that resume decides from sizes alone, even with older dest mtime."""
+        import ibirecovery.extract_files as extract_files
+
+        source = temp_dir / "source.jpg"
+        dest = temp_dir / "dest.jpg"
+        source.write_text("photo data")
+        dest.write_text("photo data")
+
+        # Metadata correction leaves dest with the (older) database timestamp
+        os.utime(dest, (1640995200, 1640995200))
+
+        def fail_copy(*args, **kwargs):
+            raise AssertionError("resume should not copy file data")
+
+        monkeypatch.setattr(extract_files, "copy_file_data", fail_copy)
+
+        assert copy_file_fallback(source, dest, resume=True) is True
+
     def test_copy_file_fallback_resume_different_size(self, temp_dir):
         """Test copy_file_fallback resume behavior with different size files."""
         source = temp_dir / "source.txt"
@@ -142,6 +224,235 @@ class TestFileCopying:
         assert result is True
         assert dest.read_text() == "new content"
 
+    def test_copy_file_data_preserves_content_and_mtime(self, temp_dir):
+        """Test that copy_file_data copies contents and timestamps like copy2."""
+        source = temp_dir / "source.bin"
+        dest = temp_dir / "dest.bin"
+
+        content = os.urandom(256 * 1024)
+        source.write_bytes(content)
+        os.utime(source, (1640995200, 1640995200))
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+        assert dest.stat().st_mtime == source.stat().st_mtime
+
+    def test_copy_file_data_falls_back_without_copy_file_range(
+        self, temp_dir, monkeypatch
+    ):
+        """Test buffered fallback when copy_file_range is unsupported."""
+        source = temp_dir / "source.bin"
+        dest = temp_dir / "dest.bin"
+        content = b"cross filesystem content" * 100
+        source.write_bytes(content)
+
+        def unsupported(*args, **kwargs):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+
+    def test_copy_file_data_falls_back_when_copy_file_range_copies_nothing(
+        self, temp_dir, monkeypatch
+    ):
+        """Test that a copy_file_range returning 0 up front isn't a success."""
+        source = temp_dir / "source.bin"
+        dest = temp_dir / "dest.bin"
+        content = os.urandom(5000)
+        source.write_bytes(content)
+
+        monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+        monkeypatch.setattr(os, "sendfile", lambda *args: 0, raising=False)
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+
+    def test_copy_file_data_ignores_fadvise_errors(self, temp_dir, monkeypatch):
+        """Test that a failing read-ahead hint doesn't abort the copy."""
+        from ibirecovery.core import file_operations
+
+        def failing_fadvise(*args):
+            raise OSError(errno.EINVAL, "Invalid argument")
+
+        monkeypatch.setattr(os, "posix_fadvise", failing_fadvise, raising=False)
+        monkeypatch.setattr(os, "POSIX_FADV_SEQUENTIAL", 2, raising=False)
+        monkeypatch.setattr(os, "POSIX_FADV_DONTNEED", 4, raising=False)
+
+        source = temp_dir / "large.bin"
+        dest = temp_dir / "large_copy.bin"
+        content = os.urandom(file_operations.SMALL_FILE_SIZE + 1)
+        source.write_bytes(content)
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+
+    def test_copy_file_data_uses_sendfile_without_copy_file_range(
+        self, temp_dir, monkeypatch
+    ):
+        """Test that sendfile is tried before a userspace copy."""
+        if not hasattr(os, "sendfile"):
+            pytest.skip("sendfile not available")
+
+        source = temp_dir / "source.bin"
+        dest = temp_dir / "dest.bin"
+        content = os.urandom(64 * 1024)
+        source.write_bytes(content)
+
+        def unsupported(*args, **kwargs):
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+        calls = []
+        real_sendfile = os.sendfile
+
+        def counting_sendfile(*args):
+            calls.append(args)
+            return real_sendfile(*args)
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+        monkeypatch.setattr(os, "sendfile", counting_sendfile)
+
+        try:
+            copy_file_data(source, dest)
+        except OSError as e:
+            pytest.skip(f"sendfile between files not supported here: {e}")
+
+        assert dest.read_bytes() == content
+        assert calls
+
+    def test_copy_file_data_buffered_fallback_reuses_buffer(
+        self, temp_dir, monkeypatch
+    ):
+        """Test the userspace fallback for large files with one reused buffer."""
+        from ibirecovery.core import file_operations
+
+        def unsupported(*args, **kwargs):
+            raise OSError(errno.EINVAL, "Invalid argument")
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+        monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+
+        size = file_operations.SMALL_FILE_SIZE + file_operations.COPY_BUFFER_SIZE // 2
+        content = os.urandom(size)
+        buffers = []
+        for name in ("first", "second"):
+            source = temp_dir / f"{name}.bin"
+            dest = temp_dir / f"{name}_copy.bin"
+            source.write_bytes(content)
+
+            copy_file_data(source, dest)
+
+            assert dest.read_bytes() == content
+            buffers.append(file_operations._copy_buffers.buf)
+
+        assert buffers[0] is buffers[1]
+
+    def test_copy_file_data_buffered_fallback_honors_buffer_size(
+        self, temp_dir, monkeypatch
+    ):
+        """Test that IBI_COPY_BUFSIZE sets the userspace fallback buffer size."""
+        from ibirecovery.core import file_operations
+
+        def unsupported(*args, **kwargs):
+            raise OSError(errno.EINVAL, "Invalid argument")
+
+        monkeypatch.setattr(os, "copy_file_range", unsupported, raising=False)
+        monkeypatch.setattr(os, "sendfile", unsupported, raising=False)
+        monkeypatch.setenv("IBI_COPY_BUFSIZE", str(128 * 1024))
+
+        source = temp_dir / "large.bin"
+        dest = temp_dir / "large_copy.bin"
+        content = os.urandom(file_operations.SMALL_FILE_SIZE + 1)
+        source.write_bytes(content)
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+        assert len(file_operations._copy_buffers.buf) == 128 * 1024
+
+        monkeypatch.setenv("IBI_COPY_BUFSIZE", "not a number")
+        assert file_operations.get_copy_buffer_size() == (
+            file_operations.COPY_BUFFER_SIZE
+        )
+
+    def test_copy_file_data_drops_large_source_pages(self, temp_dir, monkeypatch):
+        """Test that large sources are read sequentially and then dropped."""
+        if not hasattr(os, "posix_fadvise"):
+            pytest.skip("posix_fadvise not available")
+        from ibirecovery.core import file_operations
+
+        advice = []
+        real_fadvise = os.posix_fadvise
+
+        def recording_fadvise(fd, offset, length, flag):
+            advice.append((os.fstat(fd).st_size, flag))
+            return real_fadvise(fd, offset, length, flag)
+
+        monkeypatch.setattr(os, "posix_fadvise", recording_fadvise)
+
+        small = os.urandom(1024)
+        large = os.urandom(file_operations.SMALL_FILE_SIZE + 1)
+        for name, content in (("small", small), ("large", large)):
+            source = temp_dir / f"{name}.bin"
+            dest = temp_dir / f"{name}_copy.bin"
+            source.write_bytes(content)
+
+            copy_file_data(source, dest)
+
+            assert dest.read_bytes() == content
+
+        # Only the large source gets hints, and its pages are dropped last
+        assert {size for size, _ in advice} == {len(large)}
+        assert advice[-1] == (len(large), os.POSIX_FADV_DONTNEED)
+
+    def test_copy_file_data_small_file_single_copy_call(self, temp_dir, monkeypatch):
+        """Test that small files are copied with one copy_file_range call."""
+        if not hasattr(os, "copy_file_range"):
+            pytest.skip("copy_file_range not available")
+
+        source = temp_dir / "thumbnail.jpg"
+        dest = temp_dir / "thumbnail_copy.jpg"
+        content = os.urandom(16 * 1024)
+        source.write_bytes(content)
+
+        calls = []
+        real_copy_file_range = os.copy_file_range
+
+        def counting_copy_file_range(*args, **kwargs):
+            calls.append(args)
+            return real_copy_file_range(*args, **kwargs)
+
+        monkeypatch.setattr(os, "copy_file_range", counting_copy_file_range)
+
+        copy_file_data(source, dest)
+
+        assert dest.read_bytes() == content
+        assert len(calls) == 1
+
+    def test_hash_file_content_reuses_buffer(self, temp_dir):
+        """Test content hashing across chunk boundaries with one reused buffer."""
+        from ibirecovery.core import file_operations
+
+        content = os.urandom(file_operations.HASH_CHUNK_SIZE * 2 + 123)
+        source = temp_dir / "large.bin"
+        source.write_bytes(content)
+        if file_operations.HAS_XXHASH:
+            expected = file_operations.xxhash.xxh3_128(content).hexdigest()
+        else:
+            expected = hashlib.blake2b(content, digest_size=16).hexdigest()
+
+        buffers = []
+        for _ in range(2):
+            assert file_operations.hash_file_content(source) == expected
+            buffers.append(file_operations._hash_buffers.buf)
+
+        assert buffers[0] is buffers[1]
+
     def test_copy_file_with_dedup_first_copy(self, temp_dir):
         """Test copy_file_with_dedup for first copy of a file."""
         source = temp_dir / "source.txt"
@@ -159,23 +470,72 @@ class TestFileCopying:
         assert dest.read_text() == content
         assert len(copy_tracker) == 1  # Should track this copy
 
+        # Identical content from another source path is linked, not copied
+        other_source = temp_dir / "other_source.txt"
+        other_dest = temp_dir / "other_dest.txt"
+        other_source.write_text(content)
+
+        success, action = copy_file_with_dedup(
+            other_source, other_dest, copy_tracker=copy_tracker
+        )
+
+        assert success is True
+        assert action == "hardlinked"
+        assert other_dest.stat().st_ino == dest.stat().st_ino
+        assert len(copy_tracker) == 1
+
+    def test_batch_copy_one_mkdir_per_dir(self, temp_dir, monkeypatch):
+        """Test that a shared known_dirs set creates each parent only once."""
+        sources = []
+        for i in range(4):
+            source = temp_dir / f"source{i}.txt"
+            source.write_text(f"content {i}")
+            sources.append(source)
+        (temp_dir / "out").mkdir()
+
+        mkdir_calls = []
+        real_mkdir = Path.mkdir
+
+        def counting_mkdir(self, *args, **kwargs):
+            mkdir_calls.append(self)
+            return real_mkdir(self, *args, **kwargs)
+
+        monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+
+        known_dirs = set()
+        copy_tracker = {}
+        for i, source in enumerate(sources):
+            dest = temp_dir / "out" / f"album{i % 2}" / source.name
+            success, action = copy_file_with_dedup(
+                source, dest, copy_tracker=copy_tracker, known_dirs=known_dirs
+            )
+            assert success is True
+            assert action == "copied"
+            assert dest.read_text() == source.read_text()
+
+        assert len(mkdir_calls) == 2
+        assert known_dirs == {temp_dir / "out" / "album0", temp_dir / "out" / "album1"}
+
 
 class TestUtilityFunctions:
     """Test utility functions for file operations."""
 
     def test_format_size_bytes(self):
         """Test size formatting for various byte sizes."""
-        assert format_size(0) == "0 B"
-        assert "512" in format_size(512) and "B" in format_size(512)
-        assert "1" in format_size(1024) and "KB" in format_size(1024)
-        assert "1" in format_size(1536) and "KB" in format_size(1536)  # 1.5 KB
-        assert "1" in format_size(1024 * 1024) and "MB" in format_size(1024 * 1024)
-        assert "1" in format_size(1024 * 1024 * 1024) and "GB" in format_size(
-            1024 * 1024 * 1024
-        )
-        assert "1" in format_size(1024 * 1024 * 1024 * 1024) and "TB" in format_size(
-            1024 * 1024 * 1024 * 1024
-        )
+        test_cases = [
+            (0, "0 B"),
+            (512, "512.0 B"),
+            (1023, "1023.0 B"),
+            (1024, "1.0 KB"),
+            (1536, "1.5 KB"),  # 1.5 KB
+            (1024 * 1024, "1.0 MB"),
+            (1024 * 1024 * 1024, "1.0 GB"),
+            (1024 * 1024 * 1024 * 1024, "1.0 TB"),
+        ]
+
+        for size_bytes, expected in test_cases:
+            result = format_size(size_bytes)
+            assert result == expected
 
     def test_format_size_large_numbers(self):
         """Test size formatting for very large numbers."""
@@ -208,6 +568,25 @@ class TestUtilityFunctions:
         for mime_type in doc_types:
             assert mime_type.startswith("application/") or mime_type.startswith("text/")
 
+    def test_iter_tree_files_walks_regular_files_only(self, temp_dir):
+        """Test the scandir walk yields regular files and skips symlinks."""
+        (temp_dir / "a" / "b").mkdir(parents=True)
+        (temp_dir / "top.jpg").write_bytes(b"1")
+        (temp_dir / "a" / "mid.jpg").write_bytes(b"22")
+        (temp_dir / "a" / "b" / "deep.jpg").write_bytes(b"333")
+        (temp_dir / "link.jpg").symlink_to(temp_dir / "top.jpg")
+        (temp_dir / "linked_dir").symlink_to(temp_dir / "a", target_is_directory=True)
+
+        entries = list(_iter_tree_files(temp_dir))
+
+        # Each directory's files come before its subdirectories
+        assert [Path(e.path) for e in entries] == [
+            temp_dir / "top.jpg",
+            temp_dir / "a" / "mid.jpg",
+            temp_dir / "a" / "b" / "deep.jpg",
+        ]
+        assert [e.stat().st_size for e in entries] == [1, 2, 3]
+
 
 class TestFilePathHandling:
     """Test file path construction and validation."""
@@ -1,120 +1,199 @@
 """Test metadata correction functionality during file extraction."""
 
 import os
-import sys
 import tempfile
 import time
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
-
 from ibirecovery.extract_files import (
     copy_file_fallback,
     copy_file_with_dedup,
     set_file_metadata,
+    set_file_metadata_batch,
+    set_file_metadata_ns,
 )
 
 
 class TestMetadataCorrection:
-    """Test file metadata timestamp correction functionality."""
-
-    def test_set_file_metadata_image_date(self, temp_dir):
-        """Test setting metadata using imageDate for image files."""
-        # Create a test file
-        test_file = temp_dir / "test_image.jpg"
-        test_file.write_text("fake image content")
+    """Test file metadata timestamp correction functionality.
+
+    Only timestamps matter here, so test files are created empty with touch().
+    """
+
+    @pytest.mark.parametrize(
+        "filename,mime_type,fields",
+        [
+            # imageDate wins for images even when cTime/birthTime are set
+            (
+                "test_image.jpg",
+                "image/jpeg",
+                {"imageDate": 1640962800.0, "cTime": 1640962900.0},
+            ),
+            # videoDate wins for videos
+            (
+                "test_video.mp4",
+                "video/mp4",
+                {"videoDate": 1640962800.0, "cTime": 1640962900.0},
+            ),
+            # Fall back to cTime when there is no media date
+            ("test_document.pdf", "application/pdf", {"cTime": 1640962800.0}),
+            # Fall back to birthTime when nothing else is set
+            ("test_file.txt", "text/plain", {"birthTime": 1640962800.0}),
+        ],
+        ids=["image_date", "video_date", "fallback_to_ctime", "fallback_to_birthtime"],
+    )
+    def test_set_file_metadata_picks_timestamp(
+        self, temp_dir, filename, mime_type, fields
+    ):
+        """Test which database field sets the file time for each kind of file."""
+        test_file = temp_dir / filename
+        test_file.touch()
 
         # Target timestamp (2022-01-01 12:00:00 UTC)
         target_timestamp = 1640962800.0
 
         file_metadata = {
-            "mimeType": "image/jpeg",
-            "imageDate": target_timestamp,
+            "mimeType": mime_type,
+            "imageDate": None,
             "videoDate": None,
-            "cTime": 1640962900.0,  # Should not be used since imageDate exists
+            "cTime": None,
             "birthTime": 1640962950.0,
         }
+        file_metadata.update(fields)
 
         # Apply metadata correction
         result = set_file_metadata(test_file, file_metadata)
         assert result is True
 
-        # Verify the timestamp was set correctly
+        # Verify both access and modification times were set
         file_stat = test_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
-        assert abs(file_stat.st_atime - target_timestamp) < 1.0
+        target_ns = int(target_timestamp * 1_000_000_000)
+        assert file_stat.st_mtime_ns == target_ns
+        assert file_stat.st_atime_ns == target_ns
 
-    def test_set_file_metadata_video_date(self, temp_dir):
-        """Test setting metadata using videoDate for video files."""
-        test_file = temp_dir / "test_video.mp4"
-        test_file.write_text("fake video content")
-
-        target_timestamp = 1640962800.0
-
-        file_metadata = {
-            "mimeType": "video/mp4",
-            "imageDate": None,
-            "videoDate": target_timestamp,
-            "cTime": 1640962900.0,  # Should not be used since videoDate exists
-            "birthTime": 1640962950.0,
-        }
-
-        result = set_file_metadata(test_file, file_metadata)
-        assert result is True
-
-        file_stat = test_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
-
-    def test_set_file_metadata_fallback_to_ctime(self, temp_dir):
-        """Test fallback to cTime when imageDate/videoDate not available."""
+    def test_set_file_metadata_single_utime_call(self, temp_dir):
+        """Test that a cTime-only record is applied with one nanosecond utime call."""
         test_file = temp_dir / "test_document.pdf"
-        test_file.write_text("fake document content")
+        test_file.touch()
 
         target_timestamp = 1640962800.0
-
         file_metadata = {
             "mimeType": "application/pdf",
             "imageDate": None,
             "videoDate": None,
             "cTime": target_timestamp,
-            "birthTime": 1640962950.0,
+            "birthTime": None,
         }
 
-        result = set_file_metadata(test_file, file_metadata)
+        with patch("os.utime", wraps=os.utime) as utime:
+            result = set_file_metadata(test_file, file_metadata)
+
         assert result is True
+        target_ns = int(target_timestamp * 1_000_000_000)
+        utime.assert_called_once_with(test_file, ns=(target_ns, target_ns), dir_fd=None)
 
-        file_stat = test_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
+    def test_set_file_metadata_skip_when_already_correct(self, temp_dir):
+        """Test that a file already carrying the target time isn't touched again."""
+        test_file = temp_dir / "test_image.jpg"
+        test_file.touch()
 
-    def test_set_file_metadata_fallback_to_birthtime(self, temp_dir):
-        """Test fallback to birthTime when other timestamps not available."""
-        test_file = temp_dir / "test_file.txt"
-        test_file.write_text("fake content")
+        file_metadata = {
+            "mimeType": "image/jpeg",
+            "imageDate": 1640995200.0,
+            "videoDate": None,
+            "cTime": None,
+            "birthTime": None,
+        }
 
-        target_timestamp = 1640962800.0
+        assert set_file_metadata(test_file, file_metadata) is True
+
+        # A resumed run sees the corrected time and skips the utime call
+        with patch("os.utime", wraps=os.utime) as utime:
+            assert set_file_metadata(test_file, file_metadata) is True
+        utime.assert_not_called()
+        assert test_file.stat().st_mtime == 1640995200.0
+
+    @pytest.mark.skipif(
+        os.utime not in os.supports_dir_fd or not hasattr(os, "O_DIRECTORY"),
+        reason="dir_fd not supported for os.utime",
+    )
+    def test_set_file_metadata_with_dir_fd(self, temp_dir):
+        """Test that a name relative to an open directory matches the path call."""
+        by_path = temp_dir / "by_path.jpg"
+        by_dir_fd = temp_dir / "by_dir_fd.jpg"
+        by_path.touch()
+        by_dir_fd.touch()
 
         file_metadata = {
-            "mimeType": "text/plain",
-            "imageDate": None,
+            "mimeType": "image/jpeg",
+            "imageDate": 1640995200123,
             "videoDate": None,
             "cTime": None,
-            "birthTime": target_timestamp,
+            "birthTime": None,
         }
 
-        result = set_file_metadata(test_file, file_metadata)
+        assert set_file_metadata(by_path, file_metadata) is True
+
+        dir_fd = os.open(temp_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            result = set_file_metadata(
+                Path(by_dir_fd.name), file_metadata, dir_fd=dir_fd
+            )
+        finally:
+            os.close(dir_fd)
+
         assert result is True
+        assert by_dir_fd.stat().st_mtime_ns == by_path.stat().st_mtime_ns
+
+    def test_set_file_metadata_batch(self, temp_dir):
+        """Test that a large batch sets every file's timestamp, in order."""
+        items = []
+        for month in ("01", "02"):
+            (temp_dir / "2022" / month).mkdir(parents=True)
+        for i in range(1000):
+            test_file = temp_dir / "2022" / ("01", "02")[i % 2] / f"photo_{i}.jpg"
+            test_file.touch()
+            file_metadata = {
+                "mimeType": "image/jpeg",
+                "imageDate": 1640995200.0 + i,
+                "videoDate": None,
+                "cTime": None,
+                "birthTime": None,
+            }
+            items.append((test_file, file_metadata))
 
-        file_stat = test_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
+        # One record without any timestamp reports False in its slot
+        items[500] = (items[500][0], {"mimeType": "image/jpeg"})
+
+        results = set_file_metadata_batch(items)
+
+        assert results == [i != 500 for i in range(1000)]
+        for i, (test_file, file_metadata) in enumerate(items):
+            if i != 500:
+                assert test_file.stat().st_mtime_ns == (1640995200 + i) * 1_000_000_000
+
+    def test_set_file_metadata_batch_reports_full_paths(self, temp_dir, capsys):
+        """Test that batch warnings name the full path, not just the file name."""
+        album_dir = temp_dir / "Album" / "2022" / "01"
+        album_dir.mkdir(parents=True)
+        file_metadata = {"mimeType": "image/jpeg", "imageDate": 1640995200.0}
+        items = [(album_dir / f"photo_{i}.jpg", file_metadata) for i in range(16)]
+        for test_file, _ in items[1:]:
+            test_file.touch()
+
+        results = set_file_metadata_batch(items)
+
+        assert results == [i != 0 for i in range(16)]
+        assert str(items[0][0]) in capsys.readouterr().out
 
     def test_set_file_metadata_no_timestamps(self, temp_dir):
         """Test behavior when no valid timestamps are available."""
         test_file = temp_dir / "test_file.txt"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         file_metadata = {
             "mimeType": "text/plain",
@@ -144,7 +223,10 @@ class TestMetadataCorrection:
 
 
 class TestCopyWithMetadataCorrection:
-    """Test copy functions with metadata correction integration."""
+    """Test copy functions with metadata correction integration.
+
+    Sources keep real contents: copies are compared and dedup hashes them.
+    """
 
     def test_copy_file_fallback_with_metadata(self, temp_dir):
         """Test copy_file_fallback applies metadata correction."""
@@ -174,7 +256,77 @@ class TestCopyWithMetadataCorrection:
 
         # Verify metadata was applied
         file_stat = dest_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
+        assert file_stat.st_mtime_ns == int(target_timestamp * 1_000_000_000)
+
+    def test_copy_file_fallback_sets_times_on_open_descriptor(self, temp_dir):
+        """Test that a fresh copy gets its timestamps through the open destination."""
+        if os.utime not in os.supports_fd:
+            pytest.skip("os.utime does not accept file descriptors here")
+
+        from ibirecovery.core import file_operations
+
+        source_file = temp_dir / "source.jpg"
+        dest_file = temp_dir / "dest.jpg"
+        source_file.write_text("fake image content")
+
+        target_timestamp = 1640962800.0
+        file_metadata = {
+            "mimeType": "image/jpeg",
+            "imageDate": target_timestamp,
+            "videoDate": None,
+            "cTime": None,
+            "birthTime": None,
+        }
+
+        with patch.object(
+            file_operations,
+            "set_file_metadata_fd",
+            wraps=file_operations.set_file_metadata_fd,
+        ) as set_fd, patch.object(file_operations, "set_file_metadata") as set_path:
+            result = copy_file_fallback(
+                source_file, dest_file, resume=False, file_metadata=file_metadata
+            )
+
+        assert result is True
+        set_fd.assert_called_once()
+        set_path.assert_not_called()
+        assert dest_file.stat().st_mtime == target_timestamp
+
+    def test_copy_uses_copy_file_range(self, temp_dir):
+        """Test that a corrected copy stays on descriptors from copy to mode."""
+        if not hasattr(os, "copy_file_range") or os.chmod not in os.supports_fd:
+            pytest.skip("copy_file_range or fchmod not available")
+
+        source_file = temp_dir / "source.jpg"
+        dest_file = temp_dir / "dest.jpg"
+        source_file.write_bytes(b"fake image content" * 100)
+        source_file.chmod(0o640)
+
+        target_timestamp = 1640962800.0
+        file_metadata = {
+            "mimeType": "image/jpeg",
+            "imageDate": target_timestamp,
+            "videoDate": None,
+            "cTime": None,
+            "birthTime": None,
+        }
+
+        with patch(
+            "os.copy_file_range", wraps=os.copy_file_range
+        ) as copy_file_range, patch("shutil.copymode") as copymode, patch(
+            "shutil.copystat"
+        ) as copystat:
+            result = copy_file_fallback(
+                source_file, dest_file, resume=False, file_metadata=file_metadata
+            )
+
+        assert result is True
+        copy_file_range.assert_called_once()
+        copymode.assert_not_called()
+        copystat.assert_not_called()
+        assert dest_file.read_bytes() == source_file.read_bytes()
+        assert dest_file.stat().st_mode & 0o777 == 0o640
+        assert dest_file.stat().st_mtime == target_timestamp
 
     def test_copy_file_fallback_no_metadata_correction(self, temp_dir):
         """Test copy_file_fallback when metadata correction is disabled."""
@@ -182,7 +334,7 @@ class TestCopyWithMetadataCorrection:
         dest_file = temp_dir / "dest.jpg"
         source_file.write_text("fake image content")
 
-        original_mtime = time.time() - 3600  # 1 hour ago
+        original_mtime = 1700000000.0  # Fixed time, well after the database date
         os.utime(source_file, (original_mtime, original_mtime))
 
         target_timestamp = 1640962800.0  # Much older timestamp
@@ -205,15 +357,10 @@ class TestCopyWithMetadataCorrection:
         assert result is True
         assert dest_file.exists()
 
-        # Verify metadata was NOT applied (should be close to source file time)
+        # Verify metadata was NOT applied (source time is copied exactly)
         file_stat = dest_file.stat()
-        source_stat = source_file.stat()
-        assert (
-            abs(file_stat.st_mtime - source_stat.st_mtime) < 2.0
-        )  # Should be very close
-        assert (
-            abs(file_stat.st_mtime - target_timestamp) > 100.0
-        )  # Should be very different
+        assert file_stat.st_mtime == original_mtime
+        assert file_stat.st_mtime != target_timestamp
 
     def test_copy_file_fallback_resume_with_metadata(self, temp_dir):
         """Test that resume mode still applies metadata correction."""
@@ -250,7 +397,49 @@ class TestCopyWithMetadataCorrection:
 
         # Verify metadata was corrected even though file wasn't copied
         file_stat = dest_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
+        assert file_stat.st_mtime_ns == int(target_timestamp * 1_000_000_000)
+
+    def test_resume_skips_source_stat(self, temp_dir, monkeypatch):
+        """Test that resume trusts the database size instead of stat'ing the source."""
+        source_file = temp_dir / "source.jpg"
+        dest_file = temp_dir / "dest.jpg"
+        content = "fake image content"
+        source_file.write_text(content)
+        dest_file.write_text(content)
+
+        file_metadata = {
+            "mimeType": "image/jpeg",
+            "imageDate": 1640962800.0,
+            "videoDate": None,
+            "cTime": None,
+            "birthTime": None,
+            "size": len(content),
+        }
+
+        stat_calls = []
+        real_stat = os.stat
+
+        def recording_stat(path, *args, **kwargs):
+            stat_calls.append(Path(path))
+            return real_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", recording_stat)
+
+        assert copy_file_fallback(
+            source_file, dest_file, resume=True, file_metadata=file_metadata
+        )
+        assert copy_file_with_dedup(
+            source_file, dest_file, resume=True, file_metadata=file_metadata
+        ) == (True, "skipped")
+        assert source_file not in stat_calls
+
+        # Without a matching database size the source is still checked
+        file_metadata["size"] = None
+        stat_calls.clear()
+        assert copy_file_fallback(
+            source_file, dest_file, resume=True, file_metadata=file_metadata
+        )
+        assert source_file in stat_calls
 
     def test_copy_file_with_dedup_metadata_correction(self, temp_dir):
         """Test copy_file_with_dedup applies metadata correction."""
@@ -287,7 +476,30 @@ class TestCopyWithMetadataCorrection:
 
         # Verify metadata was applied
         file_stat = dest_file.stat()
-        assert abs(file_stat.st_mtime - target_timestamp) < 1.0
+        assert file_stat.st_mtime_ns == int(target_timestamp * 1_000_000_000)
+
+        # A duplicate is linked to the corrected first copy without touching data
+        duplicate_dest = temp_dir / "album" / "dest.jpg"
+        with patch("os.link", wraps=os.link) as link, patch(
+            "ibirecovery.extract_files.copy_file_data"
+        ) as copy_data:
+            success, action = copy_file_with_dedup(
+                source_file,
+                duplicate_dest,
+                resume=False,
+                use_hardlinks=True,
+                use_symlinks=False,
+                copy_tracker=copy_tracker,
+                file_metadata=file_metadata,
+                fix_metadata=True,
+            )
+
+        assert success is True
+        assert action == "hardlinked"
+        link.assert_called_once()
+        copy_data.assert_not_called()
+        assert duplicate_dest.stat().st_ino == dest_file.stat().st_ino
+        assert duplicate_dest.stat().st_mtime == dest_file.stat().st_mtime
 
 
 class TestMetadataStructureCompatibility:
@@ -296,7 +508,7 @@ class TestMetadataStructureCompatibility:
     def test_metadata_with_comprehensive_export_structure(self, temp_dir):
         """Test metadata correction with data structure from get_comprehensive_export_data."""
         test_file = temp_dir / "test.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Structure matching get_comprehensive_export_data output
         file_record = {
@@ -323,13 +535,15 @@ class TestMetadataStructureCompatibility:
         result = set_file_metadata(test_file, file_record)
         assert result is True
 
+        # Loose check on purpose: the end-to-end case must also pass on
+        # filesystems with coarse timestamps (FAT keeps 2s, HFS+ 1s)
         file_stat = test_file.stat()
         assert abs(file_stat.st_mtime - 1640995200.0) < 1.0
 
     def test_metadata_with_files_with_albums_structure(self, temp_dir):
         """Test metadata correction with data structure from get_all_files_with_albums."""
         test_file = temp_dir / "test.mp4"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Structure matching get_all_files_with_albums output (nested in 'file' key)
         item = {
@@ -348,17 +562,14 @@ class TestMetadataStructureCompatibility:
         }
 
         # Test with the nested file record
-        result = set_file_metadata(test_file, item["file"])
-        assert result is True
-
-        file_stat = test_file.stat()
-        assert abs(file_stat.st_mtime - 1640995300.0) < 1.0
+        applied_ns = set_file_metadata_ns(test_file, item["file"])
+        assert applied_ns == 1640995300 * 1_000_000_000
 
     def test_metadata_priority_order(self, temp_dir):
         """Test that metadata timestamp priority works correctly."""
         # Test image file: imageDate should win over videoDate
         image_file = temp_dir / "test.jpg"
-        image_file.write_text("fake content")
+        image_file.touch()
 
         image_metadata = {
             "mimeType": "image/jpeg",
@@ -368,13 +579,13 @@ class TestMetadataStructureCompatibility:
             "birthTime": 1640995500.0,  # Should be ignored when imageDate exists
         }
 
-        set_file_metadata(image_file, image_metadata)
-        image_stat = image_file.stat()
-        assert abs(image_stat.st_mtime - 1640995200.0) < 1.0
+        assert set_file_metadata_ns(image_file, image_metadata) == (
+            1640995200 * 1_000_000_000
+        )
 
         # Test video file: videoDate should win over imageDate
         video_file = temp_dir / "test.mp4"
-        video_file.write_text("fake content")
+        video_file.touch()
 
         video_metadata = {
             "mimeType": "video/mp4",
@@ -384,14 +595,88 @@ class TestMetadataStructureCompatibility:
             "birthTime": 1640995500.0,  # Should be ignored when videoDate exists
         }
 
-        set_file_metadata(video_file, video_metadata)
-        video_stat = video_file.stat()
-        assert abs(video_stat.st_mtime - 1640995300.0) < 1.0
+        assert set_file_metadata_ns(video_file, video_metadata) == (
+            1640995300 * 1_000_000_000
+        )
+
+    def test_priority_table_no_extra_lookups(self):
+        """Test that a set imageDate is found without reading lower-priority fields."""
+        from ibirecovery.extract_files import get_best_timestamp
+
+        class CountingDict(dict):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.lookups = []
+
+            def get(self, key, default=None):
+                self.lookups.append(key)
+                return super().get(key, default)
+
+        image_metadata = CountingDict(
+            mimeType="image/jpeg",
+            imageDate=1640995200000,  # Milliseconds
+            videoDate=1640995300.0,
+            cTime=1640995400.0,
+            birthTime=1640995500.0,
+        )
+
+        assert get_best_timestamp(image_metadata) == 1640995200.0
+        assert image_metadata.lookups == ["mimeType", "imageDate"]
+
+        # Documents skip the media date fields entirely
+        document_metadata = CountingDict(
+            mimeType="application/pdf",
+            imageDate=1640995200.0,
+            cTime=None,
+            birthTime=1640995500.0,
+        )
+
+        assert get_best_timestamp(document_metadata) == 1640995500.0
+        assert document_metadata.lookups == ["mimeType", "cTime", "birthTime"]
+
+    @pytest.mark.parametrize(
+        "mime_type",
+        [
+            "image/jpeg",
+            "image/",
+            "video/mp4",
+            "video/",
+            "application/pdf",
+            "text/plain",
+            "image",
+            "images/jpeg",
+            "IMAGE/JPEG",
+            "videos/mp4",
+            "",
+            None,
+        ],
+    )
+    def test_mime_prefix_slice_matches_startswith(self, mime_type):
+        """Test that the prefix table picks the same field as startswith branching."""
+        from ibirecovery.extract_files import get_best_timestamp
+
+        file_metadata = {
+            "mimeType": mime_type,
+            "imageDate": 1640995200.0,
+            "videoDate": 1640995300.0,
+            "cTime": 1640995400.0,
+            "birthTime": 1640995500.0,
+        }
+
+        mime = mime_type or ""
+        if mime.startswith("image/"):
+            expected = file_metadata["imageDate"]
+        elif mime.startswith("video/"):
+            expected = file_metadata["videoDate"]
+        else:
+            expected = file_metadata["cTime"]
+
+        assert get_best_timestamp(file_metadata) == expected
 
     def test_timestamp_overflow_error(self, temp_dir):
         """Test that timestamp overflow errors are handled gracefully."""
         test_file = temp_dir / "test_overflow.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Store original timestamp for comparison
         original_stat = test_file.stat()
@@ -420,7 +705,7 @@ class TestMetadataStructureCompatibility:
     def test_timestamp_negative_overflow(self, temp_dir):
         """Test handling of negative timestamps that might cause overflow."""
         test_file = temp_dir / "test_negative.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         original_stat = test_file.stat()
         original_mtime = original_stat.st_mtime
@@ -446,7 +731,7 @@ class TestMetadataStructureCompatibility:
     def test_timestamp_platform_limits(self, temp_dir):
         """Test edge cases around platform timestamp limits."""
         test_file = temp_dir / "test_limits.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Test with various problematic timestamps
         problematic_timestamps = [
@@ -455,6 +740,8 @@ class TestMetadataStructureCompatibility:
             float("nan"),  # NaN
             2**63,  # Likely beyond many platform limits
             -(2**63),  # Large negative number
+            9999999999999999999,  # Beyond the microsecond range
+            -9999999999999999999,  # Extremely negative
         ]
 
         for bad_timestamp in problematic_timestamps:
@@ -469,9 +756,11 @@ class TestMetadataStructureCompatibility:
                 "birthTime": None,
             }
 
-            # Should handle gracefully without crashing
-            result = set_file_metadata(test_file, file_metadata)
+            # Should be rejected by the range check, never reaching os.utime
+            with patch("os.utime", wraps=os.utime) as utime:
+                result = set_file_metadata(test_file, file_metadata)
             assert result is False
+            utime.assert_not_called()
 
             # File should still exist
             assert test_file.exists()
@@ -479,7 +768,7 @@ class TestMetadataStructureCompatibility:
     def test_timestamp_milliseconds_conversion(self, temp_dir):
         """Test that millisecond timestamps are properly converted to seconds."""
         test_file = temp_dir / "test_milliseconds.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Test with millisecond timestamp (like the ones from the user's error)
         # 1673995478000 ms = 1673995478 s = 2023-01-17 21:04:38 UTC
@@ -497,13 +786,17 @@ class TestMetadataStructureCompatibility:
 
         # Verify the timestamp was set correctly (converted to seconds)
         file_stat = test_file.stat()
-        expected_timestamp = 1673995478.0  # Seconds since epoch
-        assert abs(file_stat.st_mtime - expected_timestamp) < 1.0
+        assert file_stat.st_mtime_ns == 1_673_995_478_000_000_000
+
+        # Sub-second milliseconds convert exactly, without float rounding
+        file_metadata["imageDate"] = 1673995478123
+        assert set_file_metadata(test_file, file_metadata) is True
+        assert test_file.stat().st_mtime_ns == 1673995478123 * 1_000_000
 
     def test_timestamp_microseconds_conversion(self, temp_dir):
         """Test that microsecond timestamps are properly converted to seconds."""
         test_file = temp_dir / "test_microseconds.jpg"
-        test_file.write_text("fake content")
+        test_file.touch()
 
         # Test with microsecond timestamp
         # 1673995478000000 μs = 1673995478 s = 2023-01-17 21:04:38 UTC
@@ -521,8 +814,12 @@ class TestMetadataStructureCompatibility:
 
         # Verify the timestamp was set correctly (converted to seconds)
         file_stat = test_file.stat()
-        expected_timestamp = 1673995478.0  # Seconds since epoch
-        assert abs(file_stat.st_mtime - expected_timestamp) < 1.0
+        assert file_stat.st_mtime_ns == 1_673_995_478_000_000_000
+
+        # Sub-second microseconds convert exactly, without float rounding
+        file_metadata["imageDate"] = 1673995478123456
+        assert set_file_metadata(test_file, file_metadata) is True
+        assert test_file.stat().st_mtime_ns == 1673995478123456 * 1_000
 
     def test_deduplication_uses_content_id(self, temp_dir):
         """Test that deduplication uses content_id instead of source path."""
@@ -1,13 +1,23 @@
 """Tests for orphan file filtering functionality."""
 
+import os
+import re
 import sqlite3
 import tempfile
+import threading
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
-from ibirecovery.core.orphan_filter import OrphanFileFilter, format_size
+from ibirecovery.core.orphan_filter import (
+    SKIP_EXTENSIONS,
+    SKIP_PATTERNS,
+    THUMBNAIL_MAX_SIZE,
+    OrphanFileFilter,
+    format_size,
+    get_hash_cache_path,
+)
 
 
 class TestOrphanFileFilter:
@@ -50,6 +60,57 @@ class TestOrphanFileFilter:
         # Different content should have different hash
         assert hash1 != hash2
 
+    def test_hash_file_fast_samples_large_files(self, temp_dir):
+        """Large files hash only sampled chunks, but the tail still counts."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        chunk_size = 1024
+
+        big1 = temp_dir / "big1.bin"
+        big2 = temp_dir / "big2.bin"
+        big3 = temp_dir / "big3.bin"
+        body = b"x" * (chunk_size * 10)
+        big1.write_bytes(body + b"tail-a")
+        big2.write_bytes(body + b"tail-a")
+        big3.write_bytes(body + b"tail-b")
+
+        hash1 = filter_obj.hash_file_fast(big1, chunk_size=chunk_size)
+        assert hash1 == filter_obj.hash_file_fast(big2, chunk_size=chunk_size)
+        assert hash1 != filter_obj.hash_file_fast(big3, chunk_size=chunk_size)
+
+        # Bytes between the sampled chunks do not affect the hash
+        data = bytearray(big2.read_bytes())
+        data[chunk_size * 2] ^= 0xFF
+        big2.write_bytes(bytes(data))
+        assert hash1 == filter_obj.hash_file_fast(big2, chunk_size=chunk_size)
+
+    def test_hash_file_fast_reuses_buffer(self, temp_dir):
+        """One sample buffer is allocated and reused across calls."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        files = []
+        for i in range(5):
+            path = temp_dir / f"file{i}.bin"
+            path.write_bytes(bytes([i]) * 40000)
+            files.append(path)
+
+        first = filter_obj.hash_file_fast(files[0])
+        buf = filter_obj._local.hash_buf
+        hashes = [filter_obj.hash_file_fast(path) for path in files]
+
+        assert filter_obj._local.hash_buf is buf
+        assert hashes[0] == first
+        assert len(set(hashes)) == len(files)
+
+    def test_hash_file_fast_returns_128_bit_int(self, temp_dir):
+        """Digests are 128-bit ints, also for unreadable files."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        path = temp_dir / "file.bin"
+        path.write_bytes(b"x" * 100)
+
+        for target in (path, temp_dir / "missing.bin"):
+            digest = filter_obj.hash_file_fast(target)
+            assert isinstance(digest, int)
+            assert 0 <= digest < 1 << 128
+
     def test_size_based_filtering(self, temp_dir):
         """Test size-based filtering logic."""
         filter_obj = OrphanFileFilter(temp_dir)
@@ -81,6 +142,23 @@ class TestOrphanFileFilter:
         assert skip is False
         assert reason == ""
 
+    @pytest.mark.parametrize(
+        "filename", ["IMG_Thumb.jpg", "preview1.png", "x.cache", "TEMP_photo.jpg"]
+    )
+    def test_size_based_thumbnail_hints(self, temp_dir, filename):
+        """Each name hint flags small files only, case-insensitively."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        file_path = temp_dir / filename
+
+        assert filter_obj.is_size_based_skip(file_path, THUMBNAIL_MAX_SIZE) == (
+            True,
+            "small_file_with_thumbnail_name",
+        )
+        assert filter_obj.is_size_based_skip(file_path, THUMBNAIL_MAX_SIZE + 1) == (
+            False,
+            "",
+        )
+
     def test_pattern_based_filtering(self, temp_dir):
         """Test pattern-based filtering logic."""
         filter_obj = OrphanFileFilter(temp_dir)
@@ -108,6 +186,51 @@ class TestOrphanFileFilter:
                 skip == should_skip
             ), f"File {filename} should {'be skipped' if should_skip else 'not be skipped'}"
 
+    @pytest.mark.parametrize(
+        "filename",
+        [
+            "photo_thumb.jpg",
+            "image_preview.png",
+            "cache_file.dat",
+            "temp_file.tmp",
+            "._resource_fork",
+            ".DS_Store",
+            "Thumbs.db",
+            "photo_150x150.jpg",
+            "clip.thumb2",
+            "normal_photo.jpg",
+        ],
+    )
+    def test_pattern_reason_names_first_matching_pattern(self, temp_dir, filename):
+        """The combined regex reports the same pattern as checking each in turn."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        expected = next(
+            (p for p in SKIP_PATTERNS if re.match(p, filename.lower())), None
+        )
+
+        skip, reason = filter_obj.is_pattern_based_skip(temp_dir / filename)
+
+        if expected is None:
+            assert (skip, reason) == (False, "")
+        else:
+            assert (skip, reason) == (True, f"matches_skip_pattern_{expected}")
+
+    @pytest.mark.parametrize(
+        "filename",
+        ["report.LOG", "a.b.lock", "..bak", ".bak", "name.", "noext", "x.~", "a.~~"],
+    )
+    def test_extension_skip_matches_path_suffix(self, temp_dir, filename):
+        """Extension checks follow Path.suffix, including dotfiles and trailing dots."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        file_path = temp_dir / filename
+
+        skip, reason = filter_obj.is_pattern_based_skip(file_path)
+
+        if file_path.suffix.lower() in SKIP_EXTENSIONS:
+            assert (skip, reason) == (True, f"skip_extension_{file_path.suffix}")
+        else:
+            assert (skip, reason) == (False, "")
+
     def test_content_duplicate_detection(self, temp_dir):
         """Test content duplicate detection."""
         filter_obj = OrphanFileFilter(temp_dir)
@@ -140,6 +263,43 @@ class TestOrphanFileFilter:
         assert reason3 == ""
         assert dup_path3 is None
 
+    def test_content_duplicate_hashes_only_size_collisions(self, temp_dir):
+        """Files with a unique size are never hashed."""
+        filter_obj = OrphanFileFilter(temp_dir)
+
+        unique = []
+        for i in range(10):
+            path = temp_dir / f"unique{i}.bin"
+            path.write_bytes(b"u" * (2000 + i))
+            unique.append(path)
+        original = temp_dir / "original.bin"
+        duplicate = temp_dir / "duplicate.bin"
+        same_size = temp_dir / "same_size.bin"
+        original.write_bytes(b"d" * 5000)
+        duplicate.write_bytes(b"d" * 5000)
+        same_size.write_bytes(b"e" * 5000)
+
+        with patch.object(
+            filter_obj, "hash_file_fast", wraps=filter_obj.hash_file_fast
+        ) as mock_hash:
+            for path in unique:
+                assert filter_obj.is_content_duplicate(path) == (False, "", None)
+            assert mock_hash.call_count == 0
+
+            assert filter_obj.is_content_duplicate(original) == (False, "", None)
+            assert mock_hash.call_count == 0
+
+            # The collision hashes both the earlier file and the new one
+            assert filter_obj.is_content_duplicate(duplicate) == (
+                True,
+                "content_duplicate",
+                original,
+            )
+            assert mock_hash.call_count == 2
+
+            assert filter_obj.is_content_duplicate(same_size) == (False, "", None)
+            assert mock_hash.call_count == 3
+
     def test_database_orphan_detection(self, temp_dir):
         """Test database orphan detection with known content IDs."""
         # Create test database
@@ -173,6 +333,39 @@ class TestOrphanFileFilter:
         assert not filter_obj.is_database_orphan(known_file)  # Not an orphan
         assert filter_obj.is_database_orphan(orphan_file)  # Is an orphan
 
+    def test_database_orphan_matches_exact_basename(self, temp_dir):
+        """The lookup key is the bare file name, compared as-is."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        filter_obj.known_content_ids = {"AbC123"}
+
+        assert not filter_obj.is_database_orphan(temp_dir / "A" / "AbC123")
+        assert not filter_obj.is_database_orphan(Path("AbC123"))
+        # No case folding or suffix stripping
+        assert filter_obj.is_database_orphan(temp_dir / "abc123")
+        assert filter_obj.is_database_orphan(temp_dir / "AbC123.jpg")
+
+    def test_filter_loads_content_ids_read_only(self, temp_dir):
+        """filter_orphan_files loads known IDs without writing to the database."""
+        db_path = temp_dir / "test.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE Files(id TEXT PRIMARY KEY, contentID TEXT)")
+        conn.executemany(
+            "INSERT INTO Files (id, contentID) VALUES (?, ?)",
+            [("1", "known_a"), ("2", "known_b"), ("3", None), ("4", "")],
+        )
+        conn.commit()
+        conn.close()
+        before = db_path.read_bytes()
+
+        files_dir = temp_dir / "files"
+        files_dir.mkdir()
+        filter_obj = OrphanFileFilter(files_dir, db_path)
+        filter_obj.filter_orphan_files([])
+
+        assert filter_obj.known_content_ids == {"known_a", "known_b"}
+        assert db_path.read_bytes() == before
+        assert not (temp_dir / "test.db-wal").exists()
+
     def test_classify_orphan_file_comprehensive(self, temp_dir):
         """Test comprehensive orphan file classification."""
         # Create test database
@@ -235,6 +428,29 @@ class TestOrphanFileFilter:
         assert result["reason"] == "legitimate_orphan"
         assert result["is_true_orphan"] is True
 
+    def test_classify_orphan_file_matches_individual_checks(self, temp_dir):
+        """The fused classifier gives the same reasons as the separate checks."""
+        filter_obj = OrphanFileFilter(temp_dir)
+        cases = [
+            ("Photo_Thumb.JPG", 5000),
+            ("IMG_150x150.jpg", 50000),
+            ("Notes.LOG", 50000),
+            ("clip.mp4", 500),
+        ]
+        for filename, size in cases:
+            file_path = temp_dir / filename
+            file_path.write_bytes(b"x" * size)
+
+            skip, reason = filter_obj.is_size_based_skip(file_path, size)
+            if not skip:
+                skip, reason = filter_obj.is_pattern_based_skip(file_path)
+            result = filter_obj.classify_orphan_file(file_path)
+
+            assert skip
+            assert result["skip"] is True
+            assert result["reason"] == reason
+            assert result["duplicate_of"] is None
+
     def test_filter_orphan_files_comprehensive(self, temp_dir):
         """Test comprehensive orphan filtering with statistics."""
         # Create test database
@@ -307,6 +523,107 @@ class TestOrphanFileFilter:
         # Verify duplicates found
         assert len(results["duplicates_found"]) == 1
 
+    def test_filter_uses_known_sizes_without_stat(self, temp_dir):
+        """Sizes passed in from a directory scan replace per-file stat calls."""
+        filter_obj = OrphanFileFilter(temp_dir)
+
+        test_files = []
+        for i in range(5):
+            path = temp_dir / f"orphan{i}.bin"
+            path.write_bytes(bytes([i]) * (3000 + i))
+            test_files.append(path)
+        file_sizes = {path: path.stat().st_size for path in test_files}
+
+        with patch.object(Path, "stat", side_effect=AssertionError("stat called")):
+            results = filter_obj.filter_orphan_files(test_files, file_sizes)
+
+        assert results["keep_count"] == 5
+        assert results["total_keep_size"] == sum(file_sizes.values())
+
+    @pytest.mark.parametrize("copies", [2, 6])
+    def test_hash_cache_reused_across_runs(self, temp_dir, copies):
+        """A second run takes digests from the cache; changed files are rehashed."""
+        files_dir = temp_dir / "files"
+        files_dir.mkdir()
+        cache_path = temp_dir / "cache" / "hashes.sqlite"
+        test_files = []
+        for group in range(2):
+            for copy in range(copies):
+                path = files_dir / f"group{group}_copy{copy}.bin"
+                path.write_bytes(bytes([group]) * 4000)
+                test_files.append(path)
+
+        first = OrphanFileFilter(files_dir, hash_cache_path=cache_path)
+        first_results = first.filter_orphan_files(test_files)
+        assert cache_path.exists()
+
+        second = OrphanFileFilter(files_dir, hash_cache_path=cache_path)
+        with patch.object(
+            second, "hash_file_fast", wraps=second.hash_file_fast
+        ) as mock_hash:
+            second_results = second.filter_orphan_files(test_files)
+        assert mock_hash.call_count == 0
+        assert second_results["duplicates_found"] == first_results["duplicates_found"]
+
+        # A file whose mtime changed is hashed again
+        changed = test_files[1]
+        os.utime(changed, ns=(0, 1_000_000_000))
+        third = OrphanFileFilter(files_dir, hash_cache_path=cache_path)
+        with patch.object(
+            third, "hash_file_fast", wraps=third.hash_file_fast
+        ) as mock_hash:
+            third.filter_orphan_files(test_files)
+        assert [call.args[0] for call in mock_hash.call_args_list] == [changed]
+
+    def test_hash_cache_off_by_default(self, temp_dir, monkeypatch):
+        """Without IBI_HASH_CACHE no cache is configured."""
+        monkeypatch.delenv("IBI_HASH_CACHE", raising=False)
+        assert get_hash_cache_path() is None
+        assert OrphanFileFilter(temp_dir).hash_cache_path is None
+
+        monkeypatch.setenv("IBI_HASH_CACHE", str(temp_dir / "hashes.sqlite"))
+        assert get_hash_cache_path() == temp_dir / "hashes.sqlite"
+
+    def test_filter_hashes_collisions_in_parallel(self, temp_dir):
+        """Colliding sizes are hashed off-thread; the first file still wins."""
+        filter_obj = OrphanFileFilter(temp_dir)
+
+        test_files = []
+        for group in range(4):
+            for copy in range(3):
+                path = temp_dir / f"group{group}_copy{copy}.bin"
+                path.write_bytes(bytes([group]) * 4000)
+                test_files.append(path)
+        unique = temp_dir / "unique.bin"
+        unique.write_bytes(b"u" * 9000)
+        test_files.append(unique)
+
+        main_thread = threading.get_ident()
+        hash_threads = []
+        real_hash = filter_obj.hash_file_fast
+
+        def recording_hash(file_path, chunk_size=8192):
+            hash_threads.append(threading.get_ident())
+            return real_hash(file_path, chunk_size)
+
+        with patch.object(filter_obj, "hash_file_fast", side_effect=recording_hash):
+            results = filter_obj.filter_orphan_files(test_files)
+
+        # Every same-size file hashed exactly once, none on the main thread
+        assert len(hash_threads) == 12
+        assert main_thread not in hash_threads
+        assert [c["file_path"] for c in results["keep_files"]] == [
+            temp_dir / f"group{group}_copy0.bin" for group in range(4)
+        ] + [unique]
+        assert {
+            c["file_path"]: c["duplicate_of"] for c in results["duplicates_found"]
+        } == {
+            temp_dir / f"group{group}_copy{copy}.bin": temp_dir
+            / f"group{group}_copy0.bin"
+            for group in range(4)
+            for copy in (1, 2)
+        }
+
     def test_get_filtered_orphan_paths(self, temp_dir):
         """Test getting filtered list of orphan paths to keep."""
         filter_obj = OrphanFileFilter(temp_dir)
@@ -364,6 +681,13 @@ class TestFormatSize:
         result = format_size(int(large_size))
         assert "5.5 GB" in result
 
+    def test_format_size_unit_boundaries(self):
+        """Test values either side of each unit boundary and past the largest unit."""
+        assert format_size(1023) == "1023.0 B"
+        assert format_size(1024 * 1024 - 1) == "1024.0 KB"
+        assert format_size(1024**4 - 1) == "1024.0 GB"
+        assert format_size(2048 * 1024**4) == "2048.0 TB"
+
 
 class TestOrphanFilterIntegration:
     """Test integration scenarios for orphan filtering."""
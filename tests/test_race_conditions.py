@@ -1,8 +1,10 @@
 """Tests for race condition handling in file extraction."""
 
 import os
-import threading
+import shutil
+import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import patch
 
@@ -11,10 +13,43 @@ import pytest
 from ibirecovery.extract_files import extract_by_albums
 
 
+@pytest.fixture(scope="session")
+def files_db_master(tmp_path_factory):
+    """Build the minimal Files-table database once per test session."""
+    db_path = tmp_path_factory.mktemp("race_db_master") / "test.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        """
+        CREATE TABLE Files(
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            contentID TEXT,
+            mimeType TEXT,
+            size INTEGER,
+            imageDate INTEGER,
+            videoDate INTEGER,
+            cTime INTEGER,
+            storageID TEXT
+        )
+    """
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def files_db(temp_dir, files_db_master):
+    """Copy the minimal database into this test's directory."""
+    db_path = temp_dir / "test.db"
+    shutil.copyfile(files_db_master, db_path)
+    return db_path
+
+
 class TestRaceConditionHandling:
     """Test directory creation error handling for resume scenarios and race conditions."""
 
-    def test_concurrent_directory_creation_race_condition(self, temp_dir):
+    def test_concurrent_directory_creation_race_condition(self, temp_dir, files_db):
         """Test that directory creation handles FileExistsError from previous runs (resume mode)."""
         files_dir = temp_dir / "files"
         files_dir.mkdir()
@@ -27,29 +62,7 @@ class TestRaceConditionHandling:
         test_file.write_bytes(b"test content")
 
         output_dir = temp_dir / "output"
-        db_path = temp_dir / "test.db"
-
-        # Create minimal database for the test
-        import sqlite3
-
-        conn = sqlite3.connect(db_path)
-        conn.execute(
-            """
-            CREATE TABLE Files(
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                contentID TEXT,
-                mimeType TEXT,
-                size INTEGER,
-                imageDate INTEGER,
-                videoDate INTEGER,
-                cTime INTEGER,
-                storageID TEXT
-            )
-        """
-        )
-        conn.commit()
-        conn.close()
+        db_path = files_db
 
         # Create test data that will result in the same directory path
         files_with_albums = [
@@ -146,20 +159,11 @@ class TestRaceConditionHandling:
             except Exception as e:
                 pytest.fail(f"Thread {thread_id} got unexpected error: {e}")
 
-        # Start multiple threads trying to create overlapping directory structures
-        threads = []
-        results = []
-
-        for i in range(10):
-            thread = threading.Thread(
-                target=lambda i=i: results.append(create_directory_structure(i))
-            )
-            threads.append(thread)
-            thread.start()
-
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        # Run overlapping directory creations concurrently on a small pool; the
+        # workers interleave the same parents without a thread per task, and
+        # any failure is re-raised here by map
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(create_directory_structure, range(10)))
 
         # Verify all threads completed successfully
         assert len(results) == 10
@@ -168,7 +172,89 @@ class TestRaceConditionHandling:
         # Verify base directories were created
         assert (base_dir / "year" / "month").exists()
 
-    def test_directory_creation_with_permission_error(self, temp_dir):
+    def test_parallel_copies_keep_dedup_and_unique_names(self, temp_dir, monkeypatch):
+        """Test that concurrent copies still hardlink duplicates and keep names unique."""
+        monkeypatch.setenv("IBI_COPY_PARALLELISM", "4")
+
+        files_dir = temp_dir / "files"
+        content_ids = ["dupContentA", "dupContentB", "dupContentC"]
+        for content_id in content_ids:
+            (files_dir / content_id[0]).mkdir(parents=True, exist_ok=True)
+            (files_dir / content_id[0] / content_id).write_bytes(
+                content_id.encode() * 100
+            )
+
+        # Four records per content, all with the same name
+        files_with_albums = [
+            {
+                "file": {
+                    "id": f"{content_id}_{i}",
+                    "name": "photo.jpg",
+                    "contentID": content_id,
+                    "mimeType": "image/jpeg",
+                    "size": len(content_id) * 100,
+                    "imageDate": None,
+                    "videoDate": None,
+                    "cTime": None,
+                    "birthTime": None,
+                },
+                "albums": [],
+            }
+            for i in range(4)
+            for content_id in content_ids
+        ]
+        stats = {"total_files": 12, "total_size": 12 * 1100}
+
+        output_dir = temp_dir / "output"
+        total_extracted, _ = extract_by_albums(
+            files_with_albums,
+            files_dir,
+            output_dir,
+            stats,
+            temp_dir / "unused.db",
+            copy_files=True,
+            use_rsync=False,
+            resume=False,
+            dedup=True,
+            flat_albums=True,
+        )
+
+        extracted = list((output_dir / "Unorganized").iterdir())
+        assert total_extracted == 12
+        assert len(extracted) == 12
+
+        # Every duplicate is a hardlink to the single copy of its content
+        inodes = {path.stat().st_ino for path in extracted}
+        assert len(inodes) == len(content_ids)
+        assert all(path.stat().st_nlink == 4 for path in extracted)
+
+    def test_copy_groups_merge_on_shared_destination(self, temp_dir):
+        """Test that a contentID never runs in two copy groups at once."""
+        from ibirecovery.extract_files import claim_copy_group, resolve_copy_group
+
+        claimed_dests = {}
+        group_links = {}
+        shared_dest = temp_dir / "photo.jpg"
+
+        first = claim_copy_group(shared_dest, "contentA", claimed_dests, group_links)
+        # Same destination (resume mode), different content: joins the first group
+        second = claim_copy_group(shared_dest, "contentB", claimed_dests, group_links)
+        # A later contentB record elsewhere must still land in that group
+        third = claim_copy_group(
+            temp_dir / "other.jpg", "contentB", claimed_dests, group_links
+        )
+        # Merging onto a group claimed before contentC was seen follows the link
+        fourth = claim_copy_group(
+            temp_dir / "third.jpg", "contentC", claimed_dests, group_links
+        )
+        fifth = claim_copy_group(
+            temp_dir / "other.jpg", "contentC", claimed_dests, group_links
+        )
+
+        assert first == second == third == fifth
+        assert resolve_copy_group(fourth, group_links) == first
+
+    def test_directory_creation_with_permission_error(self, temp_dir, files_db):
         """Test handling of permission errors during directory creation."""
         files_dir = temp_dir / "files"
         files_dir.mkdir()
@@ -181,29 +267,7 @@ class TestRaceConditionHandling:
         test_file.write_bytes(b"test content")
 
         output_dir = temp_dir / "output"
-        db_path = temp_dir / "test.db"
-
-        # Create minimal database for the test
-        import sqlite3
-
-        conn = sqlite3.connect(db_path)
-        conn.execute(
-            """
-            CREATE TABLE Files(
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                contentID TEXT,
-                mimeType TEXT,
-                size INTEGER,
-                imageDate INTEGER,
-                videoDate INTEGER,
-                cTime INTEGER,
-                storageID TEXT
-            )
-        """
-        )
-        conn.commit()
-        conn.close()
+        db_path = files_db
 
         files_with_albums = [
             {
@@ -269,6 +333,152 @@ class TestRaceConditionHandling:
         safe_mkdir(nested_dir, parents=True)
         assert nested_dir.exists()
 
+    def test_safe_mkdir_known_dirs_skips_repeat_calls(self, temp_dir):
+        """Directories recorded in known_dirs are not created again."""
+        from ibirecovery.extract_files import safe_mkdir
+
+        existing = temp_dir / "existing"
+        existing.mkdir()
+        new_dir = temp_dir / "Unorganized" / "2023" / "01"
+        known_dirs = set()
+
+        mkdir_calls = []
+        original_mkdir = Path.mkdir
+
+        def counting_mkdir(self, *args, **kwargs):
+            mkdir_calls.append(self)
+            return original_mkdir(self, *args, **kwargs)
+
+        with patch.object(Path, "mkdir", counting_mkdir):
+            safe_mkdir(new_dir, parents=True, known_dirs=known_dirs)
+            safe_mkdir(existing, known_dirs=known_dirs)
+            first_round = len(mkdir_calls)
+
+            for _ in range(5):
+                safe_mkdir(new_dir, parents=True, known_dirs=known_dirs)
+                safe_mkdir(existing, known_dirs=known_dirs)
+
+        assert new_dir.is_dir()
+        assert known_dirs == {new_dir, existing}
+        assert first_round > 0
+        assert len(mkdir_calls) == first_round
+
+    def test_extract_by_albums_creates_each_directory_once(self, temp_dir, files_db):
+        """Destination directories are created once per unique parent."""
+        files_dir = temp_dir / "files"
+        content_id = "sharedContent1"
+        (files_dir / content_id[0]).mkdir(parents=True)
+        (files_dir / content_id[0] / content_id).write_bytes(b"content")
+        db_path = files_db
+
+        # Five files in January 2023 and one in February share two directories
+        files_with_albums = [
+            {
+                "file": {
+                    "id": f"file{i}",
+                    "name": f"photo{i}.jpg",
+                    "contentID": content_id,
+                    "mimeType": "image/jpeg",
+                    "size": 7,
+                    "imageDate": 1675296000000 if i == 5 else 1672617600000,
+                    "cTime": 1672617600000,
+                    "storageID": "local",
+                },
+                "albums": [],
+            }
+            for i in range(6)
+        ]
+
+        mkdir_calls = []
+        original_mkdir = Path.mkdir
+
+        def counting_mkdir(self, mode=0o777, parents=False, exist_ok=False):
+            # Path.mkdir retries itself without parents; count only real requests
+            if parents:
+                mkdir_calls.append(self)
+            return original_mkdir(self, mode, parents, exist_ok)
+
+        output_dir = temp_dir / "output"
+        with patch.object(Path, "mkdir", counting_mkdir):
+            total_extracted, _ = extract_by_albums(
+                files_with_albums,
+                files_dir,
+                output_dir,
+                {"total_files": 6, "total_size": 42},
+                db_path,
+                use_rsync=False,
+                resume=False,
+                dedup=False,
+                fix_metadata=False,
+            )
+
+        assert total_extracted == 6
+        month_dirs = [path for path in mkdir_calls if path.parent.name == "2023"]
+        assert sorted(path.name for path in month_dirs) == ["01", "02"]
+
+    def test_safe_mkdir_all_creates_directories_concurrently(
+        self, temp_dir, monkeypatch
+    ):
+        """safe_mkdir_all creates every directory on a pool and records them."""
+        from ibirecovery.extract_files import safe_mkdir_all
+
+        monkeypatch.setenv("IBI_COPY_PARALLELISM", "4")
+        base = temp_dir / "Unorganized"
+        dirs = [
+            base / str(year) / f"{month:02d}"
+            for year in (2022, 2023)
+            for month in range(1, 13)
+        ]
+        # A file blocking one leaf directory is renamed as with safe_mkdir
+        (base / "2023").mkdir(parents=True)
+        (base / "2023" / "05").write_text("not a directory")
+        known_dirs = {base / "2022" / "01"}
+
+        safe_mkdir_all(dirs + dirs[:3], known_dirs)
+
+        assert all(path.is_dir() for path in dirs[1:])
+        # Directories already known are trusted and not created again
+        assert not (base / "2022" / "01").exists()
+        assert known_dirs == set(dirs)
+        assert (base / "2023" / "05_conflicted_file").is_file()
+
+    @pytest.mark.parametrize("parallelism", ["1", "4"])
+    def test_safe_mkdir_all_propagates_unexpected_errors(
+        self, temp_dir, monkeypatch, parallelism
+    ):
+        """Pooled and inline creation surface unexpected errors the same way."""
+        from ibirecovery import extract_files
+
+        monkeypatch.setenv("IBI_COPY_PARALLELISM", parallelism)
+        real_safe_mkdir = extract_files.safe_mkdir
+        broken = temp_dir / "broken"
+
+        def failing_safe_mkdir(path, *args, **kwargs):
+            if path == broken:
+                raise RuntimeError("bug in safe_mkdir")
+            return real_safe_mkdir(path, *args, **kwargs)
+
+        monkeypatch.setattr(extract_files, "safe_mkdir", failing_safe_mkdir)
+
+        with pytest.raises(RuntimeError, match="bug in safe_mkdir"):
+            extract_files.safe_mkdir_all([broken], set())
+        with pytest.raises(RuntimeError, match="bug in safe_mkdir"):
+            extract_files.safe_mkdir_all(
+                [temp_dir / "ok1", broken, temp_dir / "ok2"], set()
+            )
+
+    def test_safe_mkdir_known_dirs_ignores_failures(self, temp_dir):
+        """A directory that could not be created is not recorded as known."""
+        from ibirecovery.extract_files import safe_mkdir
+
+        target = temp_dir / "denied"
+        known_dirs = set()
+
+        with patch.object(Path, "mkdir", side_effect=PermissionError("denied")):
+            safe_mkdir(target, known_dirs=known_dirs)
+
+        assert known_dirs == set()
+
     def test_safe_mkdir_handles_file_exists_error(self, temp_dir):
         """Test that safe_mkdir handles FileExistsError race conditions."""
         from ibirecovery.extract_files import safe_mkdir
@@ -300,26 +510,85 @@ class TestRaceConditionHandling:
 
         assert test_dir.exists()
 
-    def test_safe_mkdir_with_file_conflict(self, temp_dir):
-        """Test safe_mkdir when a file exists with the same name as the directory we want to create."""
+    def test_safe_mkdir_existing_directory_without_exist_ok(self, temp_dir):
+        """An existing directory is accepted and recorded even with exist_ok=False."""
         from ibirecovery.extract_files import safe_mkdir
 
-        # Create a file with the name we want to use for a directory
-        conflict_path = temp_dir / "conflict_name"
-        conflict_path.write_text("I am a file, not a directory")
+        existing = temp_dir / "existing"
+        existing.mkdir()
+        known_dirs = set()
+
+        safe_mkdir(existing, exist_ok=False, known_dirs=known_dirs)
+
+        assert existing.is_dir()
+        assert known_dirs == {existing}
+        assert list(temp_dir.iterdir()) == [existing]
+
+    def test_safe_mkdir_conflict_handling_respects_symlinks(self, temp_dir):
+        """Symlinked directories are kept; dangling symlinks are not overwritten."""
+        from ibirecovery.extract_files import safe_mkdir
+
+        real_dir = temp_dir / "real"
+        real_dir.mkdir()
+        linked_dir = temp_dir / "linked"
+        linked_dir.symlink_to(real_dir, target_is_directory=True)
+
+        safe_mkdir(linked_dir, exist_ok=False)
+        assert linked_dir.is_symlink()
+
+        conflict_path = temp_dir / "08"
+        conflict_path.write_text("blocking file")
+        dangling = temp_dir / "08_conflicted_file"
+        dangling.symlink_to(temp_dir / "nowhere")
 
-        # Try to create a directory with the same name - should rename file and create directory
         safe_mkdir(conflict_path)
 
+        assert conflict_path.is_dir()
+        assert dangling.is_symlink()
+        assert (temp_dir / "08_conflicted_file_1").read_text() == "blocking file"
+
+    @pytest.mark.parametrize(
+        "target,parents,taken,renamed",
+        [
+            # A file sits exactly where the directory should go
+            ("conflict_name", False, [], "conflict_name_conflicted_file"),
+            # Production case: a file named like a month directory
+            ("2023/08", True, [], "08_conflicted_file"),
+            # Earlier rename targets are taken, so the counter is used
+            (
+                "conflicts/data",
+                True,
+                ["data_conflicted_file", "data_conflicted_file_1"],
+                "data_conflicted_file_2",
+            ),
+        ],
+    )
+    def test_safe_mkdir_renames_conflicting_file(
+        self, temp_dir, target, parents, taken, renamed
+    ):
+        """Test that safe_mkdir renames a blocking file and creates the directory."""
+        from ibirecovery.extract_files import safe_mkdir
+
+        conflict_path = temp_dir / target
+        conflict_path.parent.mkdir(parents=True, exist_ok=True)
+        conflict_content = "This file is blocking directory creation"
+        conflict_path.write_text(conflict_content)
+        for name in taken:
+            (conflict_path.parent / name).write_text(f"already taken: {name}")
+
+        safe_mkdir(conflict_path, parents=parents)
+
         # Directory should now exist
-        assert conflict_path.exists()
         assert conflict_path.is_dir()
 
-        # Original file should be renamed
-        renamed_file = temp_dir / "conflict_name_conflicted_file"
-        assert renamed_file.exists()
+        # Original file should be renamed and still exist
+        renamed_file = conflict_path.parent / renamed
         assert renamed_file.is_file()
-        assert renamed_file.read_text() == "I am a file, not a directory"
+        assert renamed_file.read_text() == conflict_content
+
+        # Files already holding earlier rename targets are left alone
+        for name in taken:
+            assert (conflict_path.parent / name).read_text() == f"already taken: {name}"
 
     def test_safe_mkdir_exact_production_scenario(self, temp_dir):
         """Test the exact scenario from production: safe_mkdir(dest_path.parent, parents=True)."""
@@ -341,57 +610,21 @@ class TestRaceConditionHandling:
         assert august_dir.exists()
         assert august_dir.is_dir()
 
-    def test_safe_mkdir_resolves_file_directory_conflict(self, temp_dir):
-        """Test that safe_mkdir intelligently renames conflicting files to create directories."""
+    def test_safe_mkdir_conflict_without_hard_links(self, temp_dir, monkeypatch):
+        """Conflicting files are still moved aside where hard links fail."""
         from ibirecovery.extract_files import safe_mkdir
 
-        # Create a file where we need a directory (simulates production issue)
-        conflict_path = temp_dir / "2023" / "08"
-        conflict_path.parent.mkdir(parents=True, exist_ok=True)
+        def no_hard_links(*args, **kwargs):
+            raise PermissionError(1, "Operation not permitted")
 
-        # Create a file with the directory name we need
-        conflict_content = "This file is blocking directory creation"
-        conflict_path.write_text(conflict_content)
-        assert conflict_path.is_file()
-
-        # Try to create the directory - should rename the file and create directory
-        safe_mkdir(conflict_path, parents=True)
+        monkeypatch.setattr(os, "link", no_hard_links)
 
-        # Directory should now exist
-        assert conflict_path.exists()
-        assert conflict_path.is_dir()
-
-        # Original file should be renamed and still exist
-        renamed_file = conflict_path.parent / "08_conflicted_file"
-        assert renamed_file.exists()
-        assert renamed_file.is_file()
-        assert renamed_file.read_text() == conflict_content
-
-    def test_safe_mkdir_handles_multiple_conflicts(self, temp_dir):
-        """Test that safe_mkdir handles multiple conflicting files with counter."""
-        from ibirecovery.extract_files import safe_mkdir
-
-        # Create multiple files that would conflict with renaming
-        conflict_dir = temp_dir / "conflicts"
-        conflict_dir.mkdir()
-
-        target_path = conflict_dir / "data"
-
-        # Create original conflicting file
+        target_path = temp_dir / "data"
         target_path.write_text("original file")
+        (temp_dir / "data_conflicted_file").write_text("conflict 1")
 
-        # Create files that would conflict with the rename
-        (conflict_dir / "data_conflicted_file").write_text("conflict 1")
-        (conflict_dir / "data_conflicted_file_1").write_text("conflict 2")
-
-        # Try to create directory - should use data_conflicted_file_2
-        safe_mkdir(target_path, parents=True)
+        safe_mkdir(target_path)
 
-        # Directory should now exist
         assert target_path.is_dir()
-
-        # Original file should be renamed to data_conflicted_file_2
-        renamed_file = conflict_dir / "data_conflicted_file_2"
-        assert renamed_file.exists()
-        assert renamed_file.is_file()
-        assert renamed_file.read_text() == "original file"
+        assert (temp_dir / "data_conflicted_file").read_text() == "conflict 1"
+        assert (temp_dir / "data_conflicted_file_1").read_text() == "original file"
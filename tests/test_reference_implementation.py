@@ -1,18 +1,11 @@
 """Test the reference implementation API."""
 
-import os
-import sys
-from pathlib import Path
-
 import pytest
 
-# Add the package to the path for testing
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "docs"))
-
-try:
-    from reference_implementation import IbiDatabaseParser
-except ImportError:
-    pytest.skip("Reference implementation not available", allow_module_level=True)
+# docs/ is on pythonpath via pyproject.toml
+IbiDatabaseParser = pytest.importorskip(
+    "reference_implementation", reason="Reference implementation not available"
+).IbiDatabaseParser
 
 
 class TestIbiDatabaseParser:
@@ -58,6 +51,34 @@ class TestIbiDatabaseParser:
 
         parser.close()
 
+    def test_get_all_files_converts_millisecond_timestamps(
+        self, mock_database, mock_ibi_structure
+    ):
+        """Millisecond timestamps are returned in seconds; others are untouched."""
+        import sqlite3
+
+        parser = IbiDatabaseParser(str(mock_database), str(mock_ibi_structure["files"]))
+        parser.connect()
+        files = {record["id"]: record for record in parser.get_all_files()}
+        parser.close()
+
+        conn = sqlite3.connect(mock_database)
+        raw = {
+            file_id: (c_time, image_date)
+            for file_id, c_time, image_date in conn.execute(
+                "SELECT id, cTime, imageDate FROM Files"
+            )
+        }
+        conn.close()
+
+        for file_id, record in files.items():
+            c_time, image_date = raw[file_id]
+            assert record["cTime"] == c_time / 1000.0
+            if image_date is None:
+                assert record["imageDate"] is None
+            else:
+                assert record["imageDate"] == image_date / 1000.0
+
     def test_get_content_tags_summary(self, mock_database, mock_ibi_structure):
         """Test retrieving content tags summary."""
         parser = IbiDatabaseParser(str(mock_database), str(mock_ibi_structure["files"]))
@@ -262,6 +283,55 @@ class TestReferenceImplementationIntegration:
 
         parser.close()
 
+    def test_export_matches_per_file_queries(self, mock_database, mock_ibi_structure):
+        """Batched tags and albums in the export match the per-file lookups."""
+        parser = IbiDatabaseParser(str(mock_database), str(mock_ibi_structure["files"]))
+        parser.connect()
+
+        exported = parser.export_comprehensive_data()["files"]
+        assert any(record["ai_tags"] for record in exported)
+        assert any(record["albums"] for record in exported)
+        for record in exported:
+            expected_tags = [
+                tag["tag"] for tag in parser.get_file_tags(record["id"]) if tag["auto"]
+            ]
+            assert record["ai_tags"] == expected_tags
+            assert record["albums"] == parser.get_file_albums(record["id"])
+
+        parser.close()
+
+    def test_parser_memoizes_table_queries(self, mock_database, mock_ibi_structure):
+        """Whole-table queries run once per connection and return fresh copies."""
+        import sqlite3
+
+        parser = IbiDatabaseParser(str(mock_database), str(mock_ibi_structure["files"]))
+        parser.connect()
+
+        albums = parser.get_all_albums()
+        albums[0]["name"] = "changed by caller"
+        albums[0]["added_by_caller"] = True
+        albums.append({})
+
+        # Rows added behind the parser's back show up after reconnecting
+        writer = sqlite3.connect(mock_database)
+        writer.execute(
+            "INSERT INTO FileGroups (id, name, cTime) VALUES ('new', 'New', 0)"
+        )
+        writer.commit()
+        writer.close()
+
+        cached = parser.get_all_albums()
+        assert len(cached) == len(albums) - 1
+        assert cached[0]["name"] != "changed by caller"
+        assert "added_by_caller" not in cached[0]
+        cached[0]["name"] = "changed again"
+        assert parser.get_all_albums()[0]["name"] != "changed again"
+
+        parser.close()
+        parser.connect()
+        assert len(parser.get_all_albums()) == len(cached) + 1
+        parser.close()
+
 
 class TestReferenceImplementationDocumentation:
     """Test that reference implementation matches documentation."""
@@ -42,6 +42,7 @@ class TestRsyncOptimization:
             assert "--partial" in called_cmd
             assert "--update" in called_cmd
             assert "--size-only" in called_cmd
+            assert "--whole-file" in called_cmd
             assert "--progress" in called_cmd
             assert "--human-readable" in called_cmd
 
@@ -78,6 +79,7 @@ class TestRsyncOptimization:
             assert "--progress" in called_cmd
             assert "--human-readable" in called_cmd
             assert "-av" in called_cmd
+            assert "--whole-file" in called_cmd
 
     def test_rsync_size_only_performance_improvement(self, temp_dir):
         """Test that --size-only significantly improves performance for existing files."""
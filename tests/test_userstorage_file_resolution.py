@@ -2,10 +2,12 @@
 
 import sqlite3
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from ibirecovery.core.utils import find_source_file
+from ibirecovery.core.database import load_filesystem_paths
+from ibirecovery.core.utils import find_source_file, index_user_dir
 
 
 class TestUserStorageFileResolution:
@@ -193,3 +195,94 @@ class TestUserStorageFileResolution:
         # Verify the directory exists (just not returned)
         assert album_dir.is_dir()
         assert album_dir.name == "MyPhotos"
+
+    def test_userstorage_preloaded_filesystems_skip_database(self, temp_dir):
+        """A preloaded Filesystems mapping resolves files without opening the db."""
+        ibi_root = temp_dir / "ibi_root"
+        files_dir = ibi_root / "restsdk" / "data" / "files"
+        files_dir.mkdir(parents=True)
+
+        album_dir = ibi_root / "userStorage" / "auth0|user123" / "Album"
+        album_dir.mkdir(parents=True)
+        photo = album_dir / "IMG_0001.jpg"
+        photo.write_bytes(b"photo data")
+
+        db_path = temp_dir / "test.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE Filesystems(id TEXT PRIMARY KEY, name TEXT, path TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO Filesystems (id, name, path) VALUES (?, ?, ?)",
+            [
+                (
+                    "userfs1",
+                    "auth0|user123",
+                    "/data/wd/diskVolume0/userStorage/auth0|user123",
+                ),
+                ("emptyfs", "empty", None),
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+        filesystems = load_filesystem_paths(db_path)
+        assert filesystems == {
+            "userfs1": "/data/wd/diskVolume0/userStorage/auth0|user123"
+        }
+        assert load_filesystem_paths(temp_dir / "missing.db") == {}
+
+        with patch(
+            "ibirecovery.core.database.connect_db_readonly",
+            side_effect=AssertionError("database queried per file"),
+        ):
+            result = find_source_file(
+                files_dir, "contentID1", "IMG_0001.jpg", "userfs1", db_path, filesystems
+            )
+            missing = find_source_file(
+                files_dir, "contentID2", "IMG_0001.jpg", "otherfs", db_path, filesystems
+            )
+
+        assert result == photo
+        assert missing is None
+
+    def test_userstorage_shared_index_walks_tree_once(self, temp_dir):
+        """Searches under one userStorage root share a single directory walk."""
+        ibi_root = temp_dir / "ibi_root"
+        files_dir = ibi_root / "restsdk" / "data" / "files"
+        files_dir.mkdir(parents=True)
+
+        user_storage = ibi_root / "userStorage" / "auth0|user123"
+        (user_storage / "Photos" / "2023").mkdir(parents=True)
+        (user_storage / "Videos").mkdir(parents=True)
+        photo = user_storage / "Photos" / "2023" / "IMG[1].jpg"
+        photo.write_bytes(b"photo data")
+        video = user_storage / "Videos" / "clip.mp4"
+        video.write_bytes(b"video data")
+        (user_storage / "Photos" / "clip.mp4").mkdir()  # Directory, not a match
+
+        filesystems = {"userfs1": "/data/wd/diskVolume0/userStorage/auth0|user123"}
+        userstorage_index = {}
+
+        with patch(
+            "ibirecovery.core.utils.index_user_dir", wraps=index_user_dir
+        ) as indexer:
+            results = [
+                find_source_file(
+                    files_dir,
+                    content_id,
+                    file_name,
+                    "userfs1",
+                    filesystems=filesystems,
+                    userstorage_index=userstorage_index,
+                )
+                for content_id, file_name in [
+                    ("contentID1", "IMG[1].jpg"),
+                    ("contentID2", "clip.mp4"),
+                    ("contentID3", "missing.jpg"),
+                ]
+            ]
+
+        # Names are matched exactly, not as glob patterns
+        assert results == [photo, video, None]
+        assert indexer.call_count == 1